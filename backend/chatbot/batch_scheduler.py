@@ -0,0 +1,184 @@
+"""
+Planificador de micro-lotes para la inferencia
+Agrupa las peticiones de sesiones concurrentes en un solo lote por llamada
+al modelo; cada llamante recibe su resultado a través de un Future
+"""
+
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FuturesTimeoutError
+
+
+class MicroBatchScheduler:
+    """Junta textos durante unos milisegundos y los envía al modelo en lote"""
+    
+    def __init__(self, funcion, max_lote=16, espera_max_ms=5.0, nombre="lote", timeout=30.0):
+        """
+        Args:
+            funcion (callable): funcion(textos, **kwargs) -> lista de salidas (una por texto)
+            max_lote (int): Textos máximos por llamada al modelo
+            espera_max_ms (float): Espera máxima desde la primera petición del lote
+            nombre (str): Nombre del hilo trabajador
+            timeout (float): Segundos máximos de espera por todas las salidas
+                             de una llamada a __call__ (None o 0: sin límite)
+        """
+        self.funcion = funcion
+        self.max_lote = max(1, int(max_lote))
+        self.espera_max = espera_max_ms / 1000.0
+        self.nombre = nombre
+        self.timeout = timeout or None
+        
+        self._cola = queue.Queue()
+        self._hilo = None
+        self._lock = threading.Lock()
+        
+        # Métricas
+        self.peticiones = 0
+        self.lotes = 0
+        self.llamadas = 0
+        self.canceladas = 0
+    
+    def enviar(self, texto, **kwargs):
+        """
+        Encola un texto para el próximo lote
+        
+        Los textos solo se agrupan con otros que tengan los mismos kwargs
+        (p. ej. las mismas candidate_labels), que deben ser hashables.
+        
+        Returns:
+            Future: Se resuelve con la salida del modelo para este texto
+        """
+        futuro = Future()
+        clave = tuple(sorted(kwargs.items()))
+        self._arrancar()
+        self._cola.put((texto, clave, kwargs, futuro))
+        return futuro
+    
+    def __call__(self, textos, **kwargs):
+        """
+        Mismo contrato que el pipeline: bloquea hasta tener todas las salidas
+        
+        Returns:
+            list: Una salida por texto, en el mismo orden
+        
+        Raises:
+            concurrent.futures.TimeoutError: Si las salidas tardan más de `timeout`
+        """
+        if isinstance(textos, str):
+            textos = [textos]
+        futuros = [self.enviar(texto, **kwargs) for texto in textos]
+        if self.timeout is None:
+            return [futuro.result() for futuro in futuros]
+        
+        # Un solo plazo para toda la llamada, no uno por salida
+        limite = time.monotonic() + self.timeout
+        try:
+            return [futuro.result(timeout=max(0.0, limite - time.monotonic())) for futuro in futuros]
+        except FuturesTimeoutError:
+            # Lo que siga en cola ya no lo lee nadie: el trabajador lo descarta
+            for futuro in futuros:
+                futuro.cancel()
+            raise
+    
+    def _arrancar(self):
+        """Lanza el hilo trabajador en el primer uso"""
+        if self._hilo is not None:
+            return
+        
+        with self._lock:
+            if self._hilo is None:
+                self._hilo = threading.Thread(
+                    target=self._bucle, name=self.nombre, daemon=True
+                )
+                self._hilo.start()
+    
+    def _bucle(self):
+        """Espera una petición, completa el lote hasta el tamaño o el plazo y lo ejecuta"""
+        while True:
+            lote = [self._cola.get()]
+            limite = time.monotonic() + self.espera_max
+            
+            while len(lote) < self.max_lote:
+                restante = limite - time.monotonic()
+                try:
+                    if restante > 0:
+                        lote.append(self._cola.get(timeout=restante))
+                    else:
+                        lote.append(self._cola.get_nowait())
+                except queue.Empty:
+                    break
+            
+            self._ejecutar(lote)
+    
+    def _ejecutar(self, lote):
+        """Llama al modelo una vez por grupo de kwargs y reparte los resultados"""
+        # Las peticiones canceladas por timeout no se envían al modelo
+        vivas = [p for p in lote if p[3].set_running_or_notify_cancel()]
+        self.canceladas += len(lote) - len(vivas)
+        lote = vivas
+        if not lote:
+            return
+        
+        grupos = {}
+        for peticion in lote:
+            grupos.setdefault(peticion[1], []).append(peticion)
+        
+        self.peticiones += len(lote)
+        self.lotes += 1
+        
+        for peticiones in grupos.values():
+            kwargs = peticiones[0][2]
+            self.llamadas += 1
+            try:
+                salidas = self.funcion([p[0] for p in peticiones], **kwargs)
+                if isinstance(salidas, dict):
+                    salidas = [salidas]
+                # Con una salida de menos, zip dejaría futuros sin resolver
+                if salidas is None or len(salidas) != len(peticiones):
+                    recibidas = "ninguna" if salidas is None else len(salidas)
+                    raise ValueError(f"{self.nombre}: {recibidas} salidas para {len(peticiones)} textos")
+                for (_, _, _, futuro), salida in zip(peticiones, salidas):
+                    futuro.set_result(salida)
+            except Exception as e:
+                for _, _, _, futuro in peticiones:
+                    if not futuro.done():
+                        futuro.set_exception(e)
+    
+    def estadisticas(self):
+        """
+        Returns:
+            dict: {peticiones, lotes, llamadas, tamano_medio_lote, canceladas, en_cola}
+        """
+        return {
+            "peticiones": self.peticiones,
+            "lotes": self.lotes,
+            "llamadas": self.llamadas,
+            "tamano_medio_lote": round(self.peticiones / self.llamadas, 2) if self.llamadas else 0.0,
+            "canceladas": self.canceladas,
+            "en_cola": self._cola.qsize()
+        }
+
+
+def crear_planificador(funcion, nombre):
+    """
+    Planificador configurado por entorno, o None si MICROBATCH está desactivado
+    
+    Args:
+        funcion (callable): funcion(textos, **kwargs) -> lista de salidas
+        nombre (str): Nombre del hilo trabajador
+    
+    Returns:
+        MicroBatchScheduler o None
+    """
+    if os.getenv("MICROBATCH", "0") != "1":
+        return None
+    
+    return MicroBatchScheduler(
+        funcion,
+        max_lote=int(os.getenv("MICROBATCH_MAX_LOTE", "16")),
+        espera_max_ms=float(os.getenv("MICROBATCH_ESPERA_MS", "5")),
+        nombre=nombre,
+        timeout=float(os.getenv("MICROBATCH_TIMEOUT_S", "30"))
+    )
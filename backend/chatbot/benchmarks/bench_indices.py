@@ -0,0 +1,232 @@
+"""
+Benchmark de las consultas de pedidos y menú antes y después de los índices
+Crea tablas de prueba (bench_pedidos, bench_menu) con la misma estructura que
+el esquema pero solo con clave primaria, las llena con datos sintéticos, mide
+la latencia de las consultas del chatbot y del tablero, aplica los índices de
+db_migrations.INDICES y repite la medición
+
+Uso (con la base de datos de docker-compose levantada):
+    python benchmarks/bench_indices.py --filas 1000000
+    python benchmarks/bench_indices.py --filas 2000000 --repeticiones 100 --json resultados.json
+"""
+
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from db_migrations import INDICES, crear_indice
+from db_repository import _crear_conexion
+
+
+TABLAS = {"pedidos": "bench_pedidos", "menu": "bench_menu"}
+
+SQL_CREAR_PEDIDOS = """
+CREATE TABLE bench_pedidos (
+    id INT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    id_pedido VARCHAR(50) NOT NULL,
+    producto VARCHAR(100) DEFAULT NULL,
+    cantidad INT DEFAULT NULL,
+    precio_unitario DECIMAL(10,2) DEFAULT NULL,
+    nota TEXT DEFAULT NULL,
+    estado VARCHAR(50) DEFAULT 'pendiente',
+    fecha TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+"""
+
+SQL_CREAR_MENU = """
+CREATE TABLE bench_menu (
+    id INT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    nombre_producto VARCHAR(100) NOT NULL,
+    precio DECIMAL(10,2) DEFAULT NULL,
+    disponible TINYINT(1) DEFAULT 1
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+"""
+
+# Mismas consultas que db_repository.py y backend/api/pedidos.repository.php
+# (las del tablero con LIMIT: sin él domina el tiempo de enviar todas las filas)
+CONSULTAS = {
+    "estado_pedido": "SELECT estado, producto, cantidad FROM bench_pedidos WHERE id_pedido = %s",
+    "tablero_activos": "SELECT * FROM bench_pedidos WHERE estado != 'archivado' ORDER BY id DESC LIMIT 100",
+    "tablero_archivados": "SELECT * FROM bench_pedidos WHERE estado = 'archivado' ORDER BY fecha DESC LIMIT 100",
+    "historico": "SELECT producto, nota FROM bench_pedidos ORDER BY fecha DESC LIMIT 1000",
+    "precio_producto": "SELECT precio FROM bench_menu WHERE nombre_producto = %s",
+    "menu_disponible": "SELECT nombre_producto, precio FROM bench_menu WHERE disponible = 1 ORDER BY nombre_producto",
+}
+
+ESTADOS = ["archivado"] * 95 + ["completado"] * 3 + ["preparacion", "pendiente"]
+NOTAS = ["Sin notas", "Sin cebolla", "Extra queso", "Poco hecha", "Sin picante"]
+
+
+def crear_tablas(cursor):
+    """Crea las tablas de prueba desde cero (solo clave primaria)"""
+    for tabla in TABLAS.values():
+        cursor.execute(f"DROP TABLE IF EXISTS `{tabla}`")
+    cursor.execute(SQL_CREAR_PEDIDOS)
+    cursor.execute(SQL_CREAR_MENU)
+
+
+def llenar_tablas(conexion, cursor, filas, productos, tamano_bloque=10000):
+    """
+    Inserta productos en bench_menu y filas de pedidos (1-4 líneas por ticket)
+    
+    Returns:
+        tuple: (ids de ticket de muestra, nombres de producto)
+    """
+    rnd = random.Random(42)
+    nombres = [f"producto {i:05d}" for i in range(productos)]
+    cursor.executemany(
+        "INSERT INTO bench_menu (nombre_producto, precio, disponible) VALUES (%s, %s, %s)",
+        [(n, round(rnd.uniform(1, 30), 2), int(rnd.random() < 0.9)) for n in nombres]
+    )
+    conexion.commit()
+    
+    ahora = datetime.now()
+    muestra = []
+    insertadas = 0
+    inicio = time.perf_counter()
+    
+    while insertadas < filas:
+        bloque = []
+        while len(bloque) < tamano_bloque and insertadas + len(bloque) < filas:
+            ticket = f"{rnd.getrandbits(32):08X}"
+            fecha = ahora - timedelta(seconds=rnd.randint(0, 365 * 24 * 3600))
+            estado = rnd.choice(ESTADOS)
+            for _ in range(rnd.randint(1, 4)):
+                bloque.append((
+                    ticket, rnd.choice(nombres), rnd.randint(1, 5),
+                    None, rnd.choice(NOTAS), estado, fecha
+                ))
+            if rnd.random() < 0.01:
+                muestra.append(ticket)
+        
+        cursor.executemany(
+            "INSERT INTO bench_pedidos (id_pedido, producto, cantidad, precio_unitario, nota, estado, fecha) "
+            "VALUES (%s, %s, %s, %s, %s, %s, %s)",
+            bloque
+        )
+        conexion.commit()
+        insertadas += len(bloque)
+        print(f"\r  {insertadas:,} filas ({time.perf_counter() - inicio:.0f}s)", end="", flush=True)
+    
+    print()
+    cursor.execute("ANALYZE TABLE bench_pedidos, bench_menu")
+    cursor.fetchall()
+    return muestra, nombres
+
+
+def aplicar_indices(cursor):
+    """Crea sobre las tablas de prueba los mismos índices que las migraciones"""
+    for tabla, nombre, columnas, unico in INDICES:
+        inicio = time.perf_counter()
+        crear_indice(cursor, TABLAS[tabla], nombre, columnas, unico)
+        print(f"  ✓ {nombre} en {time.perf_counter() - inicio:.1f}s")
+    cursor.execute("ANALYZE TABLE bench_pedidos, bench_menu")
+    cursor.fetchall()
+
+
+def plan(cursor, sql, parametros):
+    """Tipo de acceso y clave que elige el optimizador (EXPLAIN)"""
+    cursor.execute("EXPLAIN " + sql, parametros)
+    columnas = cursor.column_names
+    fila = dict(zip(columnas, cursor.fetchall()[0]))
+    return f"{fila.get('type')}/{fila.get('key') or '-'}"
+
+
+def medir(cursor, repeticiones, tickets, nombres):
+    """
+    Ejecuta cada consulta varias veces con parámetros aleatorios
+    
+    Returns:
+        dict: consulta -> {p50_ms, p95_ms, plan}
+    """
+    rnd = random.Random(7)
+    parametros = {
+        "estado_pedido": lambda: (rnd.choice(tickets),),
+        "precio_producto": lambda: (rnd.choice(nombres),),
+    }
+    resultados = {}
+    
+    for nombre, sql in CONSULTAS.items():
+        generar = parametros.get(nombre, lambda: ())
+        tiempos = []
+        for _ in range(repeticiones):
+            valores = generar()
+            inicio = time.perf_counter()
+            cursor.execute(sql, valores)
+            cursor.fetchall()
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+        
+        tiempos.sort()
+        resultados[nombre] = {
+            "p50_ms": round(statistics.median(tiempos), 3),
+            "p95_ms": round(tiempos[int(0.95 * (len(tiempos) - 1))], 3),
+            "plan": plan(cursor, sql, generar()),
+        }
+    
+    return resultados
+
+
+def imprimir(antes, despues):
+    """Tabla comparativa de latencias"""
+    print(f"\n{'consulta':<20} {'sin índices p50/p95 (ms)':>26} {'con índices p50/p95 (ms)':>26} {'mejora':>8}  plan")
+    for nombre in CONSULTAS:
+        a, d = antes[nombre], despues[nombre]
+        mejora = a["p50_ms"] / d["p50_ms"] if d["p50_ms"] else float("inf")
+        print(
+            f"{nombre:<20} {a['p50_ms']:>12.3f} / {a['p95_ms']:<11.3f} "
+            f"{d['p50_ms']:>12.3f} / {d['p95_ms']:<11.3f} {mejora:>7.1f}x  "
+            f"{a['plan']} → {d['plan']}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latencia de consultas con y sin índices")
+    parser.add_argument("--filas", type=int, default=1_000_000, help="Filas en bench_pedidos")
+    parser.add_argument("--productos", type=int, default=1000, help="Filas en bench_menu")
+    parser.add_argument("--repeticiones", type=int, default=50, help="Ejecuciones por consulta")
+    parser.add_argument("--json", help="Guardar los resultados en este archivo")
+    parser.add_argument("--conservar", action="store_true", help="No borrar las tablas al terminar")
+    args = parser.parse_args()
+    
+    conexion = _crear_conexion()
+    conexion.autocommit = False
+    cursor = conexion.cursor()
+    
+    try:
+        print(f"→ Creando bench_pedidos ({args.filas:,} filas) y bench_menu ({args.productos:,})")
+        crear_tablas(cursor)
+        tickets, nombres = llenar_tablas(conexion, cursor, args.filas, args.productos)
+        
+        print("→ Midiendo sin índices secundarios")
+        antes = medir(cursor, args.repeticiones, tickets, nombres)
+        
+        print("→ Creando índices")
+        aplicar_indices(cursor)
+        
+        print("→ Midiendo con índices")
+        despues = medir(cursor, args.repeticiones, tickets, nombres)
+        
+        imprimir(antes, despues)
+        
+        if args.json:
+            with open(args.json, "w", encoding="utf-8") as f:
+                json.dump({"filas": args.filas, "productos": args.productos,
+                           "sin_indices": antes, "con_indices": despues}, f, indent=2)
+            print(f"\n✓ Resultados guardados en: {args.json}")
+    finally:
+        if not args.conservar:
+            for tabla in TABLAS.values():
+                cursor.execute(f"DROP TABLE IF EXISTS `{tabla}`")
+        cursor.close()
+        conexion.close()
+
+
+if __name__ == "__main__":
+    main()
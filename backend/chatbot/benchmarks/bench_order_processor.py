@@ -0,0 +1,382 @@
+"""
+Micro-benchmark del procesador de pedidos (sin red ni modelos reales)
+Registra un clasificador Zero-Shot simulado en el registro de modelos, genera
+mensajes a partir de pedidos_dataset_balanced.json y mide cada etapa de
+extraer_pedidos variando el tamaño del menú, el número de sinónimos y la
+longitud de los mensajes. Los resultados se pueden guardar como línea base y
+comparar en ejecuciones posteriores para detectar regresiones
+
+Uso:
+    python benchmarks/bench_order_processor.py
+    python benchmarks/bench_order_processor.py --guardar base.json
+    python benchmarks/bench_order_processor.py --comparar base.json --tolerancia 0.15
+    python benchmarks/bench_order_processor.py --menus 10,1000 --sinonimos 0 --longitudes 1,4
+    python benchmarks/bench_order_processor.py --etapas normalizar_texto --max-crecimiento 1.5
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# Sin micro-lotes: se mide el camino directo de una sola petición
+os.environ["MICROBATCH"] = "0"
+
+from model_registry import registro_modelos
+from order_processor import OrderProcessor
+
+
+DATASET_PATH = Path(__file__).resolve().parent.parent / "training_data" / "pedidos_dataset_balanced.json"
+
+MENU_BASE = [
+    "pizza", "hamburguesa", "tacos", "ensalada", "zumo",
+    "pasta", "pan", "hot dog", "refresco", "coca cola"
+]
+
+# Mensajes con erratas o productos ausentes, para que también se ejerciten
+# el filtro difuso y el modelo
+MENSAJES_EXTRA = [
+    "2 pizzas con extra queso y una coca cola", "quiero una piza",
+    "hamburgesa doble", "perrito caliente con mostaza y un jugo",
+    "algo de beber y una pizz", "una fanta y dos cocas", "empanada",
+    "unas cocacolas y pan", "dos hot dogs sin cebolla, tres tacos"
+]
+
+SILABAS = ["ba", "ca", "de", "fi", "go", "la", "me", "no", "pe", "qui",
+           "ra", "so", "ta", "vi", "za", "tru", "bri", "clo", "gan", "mor"]
+
+
+class ClasificadorSimulado:
+    """
+    Zero-Shot simulado con coste casi nulo: elige la etiqueta que comparte
+    un prefijo de 3 letras con alguna palabra del texto
+    """
+    
+    def __init__(self):
+        self._indices = {}
+    
+    def _indice(self, etiquetas):
+        clave = (id(etiquetas), len(etiquetas))
+        indice = self._indices.get(clave)
+        if indice is None:
+            indice = {}
+            for etiqueta in etiquetas:
+                indice.setdefault(etiqueta[:3], etiqueta)
+            self._indices = {clave: indice}
+        return indice
+    
+    def __call__(self, textos, candidate_labels, batch_size=None):
+        etiquetas = list(candidate_labels)
+        indice = self._indice(candidate_labels)
+        salidas = []
+        for texto in textos:
+            mejor = next((indice[p[:3]] for p in texto.split() if p[:3] in indice), None)
+            if mejor is None:
+                salidas.append({"labels": etiquetas[:1], "scores": [0.1]})
+            else:
+                salidas.append({"labels": [mejor], "scores": [0.9]})
+        return salidas
+
+
+def _palabra(rnd, silabas=(2, 4)):
+    return "".join(rnd.choice(SILABAS) for _ in range(rnd.randint(*silabas)))
+
+
+def generar_menu(tamano, semilla=1):
+    """Menú base más productos sintéticos (1-2 palabras inventadas) hasta el tamaño pedido"""
+    rnd = random.Random(semilla)
+    menu = list(MENU_BASE[:tamano])
+    vistos = set(menu)
+    while len(menu) < tamano:
+        nombre = " ".join(_palabra(rnd) for _ in range(rnd.randint(1, 2)))
+        if nombre not in vistos:
+            vistos.add(nombre)
+            menu.append(nombre)
+    return menu
+
+
+def generar_sinonimos(menu, cantidad, semilla=2):
+    """Sinónimos inventados que apuntan a productos del menú"""
+    rnd = random.Random(semilla)
+    sinonimos = {}
+    while len(sinonimos) < cantidad:
+        variacion = _palabra(rnd, (3, 5))
+        if variacion not in menu:
+            sinonimos[variacion] = rnd.choice(menu)
+    return sinonimos
+
+
+def generar_corpus(longitud, total=200, semilla=3):
+    """
+    Mensajes formados por 'longitud' frases del dataset unidas con "y"
+    
+    Returns:
+        list: Mensajes de usuario
+    """
+    with open(DATASET_PATH, "r", encoding="utf-8") as f:
+        ejemplos = json.load(f)["ejemplos_entrenamiento"]
+    
+    frases = [e["entrada"] for e in ejemplos if e["intencion"] == "pedido"] + MENSAJES_EXTRA
+    rnd = random.Random(semilla)
+    return [
+        " y ".join(rnd.choice(frases) for _ in range(longitud))
+        for _ in range(total)
+    ]
+
+
+def crear_procesador(menu, sinonimos_extra):
+    """OrderProcessor con el clasificador simulado y los sinónimos añadidos"""
+    op = OrderProcessor(menu, motor="zero_shot")
+    if sinonimos_extra:
+        sinonimos = dict(op.sinonimos)
+        sinonimos.update(sinonimos_extra)
+        op.actualizar_diccionarios(sinonimos=sinonimos)
+    return op
+
+
+def preparar_etapas(op, corpus):
+    """
+    Entradas de cada etapa, obtenidas ejecutando las anteriores una vez
+    
+    Returns:
+        dict: etapa -> (función, lista de argumentos)
+    """
+    normalizados = [op._normalizar_texto(t) for t in corpus]
+    segmentos = [s for n in normalizados for s in op._segmentar_inteligente(n)]
+    identificados = [(s, op._identificar_producto(s)) for s in segmentos]
+    notas = [(s, p, op._extraer_cantidad(s)) for s, p in identificados if p]
+    
+    return {
+        "extraer_pedidos": (op.extraer_pedidos, [(t,) for t in corpus]),
+        "normalizar_texto": (op._normalizar_texto, [(t,) for t in corpus]),
+        "segmentar_inteligente": (op._segmentar_inteligente, [(n,) for n in normalizados]),
+        "identificar_producto": (op._identificar_producto, [(s,) for s in segmentos]),
+        "extraer_notas": (op._extraer_notas, notas),
+    }
+
+
+def medir_etapa(funcion, argumentos, tiempo_min, antes=None):
+    """
+    Repite la etapa sobre todas sus entradas hasta acumular tiempo_min segundos
+    y después hace una pasada con tracemalloc
+    
+    Returns:
+        dict: {ops_s, us_op, llamadas, pico_kb, retenido_kb}
+    """
+    if not argumentos:
+        return {"ops_s": 0.0, "us_op": 0.0, "llamadas": 0, "pico_kb": 0.0, "retenido_kb": 0.0}
+    
+    llamadas = 0
+    transcurrido = 0.0
+    while transcurrido < tiempo_min:
+        if antes:
+            antes()
+        inicio = time.perf_counter()
+        for args in argumentos:
+            funcion(*args)
+        transcurrido += time.perf_counter() - inicio
+        llamadas += len(argumentos)
+    
+    if antes:
+        antes()
+    tracemalloc.start()
+    base, _ = tracemalloc.get_traced_memory()
+    for args in argumentos:
+        funcion(*args)
+    actual, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    
+    return {
+        "ops_s": round(llamadas / transcurrido, 1),
+        "us_op": round(1e6 * transcurrido / llamadas, 2),
+        "llamadas": llamadas,
+        "pico_kb": round((pico - base) / 1024, 1),
+        "retenido_kb": round((actual - base) / 1024, 1),
+    }
+
+
+def escenarios(menus, sinonimos, longitudes):
+    """
+    Barridos de una variable cada vez alrededor del caso base
+    (menú de 10 productos, sin sinónimos extra, mensajes de 1 frase)
+    
+    Returns:
+        list: (nombre, tamaño de menú, sinónimos extra, longitud)
+    """
+    lista = []
+    for m in menus:
+        lista.append((f"menu={m}", m, 0, 1))
+    for s in sinonimos:
+        lista.append((f"sinonimos={s}", 100, s, 1))
+    for l in longitudes:
+        lista.append((f"longitud={l}", 10, 0, l))
+    # Sin repetir el mismo caso con dos nombres
+    vistos, unicos = set(), []
+    for nombre, m, s, l in lista:
+        if (m, s, l) not in vistos:
+            vistos.add((m, s, l))
+            unicos.append((nombre, m, s, l))
+    return unicos
+
+
+def ejecutar(args):
+    """Ejecuta todos los escenarios y devuelve {escenario: {etapa: métricas}}"""
+    resultados = {}
+    for nombre, tamano_menu, num_sinonimos, longitud in escenarios(
+        args.menus, args.sinonimos, args.longitudes
+    ):
+        menu = generar_menu(tamano_menu)
+        inicio = time.perf_counter()
+        op = crear_procesador(menu, generar_sinonimos(menu, num_sinonimos))
+        construccion = time.perf_counter() - inicio
+        
+        corpus = generar_corpus(longitud, total=args.mensajes)
+        limpiar = op.cache_modelo.limpiar if args.sin_cache else None
+        
+        etapas = preparar_etapas(op, corpus)
+        resultados[nombre] = {"construccion_ms": round(1000 * construccion, 1)}
+        for etapa, (funcion, argumentos) in etapas.items():
+            if args.etapas and etapa not in args.etapas:
+                continue
+            resultados[nombre][etapa] = medir_etapa(funcion, argumentos, args.tiempo, limpiar)
+        
+        imprimir_escenario(nombre, resultados[nombre])
+    
+    return resultados
+
+
+def imprimir_escenario(nombre, resultado):
+    print(f"\n{nombre}  (construcción {resultado['construccion_ms']} ms)")
+    print(f"  {'etapa':<24} {'ops/s':>12} {'µs/op':>10} {'pico KB':>10} {'retenido KB':>12}")
+    for etapa, m in resultado.items():
+        if etapa == "construccion_ms":
+            continue
+        print(f"  {etapa:<24} {m['ops_s']:>12,.1f} {m['us_op']:>10.2f} "
+              f"{m['pico_kb']:>10.1f} {m['retenido_kb']:>12.1f}")
+
+
+def comparar(resultados, base, tolerancia):
+    """
+    Compara ops/s con la línea base
+    
+    Returns:
+        list: Regresiones (escenario, etapa, ops/s base, ops/s actual, variación)
+    """
+    regresiones = []
+    print(f"\nComparación con la línea base (tolerancia {tolerancia:.0%})")
+    for escenario, etapas in resultados.items():
+        for etapa, m in etapas.items():
+            anterior = base.get(escenario, {}).get(etapa)
+            if etapa == "construccion_ms" or not anterior or not anterior["ops_s"]:
+                continue
+            variacion = m["ops_s"] / anterior["ops_s"] - 1
+            marca = "  "
+            if variacion < -tolerancia:
+                marca = "✗ "
+                regresiones.append((escenario, etapa, anterior["ops_s"], m["ops_s"], variacion))
+            print(f"{marca}{escenario:<16} {etapa:<24} {anterior['ops_s']:>12,.1f} → "
+                  f"{m['ops_s']:>12,.1f} ({variacion:+.1%})")
+    return regresiones
+
+
+def crecimiento(resultados, etapa, limite=None):
+    """
+    Compara el µs/op de una etapa entre el primer y el último escenario de
+    cada barrido (menu=, sinonimos=, longitud=). Con diccionarios indexados,
+    normalizar_texto debe quedar plano de 10 a 10k productos o sinónimos
+    
+    Returns:
+        list: Barridos cuyo crecimiento supera el límite (barrido, factor)
+    """
+    barridos = {}
+    for escenario, etapas in resultados.items():
+        if etapa in etapas:
+            barridos.setdefault(escenario.split("=", 1)[0], []).append((escenario, etapas[etapa]["us_op"]))
+    
+    excedidos = []
+    print(f"\nCrecimiento de {etapa} en cada barrido")
+    for barrido, puntos in barridos.items():
+        if len(puntos) < 2:
+            continue
+        (primero, base), (ultimo, final) = puntos[0], puntos[-1]
+        if not base:
+            continue
+        factor = final / base
+        marca = "  "
+        if limite is not None and barrido != "longitud" and factor > limite:
+            marca = "✗ "
+            excedidos.append((barrido, factor))
+        print(f"{marca}{primero:<16} → {ultimo:<16} {base:>10.2f} → {final:>10.2f} µs/op (x{factor:.2f})")
+    return excedidos
+
+
+def _lista_enteros(texto):
+    return [int(x) for x in texto.split(",") if x.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmark de OrderProcessor")
+    parser.add_argument("--menus", type=_lista_enteros, default=[10, 100, 1000, 10000],
+                        help="Tamaños de menú (lista separada por comas)")
+    parser.add_argument("--sinonimos", type=_lista_enteros, default=[0, 100, 1000, 10000],
+                        help="Sinónimos extra (con menú de 100 productos)")
+    parser.add_argument("--longitudes", type=_lista_enteros, default=[1, 2, 4, 8],
+                        help="Frases por mensaje")
+    parser.add_argument("--mensajes", type=int, default=200, help="Mensajes por corpus")
+    parser.add_argument("--tiempo", type=float, default=0.3, help="Segundos mínimos por etapa")
+    parser.add_argument("--etapas", type=lambda t: t.split(","), help="Solo estas etapas")
+    parser.add_argument("--sin-cache", action="store_true",
+                        help="Vaciar la caché Zero-Shot antes de cada pasada")
+    parser.add_argument("--guardar", help="Guardar los resultados como línea base")
+    parser.add_argument("--comparar", help="Línea base con la que comparar")
+    parser.add_argument("--tolerancia", type=float, default=0.15,
+                        help="Caída de ops/s admitida antes de marcar regresión")
+    parser.add_argument("--max-crecimiento", type=float,
+                        help="Factor máximo de µs/op de normalizar_texto entre el menor y el "
+                             "mayor menú o número de sinónimos (la longitud no cuenta)")
+    args = parser.parse_args()
+    
+    # El clasificador simulado sustituye al real (no se descarga nada)
+    registro_modelos.registrar("zero_shot", ClasificadorSimulado)
+    registro_modelos.obtener("zero_shot")
+    
+    resultados = ejecutar(args)
+    excedidos = crecimiento(resultados, "normalizar_texto", args.max_crecimiento)
+    
+    if args.guardar:
+        with open(args.guardar, "w", encoding="utf-8") as f:
+            json.dump({
+                "entorno": {
+                    "python": platform.python_version(),
+                    "plataforma": platform.platform(),
+                    "procesador": platform.processor() or platform.machine(),
+                    "fecha": time.strftime("%Y-%m-%d %H:%M:%S")
+                },
+                "resultados": resultados
+            }, f, indent=2, ensure_ascii=False)
+        print(f"\n✓ Línea base guardada en: {args.guardar}")
+    
+    if args.comparar:
+        with open(args.comparar, "r", encoding="utf-8") as f:
+            base = json.load(f)["resultados"]
+        regresiones = comparar(resultados, base, args.tolerancia)
+        if regresiones:
+            print(f"\n❌ {len(regresiones)} etapas más lentas que la línea base")
+            sys.exit(1)
+        print("\n✓ Sin regresiones")
+    
+    if excedidos:
+        print(f"\n❌ normalizar_texto crece con el tamaño de los diccionarios: "
+              f"{', '.join(f'{b} x{f:.2f}' for b, f in excedidos)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,419 @@
+"""
+Prueba de carga de extremo a extremo de ChatbotUI sin MySQL
+Sustituye las funciones de db_repository por una base de datos en memoria con
+la misma API (y latencia opcional), lanza N clientes simulados que siguen un
+guion realista (saludo, pedido, confirmación y consulta del ticket) y mide el
+rendimiento y la latencia p50/p95/p99 por intención: la que decide el
+enrutador para cada mensaje, no el paso del guion que lo generó
+
+Uso:
+    python benchmarks/load_test.py --clientes 32 --conversaciones 5
+    python benchmarks/load_test.py --clientes 64 --modo async --latencia-db 2
+    python benchmarks/load_test.py --clientes 16 --latencia-modelo 40 --json carga.json
+"""
+
+import argparse
+import asyncio
+import contextvars
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_order_processor import ClasificadorSimulado, DATASET_PATH, MENSAJES_EXTRA
+from model_registry import registro_modelos
+
+
+MENU = {
+    "pizza": 12.50, "hamburguesa": 9.90, "tacos": 7.50, "ensalada": 6.00,
+    "zumo": 3.00, "pasta": 10.50, "pan": 1.50, "hot dog": 5.00,
+    "refresco": 2.50, "coca cola": 2.50
+}
+
+CONFIRMACIONES = ["Sí", "Vale", "Ok", "Correcto", "Sí por favor", "Exacto"]
+CONSULTAS_ESTADO = ["¿Cómo va mi pedido {}?", "Estado del ticket {}", "Mi pedido {}"]
+DESPEDIDAS = ["Adiós", "Gracias, hasta luego", "Chao"]
+
+PATRON_TICKET = re.compile(r"Ticket: `([A-F0-9]{8})`")
+
+# Funciones de db_repository que usa el chatbot
+FUNCIONES_DB = [
+    "obtener_menu_cache", "guardar_pedido_completo", "obtener_estado_pedido",
+    "obtener_textos_historicos", "obtener_cambios_pedidos"
+]
+
+
+class BaseDatosMemoria:
+    """Sustituto en proceso de db_repository (mismas funciones y valores devueltos)"""
+    
+    def __init__(self, menu, latencia_ms=0.0):
+        """
+        Args:
+            menu (dict): {producto: precio}
+            latencia_ms (float): Espera añadida a cada llamada (red y servidor)
+        """
+        self.menu = [
+            {"nombre_producto": nombre, "precio": precio, "disponible": 1}
+            for nombre, precio in sorted(menu.items())
+        ]
+        self.latencia = latencia_ms / 1000
+        self._pedidos = []
+        self._lock = threading.Lock()
+        self.llamadas = defaultdict(int)
+    
+    def _llamada(self, nombre):
+        self.llamadas[nombre] += 1
+        if self.latencia:
+            time.sleep(self.latencia)
+    
+    def obtener_menu_cache(self):
+        self._llamada("obtener_menu_cache")
+        return [dict(fila) for fila in self.menu]
+    
+    def guardar_pedido_completo(self, id_pedido, items, precios=None):
+        if not items:
+            return None
+        self._llamada("guardar_pedido_completo")
+        precios = precios or {f["nombre_producto"]: f["precio"] for f in self.menu}
+        with self._lock:
+            for item in items:
+                self._pedidos.append({
+                    "id": len(self._pedidos) + 1,
+                    "id_pedido": id_pedido,
+                    "producto": item["producto"],
+                    "cantidad": item["cantidad"],
+                    "precio_unitario": precios.get(item["producto"].lower(), 0.0),
+                    "nota": item["nota"],
+                    "estado": "pendiente",
+                    "fecha": datetime.now()
+                })
+        return id_pedido
+    
+    def obtener_estado_pedido(self, id_pedido):
+        self._llamada("obtener_estado_pedido")
+        with self._lock:
+            filas = [p for p in self._pedidos if p["id_pedido"] == id_pedido]
+        if not filas:
+            return None
+        items = [{k: f[k] for k in ("estado", "producto", "cantidad")} for f in filas]
+        return {"estado": items[0]["estado"], "items": items}
+    
+    def obtener_textos_historicos(self, limite=1000):
+        self._llamada("obtener_textos_historicos")
+        with self._lock:
+            recientes = self._pedidos[-limite:]
+        return list(dict.fromkeys(p["producto"] for p in recientes))
+    
+    def obtener_cambios_pedidos(self, desde=None):
+        self._llamada("obtener_cambios_pedidos")
+        with self._lock:
+            if desde is None:
+                return [dict(p) for p in self._pedidos[-1:]]
+            return [dict(p) for p in self._pedidos if p["fecha"] >= desde][:1000]
+    
+    def instalar(self, *modulos):
+        """Sustituye las funciones de la BD en los módulos indicados"""
+        for modulo in modulos:
+            for nombre in FUNCIONES_DB:
+                if hasattr(modulo, nombre):
+                    setattr(modulo, nombre, getattr(self, nombre))
+
+
+def cargar_frases():
+    """Frases de pedido y de saludo del dataset de entrenamiento"""
+    with open(DATASET_PATH, "r", encoding="utf-8") as f:
+        ejemplos = json.load(f)["ejemplos_entrenamiento"]
+    
+    frases = defaultdict(list)
+    for e in ejemplos:
+        frases[e["intencion"]].append(e["entrada"])
+    frases["pedido"].extend(MENSAJES_EXTRA)
+    return frases
+
+
+def guion(rnd, frases):
+    """
+    Conversación de un cliente. El paso de consulta recibe el ticket de la
+    respuesta de confirmación (si no hubo ticket se omite)
+    
+    Returns:
+        list: [(paso, mensaje o plantilla)]
+    """
+    pasos = [
+        ("saludo", rnd.choice(frases["saludo"])),
+        ("pedido", rnd.choice(frases["pedido"])),
+        ("confirmacion", rnd.choice(CONFIRMACIONES)),
+        ("consulta_estado", rnd.choice(CONSULTAS_ESTADO)),
+    ]
+    if rnd.random() < 0.3:
+        pasos.append(("despedida", rnd.choice(DESPEDIDAS)))
+    return pasos
+
+
+class CapturaIntenciones:
+    """
+    Anota la intención que decide el enrutador para cada mensaje
+    
+    Envuelve router.decidir, procesar_mensaje y procesar_mensaje_async de la
+    instancia: cada mensaje deja su anotación en una variable de contexto,
+    que asyncio.to_thread copia al hilo donde se decide en modo async, y al
+    terminar queda por sesión, que solo tiene un mensaje en curso
+    """
+    
+    SIN_DECISION = "sin_decision"
+    
+    def __init__(self, chatbot):
+        self._anotacion = contextvars.ContextVar("anotacion")
+        self._por_sesion = {}
+        decidir = chatbot.router.decidir
+        procesar = chatbot.procesar_mensaje
+        procesar_async = chatbot.procesar_mensaje_async
+        
+        def decidir_anotando(*args, **kwargs):
+            intencion, rasgos = decidir(*args, **kwargs)
+            anotacion = self._anotacion.get(None)
+            if anotacion is not None:
+                anotacion[0] = intencion or "ninguna"
+            return intencion, rasgos
+        
+        def procesar_anotando(mensaje, historial, sesion_id=None, *resto):
+            anotacion = [self.SIN_DECISION]
+            token = self._anotacion.set(anotacion)
+            try:
+                return procesar(mensaje, historial, sesion_id, *resto)
+            finally:
+                self._anotacion.reset(token)
+                self._por_sesion[sesion_id] = anotacion[0]
+        
+        async def procesar_async_anotando(mensaje, historial, sesion_id=None):
+            anotacion = [self.SIN_DECISION]
+            token = self._anotacion.set(anotacion)
+            try:
+                return await procesar_async(mensaje, historial, sesion_id)
+            finally:
+                self._anotacion.reset(token)
+                self._por_sesion[sesion_id] = anotacion[0]
+        
+        chatbot.router.decidir = decidir_anotando
+        chatbot.procesar_mensaje = procesar_anotando
+        chatbot.procesar_mensaje_async = procesar_async_anotando
+    
+    def tomar(self, sesion_id):
+        """Intención del último mensaje de la sesión"""
+        return self._por_sesion.pop(sesion_id, self.SIN_DECISION)
+
+
+class Resultados:
+    """Latencias por intención decidida (seguro entre hilos)"""
+    
+    def __init__(self):
+        self.latencias = defaultdict(list)
+        self.errores = defaultdict(int)
+        self.tickets = 0
+        self._lock = threading.Lock()
+    
+    def anotar(self, intencion, segundos, paso, respuesta=None, error=False):
+        with self._lock:
+            self.latencias[intencion].append(segundos)
+            if error:
+                self.errores[intencion] += 1
+            elif paso == "confirmacion" and respuesta and PATRON_TICKET.search(respuesta):
+                self.tickets += 1
+    
+    def resumen(self, duracion):
+        """
+        Returns:
+            dict: intención -> {mensajes, mensajes_s, p50_ms, p95_ms, p99_ms, max_ms, errores}
+        """
+        total = [t for tiempos in self.latencias.values() for t in tiempos]
+        intenciones = dict(sorted(self.latencias.items()), total=total)
+        resumen = {}
+        for intencion, tiempos in intenciones.items():
+            tiempos = sorted(tiempos)
+            resumen[intencion] = {
+                "mensajes": len(tiempos),
+                "mensajes_s": round(len(tiempos) / duracion, 1),
+                "p50_ms": _percentil(tiempos, 0.50),
+                "p95_ms": _percentil(tiempos, 0.95),
+                "p99_ms": _percentil(tiempos, 0.99),
+                "max_ms": round(1000 * tiempos[-1], 2) if tiempos else 0.0,
+                "errores": sum(self.errores.values()) if intencion == "total" else self.errores[intencion],
+            }
+        return resumen
+
+
+def _percentil(ordenados, q):
+    if not ordenados:
+        return 0.0
+    return round(1000 * ordenados[int(q * (len(ordenados) - 1))], 2)
+
+
+def _mensaje(paso, texto, ticket):
+    if paso == "consulta_estado":
+        return texto.format(ticket) if ticket else None
+    return texto
+
+
+def cliente_hilos(chatbot, indice, args, frases, resultados, captura):
+    """Cliente síncrono: procesar_mensaje desde su propio hilo"""
+    rnd = random.Random(args.semilla + indice)
+    for conversacion in range(args.conversaciones):
+        sesion_id = f"cliente-{indice}-{conversacion}"
+        ticket = None
+        for paso, texto in guion(rnd, frases):
+            mensaje = _mensaje(paso, texto, ticket)
+            if mensaje is None:
+                continue
+            inicio = time.perf_counter()
+            try:
+                respuesta = chatbot.procesar_mensaje(mensaje, [], sesion_id=sesion_id)
+                resultados.anotar(captura.tomar(sesion_id), time.perf_counter() - inicio, paso, respuesta)
+            except Exception as e:
+                resultados.anotar(captura.tomar(sesion_id), time.perf_counter() - inicio, paso, error=True)
+                print(f"⚠ Error en {sesion_id} ({paso}): {e}")
+                continue
+            if paso == "confirmacion":
+                encontrado = PATRON_TICKET.search(respuesta)
+                ticket = encontrado.group(1) if encontrado else None
+            if args.pausa:
+                time.sleep(rnd.uniform(0, 2 * args.pausa / 1000))
+
+
+async def cliente_async(chatbot, indice, args, frases, resultados, captura):
+    """Cliente asíncrono: procesar_mensaje_async, como lo llama Gradio"""
+    rnd = random.Random(args.semilla + indice)
+    for conversacion in range(args.conversaciones):
+        sesion_id = f"cliente-{indice}-{conversacion}"
+        ticket = None
+        for paso, texto in guion(rnd, frases):
+            mensaje = _mensaje(paso, texto, ticket)
+            if mensaje is None:
+                continue
+            inicio = time.perf_counter()
+            try:
+                respuesta = await chatbot.procesar_mensaje_async(mensaje, [], sesion_id=sesion_id)
+                resultados.anotar(captura.tomar(sesion_id), time.perf_counter() - inicio, paso, respuesta)
+            except Exception as e:
+                resultados.anotar(captura.tomar(sesion_id), time.perf_counter() - inicio, paso, error=True)
+                print(f"⚠ Error en {sesion_id} ({paso}): {e}")
+                continue
+            if paso == "confirmacion":
+                encontrado = PATRON_TICKET.search(respuesta)
+                ticket = encontrado.group(1) if encontrado else None
+            if args.pausa:
+                await asyncio.sleep(rnd.uniform(0, 2 * args.pausa / 1000))
+
+
+def preparar_modelos(args):
+    """
+    Zero-Shot simulado (con latencia opcional por lote) salvo --zero-shot-real,
+    y espera a que carguen los modelos antes de medir
+    """
+    if not args.zero_shot_real:
+        clasificador = ClasificadorSimulado()
+        latencia = args.latencia_modelo / 1000
+        
+        def zero_shot(textos, candidate_labels, batch_size=None):
+            if latencia:
+                time.sleep(latencia)
+            return clasificador(textos, candidate_labels, batch_size)
+        
+        registro_modelos.registrar("zero_shot", lambda: zero_shot)
+    
+    for nombre in ("intencion", "zero_shot"):
+        inicio = time.perf_counter()
+        registro_modelos.obtener(nombre)
+        print(f"  · {nombre} listo en {time.perf_counter() - inicio:.1f}s")
+
+
+def ejecutar(chatbot, args, frases):
+    """Lanza los clientes y devuelve (resultados, duración en segundos)"""
+    resultados = Resultados()
+    captura = CapturaIntenciones(chatbot)
+    inicio = time.perf_counter()
+    
+    if args.modo == "async":
+        async def todos():
+            await asyncio.gather(*[
+                cliente_async(chatbot, i, args, frases, resultados, captura)
+                for i in range(args.clientes)
+            ])
+        asyncio.run(todos())
+    else:
+        with ThreadPoolExecutor(max_workers=args.clientes, thread_name_prefix="cliente") as pool:
+            futuros = [
+                pool.submit(cliente_hilos, chatbot, i, args, frases, resultados, captura)
+                for i in range(args.clientes)
+            ]
+            for futuro in futuros:
+                futuro.result()
+    
+    return resultados, time.perf_counter() - inicio
+
+
+def imprimir(resumen, duracion, resultados, db):
+    print(f"\n{'intención':<18} {'mensajes':>9} {'msg/s':>9} {'p50 ms':>9} {'p95 ms':>9} "
+          f"{'p99 ms':>9} {'máx ms':>9} {'errores':>8}")
+    for intencion, m in resumen.items():
+        print(f"{intencion:<18} {m['mensajes']:>9} {m['mensajes_s']:>9.1f} {m['p50_ms']:>9.2f} "
+              f"{m['p95_ms']:>9.2f} {m['p99_ms']:>9.2f} {m['max_ms']:>9.2f} {m['errores']:>8}")
+    print(f"\nDuración: {duracion:.2f}s · tickets guardados: {resultados.tickets} · "
+          f"llamadas a la BD: {dict(db.llamadas)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga de ChatbotUI con BD en memoria")
+    parser.add_argument("--clientes", type=int, default=16, help="Clientes simultáneos")
+    parser.add_argument("--conversaciones", type=int, default=5, help="Conversaciones por cliente")
+    parser.add_argument("--modo", choices=["hilos", "async"], default="hilos",
+                        help="hilos: procesar_mensaje · async: procesar_mensaje_async")
+    parser.add_argument("--pausa", type=float, default=0.0,
+                        help="Pausa media entre mensajes de un cliente (ms)")
+    parser.add_argument("--latencia-db", type=float, default=0.0,
+                        help="Latencia simulada por llamada a la BD (ms)")
+    parser.add_argument("--latencia-modelo", type=float, default=0.0,
+                        help="Latencia simulada por llamada al Zero-Shot (ms)")
+    parser.add_argument("--zero-shot-real", action="store_true",
+                        help="Usar el modelo Zero-Shot real (descarga transformers)")
+    parser.add_argument("--semilla", type=int, default=1)
+    parser.add_argument("--json", help="Guardar los resultados en este archivo")
+    args = parser.parse_args()
+    
+    # Sin precarga en segundo plano: los modelos se cargan aquí antes de medir
+    os.environ.setdefault("PRECARGAR_MODELOS", "")
+    
+    import chatbot_ui
+    import db_repository
+    
+    db = BaseDatosMemoria(MENU, latencia_ms=args.latencia_db)
+    db.instalar(db_repository, chatbot_ui)
+    
+    print("→ Cargando modelos")
+    preparar_modelos(args)
+    chatbot = chatbot_ui.ChatbotUI()
+    frases = cargar_frases()
+    
+    print(f"→ {args.clientes} clientes × {args.conversaciones} conversaciones (modo {args.modo})")
+    resultados, duracion = ejecutar(chatbot, args, frases)
+    resumen = resultados.resumen(duracion)
+    imprimir(resumen, duracion, resultados, db)
+    
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"parametros": vars(args), "duracion_s": round(duracion, 3),
+                       "tickets": resultados.tickets, "intenciones": resumen}, f, indent=2)
+        print(f"\n✓ Resultados guardados en: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,40 +3,143 @@ Interfaz de usuario del chatbot usando Gradio
 Maneja la interacción con el usuario y coordina los servicios
 """
 
-import gradio as gr
+import asyncio
+import os
+import threading
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 
-from intent_classifier import IntentClassifier
+from event_stream import VigilantePedidos, bus_eventos
+from intent_router import IntentRouter
+from menu_cache import MenuCache
+from metrics import LATENCIA_ETAPA, metricas
+from model_registry import registro_modelos
+from profiling import perfilable, perfilador
 from order_processor import OrderProcessor
 from sentiment_analyzer import SentimentAnalyzer
+from session_store import SessionStore
 from trained_classifier import TrainedIntentClassifier
 from db_repository import (
-    obtener_menu_db,
-    obtener_menu_completo,
-    guardar_pedido,
+    obtener_menu_cache,
+    guardar_pedido_completo,
     obtener_estado_pedido,
-    obtener_precio_producto
+    obtener_textos_historicos,
+    obtener_cambios_pedidos,
+    obtener_metricas_pool
 )
 
 
 class ChatbotUI:
     """Controlador principal del chatbot"""
     
+    # Intenciones que leen la base de datos o el pedido pendiente de la sesión
+    INTENCIONES_SESION = ("consulta_estado", "confirmacion", "negacion")
+    
     def __init__(self):
         """Inicializa el chatbot y sus componentes"""
-        self.pedido_pendiente = []
-        self.intent_classifier = IntentClassifier()
+        # Estado de cada conversación (pedido pendiente) separado por sesión
+        self.sesiones = SessionStore(
+            max_sesiones=int(os.getenv("SESIONES_MAX", "1000")),
+            inactividad=float(os.getenv("SESION_INACTIVIDAD", "1800")),
+            memoria_max_mb=float(os.getenv("SESIONES_MEMORIA_MB", "64"))
+        )
         self.sentiment_analyzer = SentimentAnalyzer()
         self.trained_classifier = TrainedIntentClassifier()
+        self.router = IntentRouter(self.trained_classifier)
+        
+        # Menú en memoria: se refresca solo al caducar y avisa cuando cambia
+        self.menu_cache = MenuCache(
+            obtener_menu_cache,
+            ttl=float(os.getenv("MENU_CACHE_TTL", "30"))
+        )
+        self._bienvenida = (None, None)
+        
+        # Inicializar procesador y mantenerlo al día con la versión del menú
+        self.order_processor = OrderProcessor(self.menu_cache.productos())
+        self.menu_cache.suscribir(
+            lambda cache: self.order_processor.actualizar_menu(cache.productos())
+        )
+        
+        # Eventos de pedidos: una sola consulta periódica para todas las pantallas
+        self.vigilante = VigilantePedidos(
+            bus_eventos,
+            obtener_cambios_pedidos,
+            intervalo=float(os.getenv("EVENTOS_INTERVALO", "2"))
+        )
+        if self.vigilante.intervalo > 0:
+            self.vigilante.iniciar()
+        
+        # Pool acotado para la inferencia: un Zero-Shot lento no bloquea el event loop.
+        # Con micro-lotes los hilos solo esperan su resultado, así que conviene
+        # tener tantos como peticiones simultáneas para llenar cada lote
+        if os.getenv("MICROBATCH", "0") == "1":
+            hilos_por_defecto = os.getenv("GRADIO_CONCURRENCY", "16")
+        else:
+            hilos_por_defecto = str(min(4, os.cpu_count() or 1))
+        self._pool_inferencia = ThreadPoolExecutor(
+            max_workers=int(os.getenv("INFERENCE_WORKERS") or hilos_por_defecto),
+            thread_name_prefix="inferencia"
+        )
         
-        # Cargar menú y inicializar procesador
-        menu_productos = obtener_menu_db()
-        self.order_processor = OrderProcessor(menu_productos)
+        # Los modelos se cargan en segundo plano; mientras tanto se responde con reglas.
+        # Por defecto, el de intención y el del motor de identificación elegido
+        registro_modelos.precargar(
+            os.getenv("PRECARGAR_MODELOS") or f"intencion,{self.order_processor.motor}"
+        )
+        
+        # Opcional: resolver de antemano las frases históricas con el modelo
+        if os.getenv("PRECALENTAR_CACHE", "0") == "1":
+            threading.Thread(target=self._precalentar_cache, daemon=True).start()
+        
+        self._registrar_metricas()
+        
+        # Perfilado desde el arranque (también se puede pedir en /admin/perfil)
+        if os.getenv("PERFIL", "0") == "1" and not perfilador.activo:
+            perfilador.iniciar(float(os.getenv("PERFIL_SEGUNDOS", "60")), memoria=True)
+    
+    def _registrar_metricas(self):
+        """Estadísticas de cachés, pools, modelos y sesiones que se leen en cada /metrics"""
+        pool = self._pool_inferencia
+        planificadores = {
+            "zero_shot": self.order_processor._planificador,
+            "sentimiento": self.sentiment_analyzer._planificador
+        }
+        
+        metricas.recolector("cache_zero_shot", self.order_processor.cache_modelo.estadisticas)
+        metricas.recolector("menu", self.menu_cache.estadisticas)
+        metricas.recolector("sesiones", self.sesiones.estadisticas)
+        metricas.recolector("eventos", bus_eventos.estadisticas)
+        metricas.recolector("db_pool", obtener_metricas_pool)
+        metricas.recolector("modelo", registro_modelos.estadisticas, etiqueta="modelo")
+        metricas.recolector("pool_inferencia", lambda: {
+            "max_hilos": pool._max_workers,
+            "hilos": len(pool._threads),
+            "en_cola": pool._work_queue.qsize()
+        })
+        metricas.recolector("microbatch", lambda: {
+            nombre: planificador.estadisticas()
+            for nombre, planificador in planificadores.items() if planificador is not None
+        }, etiqueta="planificador")
+    
+    def _precalentar_cache(self):
+        """Carga la caché del Zero-Shot con productos y notas históricos"""
+        try:
+            total = self.order_processor.precalentar_cache(obtener_textos_historicos())
+            print(f"✓ Caché Zero-Shot precalentada con {total} segmentos")
+        except Exception as e:
+            print(f"⚠ Error precalentando caché: {e}")
     
     def obtener_mensaje_bienvenida(self):
+        """Devuelve el mensaje de bienvenida (se genera una vez por versión del menú)"""
+        menu = self.menu_cache.instantanea()
+        version_cacheada, mensaje = self._bienvenida
+        if mensaje is None or version_cacheada != menu.version:
+            mensaje = self._generar_mensaje_bienvenida(menu.items_disponibles())
+            self._bienvenida = (menu.version, mensaje)
+        return mensaje
+    
+    def _generar_mensaje_bienvenida(self, menu):
         """Genera el mensaje de bienvenida con el menú"""
-        menu = obtener_menu_completo()
-        
         mensaje = "👋 ¡Hola! Soy el asistente de **GastroIA**.\n\n"
         mensaje += "📜 **Nuestro menú de hoy:**\n\n"
         
@@ -53,48 +156,94 @@ class ChatbotUI:
         
         return mensaje
     
-    def procesar_mensaje(self, mensaje, historial):
+    @perfilable
+    def procesar_mensaje(self, mensaje, historial, sesion_id=None, rasgos=None):
         """
         Procesa un mensaje del usuario
         
         Args:
             mensaje: Mensaje de texto del usuario
             historial: Historial de conversación (no usado actualmente)
+            sesion_id: Identificador de la sesión (session_hash de Gradio);
+                       sin él se usa una sesión local compartida
+            rasgos: Rasgos de reglas ya extraídos del mensaje (opcional)
             
         Returns:
             str: Respuesta del chatbot
         """
         texto_usuario = str(mensaje).strip()
+        sesion = self.sesiones.obtener(sesion_id or "local")
         
         # Procesar según la intención (el feedback se maneja dentro)
-        return self._procesar_intencion(texto_usuario)
+        with sesion.lock, LATENCIA_ETAPA.medir(etapa="mensaje"):
+            respuesta = self._procesar_intencion(texto_usuario, sesion, rasgos)
+        
+        self.sesiones.guardar(sesion)
+        return respuesta
     
-    def _procesar_intencion(self, texto_usuario):
-        """Determina la intención y devuelve la respuesta apropiada"""
+    async def procesar_mensaje_async(self, mensaje, historial, sesion_id=None):
+        """
+        Versión asíncrona de procesar_mensaje para el event loop de Gradio
         
-        # 1. Verificar confirmación de pedido pendiente
-        if self.pedido_pendiente and self.intent_classifier.es_confirmacion(texto_usuario):
-            return self._confirmar_pedido()
+        Primero se decide la intención (reglas y clasificador NumPy) y solo
+        el pedido, que pasa por el Zero-Shot, va al pool de inferencia de
+        tamaño INFERENCE_WORKERS. Confirmar, cancelar y consultar un ticket
+        van al executor por defecto porque usan la base de datos, y el resto
+        de respuestas (saludo, menú, ayuda...) se generan en el propio loop.
         
-        # 2. Verificar negación de pedido pendiente
-        if self.pedido_pendiente and self.intent_classifier.es_negacion(texto_usuario):
-            return self._cancelar_pedido()
+        Returns:
+            str: Respuesta del chatbot
+        """
+        texto_usuario = str(mensaje).strip()
+        sesion = self.sesiones.obtener(sesion_id or "local")
         
-        # 3. Usar clasificador entrenado si está disponible
-        if self.trained_classifier.esta_disponible():
-            intencion = self.trained_classifier.clasificar(texto_usuario)
+        with LATENCIA_ETAPA.medir(etapa="mensaje"):
+            pendiente = bool(sesion.pedido_pendiente)
+            intencion, rasgos = await asyncio.to_thread(
+                self.router.decidir, texto_usuario, pendiente
+            )
             
-            if intencion:
-                return self._responder_por_intencion(intencion, texto_usuario)
+            if intencion == "pedido":
+                loop = asyncio.get_running_loop()
+                respuesta = await loop.run_in_executor(
+                    self._pool_inferencia, self._responder_en_sesion,
+                    intencion, pendiente, texto_usuario, sesion, rasgos
+                )
+            elif intencion in self.INTENCIONES_SESION:
+                respuesta = await asyncio.to_thread(
+                    self._responder_en_sesion, intencion, pendiente, texto_usuario, sesion, rasgos
+                )
+            else:
+                respuesta = self._responder_por_intencion(intencion, texto_usuario, sesion, rasgos)
         
-        # Fallback a reglas si el modelo no está disponible
-        return self._procesar_con_reglas(texto_usuario)
+        self.sesiones.guardar(sesion)
+        return respuesta
     
-    def _responder_por_intencion(self, intencion, texto_usuario):
-        """Responde según la intención clasificada por el modelo"""
+    @perfilable
+    def _responder_en_sesion(self, intencion, pendiente, texto_usuario, sesion, rasgos):
+        """
+        Responde con el lock de la sesión tomado
+        
+        La intención se decidió sin el lock: si entretanto otro mensaje de la
+        misma sesión creó o cerró el pedido pendiente, se vuelve a decidir
+        """
+        with sesion.lock:
+            if pendiente != bool(sesion.pedido_pendiente):
+                return self._procesar_intencion(texto_usuario, sesion, rasgos)
+            return self._responder_por_intencion(intencion, texto_usuario, sesion, rasgos)
+    
+    def _procesar_intencion(self, texto_usuario, sesion, rasgos=None):
+        """Determina la intención y devuelve la respuesta apropiada"""
+        intencion, rasgos = self.router.decidir(
+            texto_usuario, bool(sesion.pedido_pendiente), rasgos
+        )
+        return self._responder_por_intencion(intencion, texto_usuario, sesion, rasgos)
+    
+    def _responder_por_intencion(self, intencion, texto_usuario, sesion, rasgos):
+        """Responde según la intención elegida por el enrutador"""
         
         if intencion == "pedido":
-            return self._procesar_nuevo_pedido(texto_usuario)
+            return self._procesar_nuevo_pedido(texto_usuario, sesion)
         
         elif intencion == "saludo":
             return self._respuesta_social("saludo")
@@ -110,10 +259,13 @@ class ChatbotUI:
                     "¿De qué producto te gustaría saber el precio?")
         
         elif intencion == "consulta_estado":
-            return ("🔍 Para consultar el estado de tu pedido, "
-                    "por favor dame el número de ticket (8 caracteres).")
+            return self._procesar_consulta_estado(rasgos.ticket or "SOLICITAR_ID")
         
         elif intencion == "queja":
+            # Quejas de espera
+            if "espera" in rasgos:
+                return ("😔 Lamento mucho la espera. Entiendo tu frustración. "
+                        "¿Tienes el número de ticket? Puedo verificar el estado de tu pedido.")
             return ("😔 Lamento mucho escuchar eso. Tu opinión es muy importante. "
                     "¿Hay algo específico en lo que pueda ayudarte?")
         
@@ -122,136 +274,18 @@ class ChatbotUI:
                     "¿Hay algo más en lo que pueda ayudarte?")
         
         elif intencion == "confirmacion":
-            if self.pedido_pendiente:
-                return self._confirmar_pedido()
+            if sesion.pedido_pendiente:
+                return self._confirmar_pedido(sesion)
             return "👍 ¿Hay algo que quieras ordenar?"
         
         elif intencion == "negacion":
-            if self.pedido_pendiente:
-                return self._cancelar_pedido()
+            if sesion.pedido_pendiente:
+                return self._cancelar_pedido(sesion)
             return "De acuerdo. ¿Puedo ayudarte en algo más?"
         
-        # Si no reconoce, usar reglas como fallback
-        return self._procesar_con_reglas(texto_usuario)
-    
-    def _procesar_con_reglas(self, texto_usuario):
-        """Procesa usando reglas tradicionales (fallback)"""
-        
-        # Verificar consulta de estado
-        consulta = self.intent_classifier.detectar_consulta_pedido(texto_usuario)
-        if consulta:
-            return self._procesar_consulta_estado(consulta)
-        
-        # Verificar si pide ver el menú
-        if self._quiere_ver_menu(texto_usuario):
-            return self.obtener_mensaje_bienvenida()
-        
-        # Verificar saludos/despedidas
-        tipo_social = self.intent_classifier.detectar_saludo_o_despedida(texto_usuario)
-        if tipo_social:
-            return self._respuesta_social(tipo_social)
-        
-        # Verificar si es feedback/comentario
-        tipo_feedback = self._detectar_feedback(texto_usuario)
-        if tipo_feedback:
-            return self._responder_feedback(tipo_feedback, texto_usuario)
-        
-        # Verificar si parece un pedido
-        if self._parece_pedido(texto_usuario):
-            return self._procesar_nuevo_pedido(texto_usuario)
-        
         # Si no es nada reconocible
         return self._respuesta_ayuda()
     
-    def _quiere_ver_menu(self, texto):
-        """Detecta si el usuario quiere ver el menú"""
-        texto_lower = texto.lower()
-        
-        indicadores_menu = [
-            "menu", "menú", "carta", "ver carta", "ver menu", "ver menú",
-            "muestrame", "muéstrame", "mostrar menu", "mostrar menú",
-            "que tienen", "qué tienen", "que hay", "qué hay",
-            "que ofrecen", "qué ofrecen", "productos", "opciones",
-            "platillos", "platos", "comidas", "bebidas"
-        ]
-        
-        return any(p in texto_lower for p in indicadores_menu)
-    
-    def _detectar_feedback(self, texto):
-        """Detecta si el mensaje es feedback/comentario y retorna el tipo"""
-        texto_lower = texto.lower()
-        
-        # Feedback negativo (quejas, críticas)
-        palabras_negativas = [
-            "terrible", "horrible", "malo", "mal", "pésimo", "asco",
-            "esperando", "tarda", "demora", "lento", "mucho tiempo",
-            "no llega", "frío", "queja", "molesto", "enfadado",
-            "decepcionado", "decepcionante", "inaceptable"
-        ]
-        
-        # Feedback positivo (agradecimientos, elogios)
-        palabras_positivas = [
-            "gracias", "genial", "excelente", "perfecto", "delicioso",
-            "rico", "buenísimo", "increíble", "fantástico", "encanta",
-            "satisfecho", "contento", "feliz", "bien hecho", "buen trabajo"
-        ]
-        
-        # Palabras que indican intención de PEDIR (NO es feedback)
-        palabras_pedido = [
-            "quiero", "dame", "ponme", "tráeme", "traeme", "pido",
-            "necesito", "quisiera", "me pones", "me das", "para llevar",
-            "ordenar", "pedir"
-        ]
-        
-        # Si tiene palabras de pedido, NO es feedback
-        if any(p in texto_lower for p in palabras_pedido):
-            return None
-        
-        # Detectar tipo de feedback
-        if any(p in texto_lower for p in palabras_negativas):
-            return "negativo"
-        
-        if any(p in texto_lower for p in palabras_positivas):
-            return "positivo"
-        
-        return None
-    
-    def _responder_feedback(self, tipo, texto):
-        """Responde apropiadamente al feedback del usuario"""
-        texto_lower = texto.lower()
-        
-        if tipo == "negativo":
-            # Quejas de espera
-            if any(p in texto_lower for p in ["esperando", "tarda", "demora", "mucho tiempo", "lento", "no llega"]):
-                return ("😔 Lamento mucho la espera. Entiendo tu frustración. "
-                        "¿Tienes el número de ticket? Puedo verificar el estado de tu pedido.")
-            # Quejas de calidad/servicio
-            else:
-                return ("😔 Lamento mucho escuchar eso. Tu opinión es muy importante para nosotros. "
-                        "¿Hay algo específico en lo que pueda ayudarte ahora?")
-        
-        elif tipo == "positivo":
-            return ("😊 ¡Muchas gracias por tus palabras! Nos alegra saber que estás satisfecho. "
-                    "¿Hay algo más en lo que pueda ayudarte?")
-        
-        return None
-    
-    def _parece_pedido(self, texto):
-        """Verifica si el texto parece ser un intento de pedido"""
-        texto_lower = texto.lower()
-        
-        # Palabras que indican intención de pedir
-        indicadores_pedido = [
-            "quiero", "dame", "ponme", "tráeme", "traeme", "pido",
-            "necesito", "quisiera", "me pones", "me das", "para llevar",
-            "una ", "uno ", "dos ", "tres ", "cuatro ", "cinco ",
-            "1 ", "2 ", "3 ", "4 ", "5 ",
-            "pizza", "hamburguesa", "coca", "refresco", "agua",
-            "papas", "ensalada", "postre", "helado", "taco"
-        ]
-        
-        return any(p in texto_lower for p in indicadores_pedido)
-    
     def _respuesta_ayuda(self):
         """Respuesta cuando no se entiende el mensaje"""
         return ("🤔 No estoy seguro de entender. ¿Cómo puedo ayudarte?\n\n"
@@ -260,38 +294,27 @@ class ChatbotUI:
                 "- Mostrar el menú\n"
                 "- Verificar el estado de un pedido")
     
-    def _confirmar_pedido(self):
+    def _confirmar_pedido(self, sesion):
         """Confirma y guarda el pedido pendiente en la base de datos"""
         ticket_id = str(uuid.uuid4())[:8].upper()
-        guardado_ok = True
         
-        for item in self.pedido_pendiente:
-            # Obtener precio del producto
-            precio = obtener_precio_producto(item['producto'])
+        # Precios y todas las líneas del ticket en una sola transacción
+        if guardar_pedido_completo(ticket_id, sesion.pedido_pendiente,
+                                   precios=self.menu_cache.precios() or None):
+            self.vigilante.registrar_pedido(ticket_id, sesion.pedido_pendiente)
             
-            # Guardar en BD
-            if not guardar_pedido(
-                ticket_id,
-                item['producto'],
-                item['cantidad'],
-                item['nota'],
-                precio
-            ):
-                guardado_ok = False
-        
-        if guardado_ok:
             respuesta = f"✅ **¡Enviado!** Ticket: `{ticket_id}`\n\n"
-            for item in self.pedido_pendiente:
+            for item in sesion.pedido_pendiente:
                 respuesta += f"- {item['cantidad']}x {item['producto']}\n"
             
-            self.pedido_pendiente = []
+            sesion.pedido_pendiente = []
             return respuesta
         
         return "❌ Error al conectar con la base de datos. Intenta de nuevo."
     
-    def _cancelar_pedido(self):
+    def _cancelar_pedido(self, sesion):
         """Cancela el pedido pendiente"""
-        self.pedido_pendiente = []
+        sesion.pedido_pendiente = []
         return "❌ Pedido cancelado. ¿Quieres pedir algo más?"
     
     def _procesar_consulta_estado(self, consulta):
@@ -324,12 +347,12 @@ class ChatbotUI:
         
         return None
     
-    def _procesar_nuevo_pedido(self, texto_usuario):
+    def _procesar_nuevo_pedido(self, texto_usuario, sesion):
         """Procesa un nuevo pedido del usuario"""
         # Extraer pedidos del texto
-        self.pedido_pendiente = self.order_processor.extraer_pedidos(texto_usuario)
+        sesion.pedido_pendiente = self.order_processor.extraer_pedidos(texto_usuario)
         
-        if not self.pedido_pendiente:
+        if not sesion.pedido_pendiente:
             return (
                 "🤔 No entendí el pedido.\n\n"
                 "Prueba algo como:\n"
@@ -339,7 +362,7 @@ class ChatbotUI:
         
         # Mostrar resumen del pedido
         respuesta = "📋 **He anotado:**\n\n"
-        for i, item in enumerate(self.pedido_pendiente, 1):
+        for i, item in enumerate(sesion.pedido_pendiente, 1):
             respuesta += (
                 f"{i}. **{item['cantidad']}x** {item['producto']}\n"
                 f"   _{item['nota']}_\n"
@@ -350,13 +373,21 @@ class ChatbotUI:
         return respuesta
 
 
-def crear_interfaz():
+def crear_interfaz(chatbot=None):
     """Crea y configura la interfaz de Gradio"""
-    chatbot = ChatbotUI()
+    import gradio as gr
+    
+    chatbot = chatbot or ChatbotUI()
     
     # Obtener mensaje de bienvenida con el menú
     mensaje_inicial = chatbot.obtener_mensaje_bienvenida()
     
+    async def responder(mensaje, historial, request: gr.Request):
+        """Cada navegador conversa con su propia sesión"""
+        return await chatbot.procesar_mensaje_async(
+            mensaje, historial, sesion_id=request.session_hash
+        )
+    
     # CSS personalizado con estilo moderno
     custom_css = """
     /* Fondo general */
@@ -455,18 +486,55 @@ def crear_interfaz():
         )
         
         gr.ChatInterface(
-            fn=chatbot.procesar_mensaje,
+            fn=responder,
             multimodal=False,
-            chatbot=chat
+            chatbot=chat,
+            concurrency_limit=int(os.getenv("GRADIO_CONCURRENCY", "16"))
         )
     
+    # Peticiones en espera como máximo (las demás se rechazan en lugar de acumularse)
+    demo.queue(max_size=int(os.getenv("GRADIO_MAX_COLA", "256")))
+    
     return demo
 
 
+def crear_app():
+    """
+    Aplicación completa: Gradio más el flujo de eventos de pedidos
+    (/eventos por SSE y /eventos/cambios en JSON) y las métricas de
+    Prometheus (/metrics) en el mismo puerto
+    """
+    import gradio as gr
+    from fastapi import FastAPI
+    from fastapi.middleware.cors import CORSMiddleware
+    from event_stream import crear_router
+    from metrics import crear_router_metricas
+    
+    app = FastAPI()
+    # El tablero recibe /eventos en su mismo origen (Apache lo reenvía);
+    # CORS solo para los orígenes que se indiquen expresamente
+    origenes = [o.strip() for o in os.getenv("EVENTOS_CORS", "").split(",") if o.strip()]
+    if origenes:
+        app.add_middleware(
+            CORSMiddleware,
+            allow_origins=origenes,
+            allow_methods=["GET"],
+            allow_headers=["Last-Event-ID"]
+        )
+    app.include_router(crear_router(bus_eventos))
+    app.include_router(crear_router_metricas())
+    
+    # Perfilado bajo demanda: solo si hay token de administración
+    token = os.getenv("PERFIL_TOKEN", "")
+    if token:
+        from profiling import crear_router_perfil
+        
+        app.include_router(crear_router_perfil(perfilador, token))
+    
+    return gr.mount_gradio_app(app, crear_interfaz(), path="/")
+
+
 if __name__ == "__main__":
-    demo = crear_interfaz()
-    demo.launch(
-        server_name="0.0.0.0",
-        server_port=7860,
-        share=False
-    )
+    import uvicorn
+    
+    uvicorn.run(crear_app(), host="0.0.0.0", port=7860)
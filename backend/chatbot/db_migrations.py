@@ -0,0 +1,161 @@
+"""
+Migraciones versionadas del esquema de restaurante_db
+Cada migración se aplica una sola vez y queda registrada en schema_migrations;
+los índices se comprueban en information_schema antes de crearlos, así que
+volver a ejecutar el script sobre una base ya migrada no hace nada
+
+Uso:
+    python db_migrations.py            # aplica las migraciones pendientes
+    python db_migrations.py --estado   # muestra las aplicadas y las pendientes
+"""
+
+import sys
+
+from mysql.connector import Error
+
+from db_repository import _crear_conexion
+
+
+SQL_CREAR_TABLA_MIGRACIONES = """
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version INT NOT NULL PRIMARY KEY,
+    descripcion VARCHAR(255) NOT NULL,
+    aplicada_en TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+)
+"""
+
+SQL_EXISTE_INDICE = """
+SELECT 1 FROM information_schema.statistics
+WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s
+LIMIT 1
+"""
+
+# (tabla, nombre, columnas, único): consultas que cubre cada índice
+INDICES = [
+    # obtener_estado_pedido y las actualizaciones del tablero (WHERE id_pedido = ...)
+    ("pedidos", "idx_pedidos_id_pedido", ("id_pedido",), False),
+    # Tablero: archivados (estado = 'archivado' ORDER BY fecha DESC)
+    ("pedidos", "idx_pedidos_estado_fecha", ("estado", "fecha"), False),
+    # obtener_textos_historicos (ORDER BY fecha DESC LIMIT n)
+    ("pedidos", "idx_pedidos_fecha", ("fecha",), False),
+    # obtener_precio_producto y la consulta IN de guardar_pedido_completo
+    ("menu", "uq_menu_nombre_producto", ("nombre_producto",), True),
+    # obtener_menu_db / obtener_menu_completo (WHERE disponible = 1 ORDER BY nombre_producto)
+    ("menu", "idx_menu_disponible_nombre", ("disponible", "nombre_producto"), False),
+]
+
+
+def existe_indice(cursor, tabla, nombre):
+    """Comprueba en information_schema si el índice ya existe."""
+    cursor.execute(SQL_EXISTE_INDICE, (tabla, nombre))
+    return cursor.fetchone() is not None
+
+def crear_indice(cursor, tabla, nombre, columnas, unico=False):
+    """Crea el índice si no existe. Devuelve True si lo creó."""
+    if existe_indice(cursor, tabla, nombre):
+        return False
+    tipo = "UNIQUE INDEX" if unico else "INDEX"
+    lista = ", ".join(f"`{c}`" for c in columnas)
+    cursor.execute(f"ALTER TABLE `{tabla}` ADD {tipo} `{nombre}` ({lista})")
+    return True
+
+def _indices(*nombres):
+    """Migración que crea los índices indicados de INDICES."""
+    def migrar(cursor):
+        for tabla, nombre, columnas, unico in INDICES:
+            if nombre in nombres and crear_indice(cursor, tabla, nombre, columnas, unico):
+                print(f"  ✓ Índice {nombre} creado en {tabla}")
+    return migrar
+
+def _comprobar_nombres_unicos(cursor):
+    """El índice único falla si hay productos repetidos: se avisa antes con el detalle."""
+    cursor.execute(
+        "SELECT LOWER(nombre_producto), COUNT(*) FROM menu "
+        "GROUP BY LOWER(nombre_producto) HAVING COUNT(*) > 1"
+    )
+    repetidos = cursor.fetchall()
+    if repetidos:
+        detalle = ", ".join(f"{nombre} ({total})" for nombre, total in repetidos)
+        raise Error(f"Productos repetidos en menu, elimínalos antes de migrar: {detalle}")
+
+def _menu_nombre_unico(cursor):
+    _comprobar_nombres_unicos(cursor)
+    _indices("uq_menu_nombre_producto", "idx_menu_disponible_nombre")(cursor)
+
+# (versión, descripción, función): las versiones nunca se renumeran ni se editan
+MIGRACIONES = [
+    (1, "Índices de búsqueda de pedidos (id_pedido, estado+fecha, fecha)",
+     _indices("idx_pedidos_id_pedido", "idx_pedidos_estado_fecha", "idx_pedidos_fecha")),
+    (2, "Nombre de producto único e índice de disponibilidad en menu",
+     _menu_nombre_unico),
+]
+
+def versiones_aplicadas(cursor):
+    """Versiones registradas en schema_migrations."""
+    cursor.execute(SQL_CREAR_TABLA_MIGRACIONES)
+    cursor.execute("SELECT version FROM schema_migrations")
+    return {row[0] for row in cursor.fetchall()}
+
+def aplicar_migraciones(conexion=None):
+    """
+    Aplica en orden las migraciones pendientes.
+    Se detiene en la primera que falle (las anteriores quedan registradas).
+    Devuelve la lista de versiones aplicadas en esta ejecución.
+    """
+    propia = conexion is None
+    if propia:
+        conexion = _crear_conexion()
+    cursor = conexion.cursor()
+    aplicadas = []
+    try:
+        hechas = versiones_aplicadas(cursor)
+        for version, descripcion, migrar in MIGRACIONES:
+            if version in hechas:
+                continue
+            print(f"→ Migración {version}: {descripcion}")
+            # El DDL de MySQL hace commit implícito: el registro va después,
+            # y si algo falla a medias la comprobación de índices lo retoma
+            migrar(cursor)
+            cursor.execute(
+                "INSERT INTO schema_migrations (version, descripcion) VALUES (%s, %s)",
+                (version, descripcion)
+            )
+            conexion.commit()
+            aplicadas.append(version)
+        return aplicadas
+    finally:
+        cursor.close()
+        if propia:
+            conexion.close()
+
+def estado_migraciones(conexion=None):
+    """Devuelve [(versión, descripción, aplicada)] de todas las migraciones."""
+    propia = conexion is None
+    if propia:
+        conexion = _crear_conexion()
+    cursor = conexion.cursor()
+    try:
+        hechas = versiones_aplicadas(cursor)
+        conexion.commit()
+        return [(v, d, v in hechas) for v, d, _ in MIGRACIONES]
+    finally:
+        cursor.close()
+        if propia:
+            conexion.close()
+
+
+if __name__ == "__main__":
+    try:
+        if "--estado" in sys.argv:
+            for version, descripcion, aplicada in estado_migraciones():
+                marca = "✓" if aplicada else "·"
+                print(f"{marca} {version:03d} {descripcion}")
+        else:
+            aplicadas = aplicar_migraciones()
+            if aplicadas:
+                print(f"✓ Migraciones aplicadas: {', '.join(map(str, aplicadas))}")
+            else:
+                print("✓ El esquema ya está al día")
+    except Error as e:
+        print(f"❌ Error en la migración: {e}")
+        sys.exit(1)
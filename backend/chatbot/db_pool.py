@@ -0,0 +1,213 @@
+"""
+Pool de conexiones a la base de datos
+Reutiliza conexiones entre consultas (sin handshake TCP/autenticación
+por cada llamada) y mantiene cursores preparados por sentencia
+"""
+
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+
+class PoolAgotadoError(Exception):
+    """No se obtuvo una conexión libre dentro del tiempo de espera"""
+
+
+class ConexionPool:
+    """Conexión del pool con sus cursores preparados"""
+    
+    def __init__(self, conexion):
+        self.conexion = conexion
+        self.ultimo_uso = time.monotonic()
+        self._cursores = {}
+    
+    def cursor_preparado(self, sql):
+        """
+        Devuelve el cursor preparado para la sentencia (se prepara una sola
+        vez por conexión y se reutiliza en las siguientes ejecuciones)
+        """
+        cursor = self._cursores.get(sql)
+        if cursor is None:
+            cursor = self.conexion.cursor(prepared=True)
+            self._cursores[sql] = cursor
+        return cursor
+    
+    def cursor(self, **kwargs):
+        """Cursor normal (para sentencias de forma variable)"""
+        return self.conexion.cursor(**kwargs)
+    
+    @contextmanager
+    def transaccion(self):
+        """Agrupa varias sentencias: commit al salir, rollback si hay error"""
+        self.conexion.start_transaction()
+        try:
+            yield
+        except Exception:
+            self.conexion.rollback()
+            raise
+        else:
+            self.conexion.commit()
+    
+    def cerrar(self):
+        """Cierra los cursores y la conexión sin propagar errores"""
+        for cursor in self._cursores.values():
+            try:
+                cursor.close()
+            except Exception:
+                pass
+        self._cursores.clear()
+        
+        try:
+            self.conexion.close()
+        except Exception:
+            pass
+
+
+class ConnectionPool:
+    """Pool de tamaño fijo con comprobación de salud y espera acotada"""
+    
+    def __init__(self, crear_conexion, tamano=5, timeout=5.0, intervalo_ping=30.0):
+        """
+        Args:
+            crear_conexion (callable): Devuelve una conexión nueva de mysql.connector
+            tamano (int): Conexiones máximas abiertas a la vez
+            timeout (float): Segundos máximos esperando una conexión libre
+            intervalo_ping (float): Inactividad tras la que se comprueba la conexión
+        """
+        self.crear_conexion = crear_conexion
+        self.tamano = max(1, int(tamano))
+        self.timeout = timeout
+        self.intervalo_ping = intervalo_ping
+        
+        self._libres = queue.LifoQueue()
+        self._creadas = 0
+        self._lock = threading.Lock()
+        
+        # Métricas
+        self.adquisiciones = 0
+        self.esperas = 0
+        self.timeouts = 0
+        self.reconexiones = 0
+        self.tiempo_espera_total = 0.0
+        self.tiempo_espera_max = 0.0
+    
+    @contextmanager
+    def conexion(self):
+        """
+        Presta una conexión del pool durante el bloque with.
+        Si el bloque falla, la conexión se descarta en lugar de devolverse.
+        """
+        conexion = self.adquirir()
+        try:
+            yield conexion
+        except Exception:
+            self.descartar(conexion)
+            raise
+        else:
+            self.liberar(conexion)
+    
+    def adquirir(self):
+        """Toma una conexión libre, crea una nueva o espera hasta el timeout"""
+        inicio = time.perf_counter()
+        conexion = None
+        
+        try:
+            conexion = self._libres.get_nowait()
+        except queue.Empty:
+            crear = False
+            with self._lock:
+                if self._creadas < self.tamano:
+                    self._creadas += 1
+                    crear = True
+            
+            if crear:
+                conexion = self._nueva_conexion()
+            else:
+                self.esperas += 1
+                try:
+                    conexion = self._libres.get(timeout=self.timeout)
+                except queue.Empty:
+                    self.timeouts += 1
+                    raise PoolAgotadoError(
+                        f"Sin conexiones libres tras {self.timeout}s (tamaño {self.tamano})"
+                    )
+        
+        espera = time.perf_counter() - inicio
+        self.adquisiciones += 1
+        self.tiempo_espera_total += espera
+        self.tiempo_espera_max = max(self.tiempo_espera_max, espera)
+        
+        return self._comprobar(conexion)
+    
+    def _nueva_conexion(self):
+        """Abre una conexión física; si falla libera su hueco en el pool"""
+        try:
+            conexion = self.crear_conexion()
+        except Exception:
+            with self._lock:
+                self._creadas -= 1
+            raise
+        
+        # Autocommit: cada lectura ve datos actuales aunque la conexión
+        # se reutilice; las escrituras múltiples abren transacción explícita
+        conexion.autocommit = True
+        return ConexionPool(conexion)
+    
+    def _comprobar(self, conexion):
+        """Verifica con ping las conexiones inactivas y reconecta si hace falta"""
+        if time.monotonic() - conexion.ultimo_uso < self.intervalo_ping:
+            return conexion
+        
+        try:
+            conexion.conexion.ping(reconnect=False)
+            return conexion
+        except Exception:
+            # La conexión caída se sustituye ocupando su mismo hueco
+            self.reconexiones += 1
+            conexion.cerrar()
+            return self._nueva_conexion()
+    
+    def liberar(self, conexion):
+        """Devuelve una conexión sana al pool"""
+        conexion.ultimo_uso = time.monotonic()
+        self._libres.put(conexion)
+    
+    def descartar(self, conexion):
+        """Cierra una conexión que quedó en estado dudoso y libera su hueco"""
+        conexion.cerrar()
+        with self._lock:
+            self._creadas -= 1
+    
+    def cerrar(self):
+        """Cierra todas las conexiones libres"""
+        while True:
+            try:
+                conexion = self._libres.get_nowait()
+            except queue.Empty:
+                break
+            self.descartar(conexion)
+    
+    def metricas(self):
+        """
+        Devuelve la utilización del pool
+        
+        Returns:
+            dict: {tamano, abiertas, en_uso, libres, adquisiciones, esperas,
+                   timeouts, reconexiones, espera_media_ms, espera_max_ms}
+        """
+        libres = self._libres.qsize()
+        return {
+            "tamano": self.tamano,
+            "abiertas": self._creadas,
+            "en_uso": self._creadas - libres,
+            "libres": libres,
+            "adquisiciones": self.adquisiciones,
+            "esperas": self.esperas,
+            "timeouts": self.timeouts,
+            "reconexiones": self.reconexiones,
+            "espera_media_ms": round(
+                1000 * self.tiempo_espera_total / self.adquisiciones, 3
+            ) if self.adquisiciones else 0.0,
+            "espera_max_ms": round(1000 * self.tiempo_espera_max, 3)
+        }
@@ -1,84 +1,213 @@
 import mysql.connector
 from mysql.connector import Error
+from contextlib import ExitStack, contextmanager
 import os
+import threading
+
+from db_pool import ConnectionPool, PoolAgotadoError
+from metrics import LATENCIA_DB, SIN_CONEXION_DB, cronometrar
+
+# Sentencias fijas: se ejecutan con cursores preparados reutilizados por conexión
+SQL_MENU = "SELECT nombre_producto FROM menu WHERE disponible = 1"
+SQL_MENU_COMPLETO = "SELECT nombre_producto, precio FROM menu WHERE disponible = 1 ORDER BY nombre_producto"
+SQL_MENU_CACHE = "SELECT nombre_producto, precio, disponible FROM menu ORDER BY nombre_producto"
+SQL_PRECIO = "SELECT precio FROM menu WHERE nombre_producto = ?"
+SQL_HISTORICO = "SELECT producto, nota FROM pedidos ORDER BY fecha DESC LIMIT ?"
+SQL_INSERTAR_PEDIDO = "INSERT INTO pedidos (id_pedido, producto, cantidad, nota, precio_unitario) VALUES (?, ?, ?, ?, ?)"
+SQL_ESTADO_PEDIDO = "SELECT estado, producto, cantidad FROM pedidos WHERE id_pedido = ?"
+# Filas tocadas desde una fecha (el tablero pone fecha = NOW() al cambiar el estado)
+SQL_CAMBIOS_PEDIDOS = "SELECT id, id_pedido, producto, cantidad, precio_unitario, nota, estado, fecha FROM pedidos WHERE fecha >= ? ORDER BY fecha LIMIT 1000"
+SQL_ULTIMOS_PEDIDOS = "SELECT id, id_pedido, producto, cantidad, precio_unitario, nota, estado, fecha FROM pedidos WHERE fecha >= (SELECT MAX(fecha) FROM pedidos)"
+# Cursor normal: executemany agrupa las filas en un único INSERT multi-fila
+SQL_INSERTAR_PEDIDO_LOTE = "INSERT INTO pedidos (id_pedido, producto, cantidad, nota, precio_unitario) VALUES (%s, %s, %s, %s, %s)"
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def _crear_conexion():
+    """Abre una conexión física (propaga el error)."""
+    return mysql.connector.connect(
+        host=os.getenv("DB_HOST", "localhost"), 
+        user=os.getenv("DB_USER", "root"), 
+        password=os.getenv("DB_PASSWORD", ""), 
+        database=os.getenv("DB_NAME", "restaurante_db")
+    )
 
 def get_db_connection():
     try:
-        return mysql.connector.connect(
-            host=os.getenv("DB_HOST", "localhost"), 
-            user=os.getenv("DB_USER", "root"), 
-            password=os.getenv("DB_PASSWORD", ""), 
-            database=os.getenv("DB_NAME", "restaurante_db")
-        )
+        return _crear_conexion()
     except Error as e: 
         print(f"Error de conexión: {e}")
         return None
 
+def get_pool():
+    """Devuelve el pool de conexiones del proceso (se crea en el primer uso)."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(
+                    _crear_conexion,
+                    tamano=int(os.getenv("DB_POOL_SIZE", "5")),
+                    timeout=float(os.getenv("DB_POOL_TIMEOUT", "5")),
+                    intervalo_ping=float(os.getenv("DB_POOL_PING", "30"))
+                )
+    return _pool
+
+@contextmanager
+def conexion_pool():
+    """
+    Presta una conexión del pool; devuelve None si la BD no está disponible.
+    Si el bloque falla, el pool descarta la conexión en lugar de devolverla.
+    """
+    with ExitStack() as pila:
+        try:
+            conexion = pila.enter_context(get_pool().conexion())
+        except (Error, PoolAgotadoError) as e:
+            print(f"Error de conexión: {e}")
+            SIN_CONEXION_DB.incrementar()
+            conexion = None
+        yield conexion
+
+def obtener_metricas_pool():
+    """Utilización y tiempos de espera del pool de conexiones."""
+    return get_pool().metricas()
+
+@cronometrar(LATENCIA_DB, funcion="obtener_menu_db")
 def obtener_menu_db():
     """Obtiene la lista de productos disponibles desde la tabla menu."""
-    conexion = get_db_connection()
-    if conexion and conexion.is_connected():
-        try:
-            cursor = conexion.cursor()
-            cursor.execute("SELECT nombre_producto FROM menu WHERE disponible = 1")
+    with conexion_pool() as conexion:
+        if conexion:
+            cursor = conexion.cursor_preparado(SQL_MENU)
+            cursor.execute(SQL_MENU)
             # Convertimos a minúsculas para un mejor matching con la IA
             return [row[0].lower() for row in cursor.fetchall()]
-        finally: 
-            conexion.close()
     return []
 
+@cronometrar(LATENCIA_DB, funcion="obtener_menu_completo")
 def obtener_menu_completo():
     """Obtiene el menú completo con nombres y precios para mostrar al usuario."""
-    conexion = get_db_connection()
-    if conexion and conexion.is_connected():
-        try:
-            cursor = conexion.cursor(dictionary=True)
-            cursor.execute("SELECT nombre_producto, precio FROM menu WHERE disponible = 1 ORDER BY nombre_producto")
-            return cursor.fetchall()
-        finally: 
-            conexion.close()
+    with conexion_pool() as conexion:
+        if conexion:
+            cursor = conexion.cursor_preparado(SQL_MENU_COMPLETO)
+            cursor.execute(SQL_MENU_COMPLETO)
+            columnas = cursor.column_names
+            return [dict(zip(columnas, row)) for row in cursor.fetchall()]
     return []
 
+@cronometrar(LATENCIA_DB, funcion="obtener_menu_cache")
+def obtener_menu_cache():
+    """Obtiene todo el menú (nombre, precio y disponibilidad) para la caché en memoria.
+    Devuelve None si la BD no está disponible, para distinguirlo de un menú vacío."""
+    with conexion_pool() as conexion:
+        if conexion:
+            cursor = conexion.cursor_preparado(SQL_MENU_CACHE)
+            cursor.execute(SQL_MENU_CACHE)
+            columnas = cursor.column_names
+            return [dict(zip(columnas, row)) for row in cursor.fetchall()]
+    return None
+
+@cronometrar(LATENCIA_DB, funcion="obtener_precio_producto")
 def obtener_precio_producto(nombre):
     """Busca el precio de un producto específico en la tabla menu."""
-    conexion = get_db_connection()
-    if conexion and conexion.is_connected():
-        try:
-            cursor = conexion.cursor()
-            cursor.execute("SELECT precio FROM menu WHERE nombre_producto = %s", (nombre.lower(),))
-            res = cursor.fetchone()
-            return float(res[0]) if res else 0.0
-        finally: 
-            conexion.close()
+    with conexion_pool() as conexion:
+        if conexion:
+            cursor = conexion.cursor_preparado(SQL_PRECIO)
+            cursor.execute(SQL_PRECIO, (nombre.lower(),))
+            res = cursor.fetchall()
+            return float(res[0][0]) if res else 0.0
     return 0.0
 
+@cronometrar(LATENCIA_DB, funcion="obtener_textos_historicos")
+def obtener_textos_historicos(limite=1000):
+    """Obtiene productos y notas de pedidos recientes (para precalentar cachés)."""
+    with conexion_pool() as conexion:
+        if conexion:
+            cursor = conexion.cursor_preparado(SQL_HISTORICO)
+            cursor.execute(SQL_HISTORICO, (limite,))
+            textos = []
+            for producto, nota in cursor.fetchall():
+                textos.append(producto)
+                if nota and nota.lower() != "sin notas":
+                    textos.append(nota)
+            # Quitar duplicados conservando el orden
+            return list(dict.fromkeys(t for t in textos if t))
+    return []
+
+@cronometrar(LATENCIA_DB, funcion="guardar_pedido")
 def guardar_pedido(id_pedido, producto, cantidad, nota, precio_unitario):
     """Guarda el pedido incluyendo el precio unitario."""
-    conexion = get_db_connection()
-    if conexion and conexion.is_connected():
-        try:
-            cursor = conexion.cursor()
-            # SQL actualizada para incluir precio_unitario
-            sql = "INSERT INTO pedidos (id_pedido, producto, cantidad, nota, precio_unitario) VALUES (%s, %s, %s, %s, %s)"
-            cursor.execute(sql, (id_pedido, producto, cantidad, nota, precio_unitario))
-            conexion.commit()
+    with conexion_pool() as conexion:
+        if conexion:
+            cursor = conexion.cursor_preparado(SQL_INSERTAR_PEDIDO)
+            cursor.execute(SQL_INSERTAR_PEDIDO, (id_pedido, producto, cantidad, nota, precio_unitario))
             return True
-        finally: 
-            conexion.close()
     return False
 
+@cronometrar(LATENCIA_DB, funcion="guardar_pedido_completo")
+def guardar_pedido_completo(id_pedido, items, precios=None):
+    """
+    Guarda todos los productos de un ticket en una sola transacción.
+    Los precios se obtienen con una única consulta IN (...) si no se pasan.
+    Devuelve el id del ticket si se guardó completo, o None (no queda nada escrito).
+    """
+    if not items:
+        return None
+    # El error se captura fuera del with: así conexion_pool descarta la
+    # conexión en lugar de devolverla al pool posiblemente rota
+    try:
+        with conexion_pool() as conexion:
+            if not conexion:
+                return None
+            cursor = conexion.cursor()
+            try:
+                if precios is None:
+                    nombres = sorted({item['producto'].lower() for item in items})
+                    marcadores = ", ".join(["%s"] * len(nombres))
+                    cursor.execute(
+                        f"SELECT nombre_producto, precio FROM menu WHERE nombre_producto IN ({marcadores})",
+                        nombres
+                    )
+                    precios = {nombre.lower(): float(precio) for nombre, precio in cursor.fetchall() if precio is not None}
+                filas = [
+                    (id_pedido, item['producto'], item['cantidad'], item['nota'],
+                     precios.get(item['producto'].lower(), 0.0))
+                    for item in items
+                ]
+                with conexion.transaccion():
+                    cursor.executemany(SQL_INSERTAR_PEDIDO_LOTE, filas)
+                return id_pedido
+            finally:
+                cursor.close()
+    except Error as e:
+        print(f"Error guardando el pedido {id_pedido}: {e}")
+        return None
+
+@cronometrar(LATENCIA_DB, funcion="obtener_estado_pedido")
 def obtener_estado_pedido(id_pedido):
     """Consulta el estado de un ticket."""
-    conexion = get_db_connection()
-    if conexion and conexion.is_connected():
-        try:
-            cursor = conexion.cursor(dictionary=True)
-            sql = "SELECT estado, producto, cantidad FROM pedidos WHERE id_pedido = %s"
-            cursor.execute(sql, (id_pedido,))
-            resultados = cursor.fetchall()
+    with conexion_pool() as conexion:
+        if conexion:
+            cursor = conexion.cursor_preparado(SQL_ESTADO_PEDIDO)
+            cursor.execute(SQL_ESTADO_PEDIDO, (id_pedido,))
+            columnas = cursor.column_names
+            resultados = [dict(zip(columnas, row)) for row in cursor.fetchall()]
             if resultados:
                 return {"estado": resultados[0]['estado'], "items": resultados}
             return None
-        finally: 
-            conexion.close()
-    return None
\ No newline at end of file
+    return None
+
+@cronometrar(LATENCIA_DB, funcion="obtener_cambios_pedidos")
+def obtener_cambios_pedidos(desde=None):
+    """
+    Filas de pedidos con fecha >= desde (sin fecha: las del último instante registrado).
+    Devuelve None si la BD no está disponible.
+    """
+    with conexion_pool() as conexion:
+        if conexion:
+            sql = SQL_CAMBIOS_PEDIDOS if desde is not None else SQL_ULTIMOS_PEDIDOS
+            cursor = conexion.cursor_preparado(sql)
+            cursor.execute(sql, (desde,) if desde is not None else ())
+            columnas = cursor.column_names
+            return [dict(zip(columnas, row)) for row in cursor.fetchall()]
+    return None
@@ -0,0 +1,152 @@
+"""
+Identificación de productos por similitud de embeddings
+Alternativa al Zero-Shot: el menú se codifica una vez y cada segmento
+se resuelve con una pasada del codificador y un producto matricial
+"""
+
+import os
+
+import numpy as np
+
+from model_registry import registro_modelos
+
+
+MODELO_EMBEDDINGS = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+
+
+def _crear_codificador():
+    """
+    Construye el codificador de frases (mean pooling + normalización L2).
+    Devuelve una función textos -> matriz float32 de vectores unitarios.
+    """
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+    
+    nombre = os.getenv("EMBEDDINGS_MODEL", MODELO_EMBEDDINGS)
+    tokenizer = AutoTokenizer.from_pretrained(nombre)
+    modelo = AutoModel.from_pretrained(nombre).eval()
+    
+    def codificar(textos, batch_size=32):
+        vectores = []
+        with torch.inference_mode():
+            for i in range(0, len(textos), batch_size):
+                lote = tokenizer(
+                    textos[i:i + batch_size],
+                    padding=True,
+                    truncation=True,
+                    max_length=64,
+                    return_tensors="pt"
+                )
+                salida = modelo(**lote).last_hidden_state
+                mascara = lote["attention_mask"].unsqueeze(-1).to(salida.dtype)
+                media = (salida * mascara).sum(1) / mascara.sum(1).clamp(min=1e-9)
+                vectores.append(media.numpy())
+        
+        matriz = np.vstack(vectores).astype(np.float32)
+        normas = np.linalg.norm(matriz, axis=1, keepdims=True)
+        return matriz / np.clip(normas, 1e-12, None)
+    
+    return codificar
+
+
+registro_modelos.registrar("embeddings", _crear_codificador)
+
+
+class _EtiquetasMenu:
+    """Etiquetas del menú agrupadas por producto (la matriz se calcula en el primer uso)"""
+    
+    def __init__(self, productos, etiquetas, inicios):
+        """
+        Args:
+            productos (list): Productos en el orden de los grupos
+            etiquetas (list): Producto y sus variaciones, agrupadas por producto
+            inicios (np.ndarray): Posición de la primera etiqueta de cada grupo
+        """
+        self.productos = productos
+        self.etiquetas = etiquetas
+        self.inicios = inicios
+        self.matriz = None
+
+
+class EmbeddingMatcher:
+    """Resuelve segmentos contra el menú por similitud coseno"""
+    
+    def __init__(self, productos, sinonimos=None, top_k=3):
+        """
+        Prepara las etiquetas del menú (la matriz se calcula en el primer uso)
+        
+        Args:
+            productos (list): Lista de productos disponibles
+            sinonimos (dict): Variación -> producto, se codifican junto al producto
+            top_k (int): Número de candidatos devueltos por segmento
+        """
+        self.top_k = top_k
+        self.actualizar(productos, sinonimos)
+    
+    @property
+    def productos(self):
+        """Productos del menú vigente"""
+        return self._menu.productos
+    
+    def actualizar(self, productos, sinonimos=None):
+        """
+        Reconstruye las etiquetas; los vectores se recalculan en el siguiente uso
+        
+        Productos, grupos y matriz se publican con una sola asignación: una
+        llamada en curso termina con el menú anterior completo
+        """
+        productos = list(productos)
+        
+        variantes = {producto: [producto] for producto in productos}
+        for variacion, producto in (sinonimos or {}).items():
+            if producto in variantes and variacion not in variantes[producto]:
+                variantes[producto].append(variacion)
+        
+        etiquetas = []
+        inicios = []
+        for producto in productos:
+            inicios.append(len(etiquetas))
+            etiquetas.extend(variantes[producto])
+        
+        self._menu = _EtiquetasMenu(productos, etiquetas, np.array(inicios, dtype=np.intp))
+    
+    def __call__(self, textos, candidate_labels=None, batch_size=32):
+        """
+        Clasifica segmentos con la misma salida que el pipeline Zero-Shot
+        
+        Args:
+            textos (list|str): Segmentos a resolver
+            candidate_labels: Ignorado (las etiquetas son las del menú)
+            batch_size (int): Segmentos por pasada del codificador
+        
+        Returns:
+            list: [{labels, scores}] con los top_k productos por similitud
+        """
+        if isinstance(textos, str):
+            textos = [textos]
+        menu = self._menu
+        if not menu.productos or not textos:
+            return [{"labels": [], "scores": []} for _ in textos]
+        
+        codificar = registro_modelos.obtener("embeddings")
+        if menu.matriz is None:
+            menu.matriz = codificar(menu.etiquetas)
+        
+        consultas = codificar(list(textos), batch_size)
+        
+        # Similitud con cada etiqueta y máximo por producto (grupos contiguos)
+        similitudes = consultas @ menu.matriz.T
+        por_producto = np.maximum.reduceat(similitudes, menu.inicios, axis=1)
+        
+        k = min(self.top_k, len(menu.productos))
+        candidatos = np.argpartition(-por_producto, k - 1, axis=1)[:, :k]
+        
+        resultados = []
+        for fila, indices in zip(por_producto, candidatos):
+            orden = indices[np.argsort(-fila[indices])]
+            resultados.append({
+                "labels": [menu.productos[j] for j in orden],
+                "scores": [float(fila[j]) for j in orden]
+            })
+        
+        return resultados
@@ -0,0 +1,306 @@
+"""
+Flujo de eventos de pedidos (nuevos tickets y cambios de estado)
+Un único vigilante consulta la base de datos y publica los cambios en un
+registro acotado con cursor; las pantallas reciben solo lo nuevo por
+Server-Sent Events o por consultas incrementales, en lugar de releer la tabla
+"""
+
+import asyncio
+import json
+import threading
+import time
+from collections import OrderedDict, deque
+
+
+class EventBus:
+    """Registro de eventos en memoria con cursor incremental"""
+    
+    def __init__(self, capacidad=1000):
+        """
+        Args:
+            capacidad (int): Eventos que se conservan para clientes que se reconectan
+        """
+        self._eventos = deque(maxlen=max(1, int(capacidad)))
+        self._ultimo_id = 0
+        self._lock = threading.Lock()
+        self._esperas = set()
+        
+        self.publicados = 0
+    
+    @property
+    def cursor(self):
+        """Id del último evento publicado"""
+        return self._ultimo_id
+    
+    def publicar(self, tipo, datos):
+        """
+        Añade un evento al registro y despierta a los clientes en espera
+        
+        Args:
+            tipo (str): "nuevo_pedido" o "estado"
+            datos (dict): Contenido del evento
+        
+        Returns:
+            int: Id del evento
+        """
+        with self._lock:
+            self._ultimo_id += 1
+            self._eventos.append({
+                "id": self._ultimo_id,
+                "tipo": tipo,
+                "ts": time.time(),
+                "datos": datos
+            })
+            self.publicados += 1
+            esperas = list(self._esperas)
+        
+        for loop, evento in esperas:
+            try:
+                loop.call_soon_threadsafe(evento.set)
+            except RuntimeError:
+                # El event loop del cliente ya se cerró
+                pass
+        
+        return self._ultimo_id
+    
+    def desde(self, cursor):
+        """
+        Eventos posteriores al cursor
+        
+        Args:
+            cursor (int): Último id que el cliente ya recibió
+        
+        Returns:
+            tuple: (eventos, nuevo cursor, completo). completo es False si el
+                   cliente se perdió eventos (expulsados del registro o servicio
+                   reiniciado) y debe recargar la lista entera
+        """
+        with self._lock:
+            if cursor > self._ultimo_id:
+                return [], self._ultimo_id, False
+            
+            completo = not self._eventos or cursor >= self._eventos[0]["id"] - 1
+            eventos = [e for e in self._eventos if e["id"] > cursor]
+            return eventos, self._ultimo_id, completo
+    
+    async def esperar_async(self, cursor, timeout):
+        """
+        Espera sin bloquear el event loop a que haya eventos posteriores al cursor
+        
+        Returns:
+            bool: True si hay eventos nuevos
+        """
+        if self._ultimo_id > cursor:
+            return True
+        
+        evento = asyncio.Event()
+        clave = (asyncio.get_running_loop(), evento)
+        with self._lock:
+            self._esperas.add(clave)
+        
+        try:
+            if self._ultimo_id > cursor:
+                return True
+            await asyncio.wait_for(evento.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            with self._lock:
+                self._esperas.discard(clave)
+    
+    def estadisticas(self):
+        """
+        Returns:
+            dict: {cursor, retenidos, publicados, clientes_esperando}
+        """
+        return {
+            "cursor": self._ultimo_id,
+            "retenidos": len(self._eventos),
+            "publicados": self.publicados,
+            "clientes_esperando": len(self._esperas)
+        }
+
+
+class VigilantePedidos:
+    """Detecta con una sola consulta periódica los pedidos nuevos y los cambios de estado"""
+    
+    def __init__(self, bus, consultar_cambios, intervalo=2.0, max_conocidos=10000):
+        """
+        Args:
+            bus (EventBus): Registro donde se publican los eventos
+            consultar_cambios (callable): consultar_cambios(desde) -> filas de pedidos
+                                          con fecha >= desde, o None si la BD falla
+            intervalo (float): Segundos entre consultas
+            max_conocidos (int): Filas cuyo último estado se recuerda
+        """
+        self.bus = bus
+        self.consultar_cambios = consultar_cambios
+        self.intervalo = intervalo
+        self.max_conocidos = max_conocidos
+        
+        self._marca = None
+        self._cebado = False
+        self._conocidos = OrderedDict()
+        self._anunciados = OrderedDict()
+        self._parar = threading.Event()
+        self._hilo = None
+        self._lock = threading.Lock()
+    
+    def registrar_pedido(self, id_pedido, items):
+        """
+        Avisa de un ticket recién guardado por el chatbot (sin esperar al sondeo)
+        
+        El aviso solo lleva los productos; las filas con id, estado y fecha
+        se publican en el siguiente sondeo con origen "chatbot"
+        """
+        with self._lock:
+            self._recordar(self._anunciados, id_pedido, True)
+        self.bus.publicar("nuevo_pedido", {
+            "id_pedido": id_pedido,
+            "origen": "chatbot",
+            "items": [
+                {"producto": i["producto"], "cantidad": i["cantidad"], "nota": i["nota"]}
+                for i in items
+            ]
+        })
+    
+    def iniciar(self):
+        """Arranca el hilo de sondeo (una sola vez por proceso)"""
+        if self._hilo is not None:
+            return
+        self._hilo = threading.Thread(target=self._bucle, name="vigilante-pedidos", daemon=True)
+        self._hilo.start()
+    
+    def detener(self):
+        self._parar.set()
+    
+    def _bucle(self):
+        while True:
+            try:
+                self.comprobar()
+            except Exception as e:
+                print(f"⚠ Error vigilando pedidos: {e}")
+            if self._parar.wait(self.intervalo):
+                break
+    
+    def comprobar(self):
+        """
+        Lee las filas modificadas desde la última marca y publica los cambios.
+        La primera lectura solo memoriza el estado actual.
+        
+        Returns:
+            int: Eventos publicados
+        """
+        filas = self.consultar_cambios(self._marca)
+        if filas is None:
+            return 0
+        
+        primera = not self._cebado
+        self._cebado = True
+        nuevos = OrderedDict()
+        cambios = OrderedDict()
+        
+        with self._lock:
+            for fila in filas:
+                anterior = self._conocidos.get(fila["id"])
+                if anterior is None:
+                    # Fila desconocida: ticket nuevo (del chatbot o de otro origen),
+                    # o uno antiguo que cambió
+                    if primera:
+                        pass
+                    elif fila["estado"] == "pendiente":
+                        nuevos.setdefault(fila["id_pedido"], []).append(fila)
+                    else:
+                        cambios.setdefault(fila["id_pedido"], []).append(fila)
+                elif anterior != fila["estado"]:
+                    cambios.setdefault(fila["id_pedido"], []).append(fila)
+                
+                self._recordar(self._conocidos, fila["id"], fila["estado"])
+                if self._marca is None or fila["fecha"] > self._marca:
+                    self._marca = fila["fecha"]
+        
+        for id_pedido, filas_pedido in nuevos.items():
+            # Los del chatbot ya se avisaron al guardarse: ahora llegan sus filas
+            origen = "chatbot" if id_pedido in self._anunciados else "externo"
+            self.bus.publicar("nuevo_pedido", {
+                "id_pedido": id_pedido, "origen": origen, "filas": filas_pedido
+            })
+        for id_pedido, filas_pedido in cambios.items():
+            self.bus.publicar("estado", {"id_pedido": id_pedido, "filas": filas_pedido})
+        
+        return len(nuevos) + len(cambios)
+    
+    def _recordar(self, registro, clave, valor):
+        registro[clave] = valor
+        registro.move_to_end(clave)
+        while len(registro) > self.max_conocidos:
+            registro.popitem(last=False)
+
+
+bus_eventos = EventBus()
+
+
+def _a_json(datos):
+    # Fechas y decimales como texto, igual que los devuelve la API PHP
+    return json.dumps(datos, default=str, ensure_ascii=False)
+
+
+def _formato_sse(evento):
+    return f"id: {evento['id']}\nevent: {evento['tipo']}\ndata: {_a_json(evento['datos'])}\n\n"
+
+
+def crear_router(bus, keepalive=15.0):
+    """
+    Rutas HTTP del flujo de eventos (se montan junto a Gradio)
+    
+    GET /eventos                  Server-Sent Events (admite Last-Event-ID o ?cursor=)
+    GET /eventos/cambios?cursor=  Eventos posteriores al cursor en JSON
+                                  (&espera=segundos para esperar si no hay ninguno)
+    
+    Returns:
+        APIRouter: Rutas de FastAPI
+    """
+    from fastapi import APIRouter, Request, Response
+    from fastapi.responses import StreamingResponse
+    
+    router = APIRouter()
+    
+    @router.get("/eventos")
+    async def eventos(request: Request, cursor: int = None):
+        if cursor is None:
+            ultimo = request.headers.get("last-event-id", "")
+            cursor = int(ultimo) if ultimo.isdigit() else bus.cursor
+        
+        async def generar(actual):
+            yield f"retry: 3000\nevent: conectado\ndata: {_a_json({'cursor': actual})}\n\n"
+            while not await request.is_disconnected():
+                lista, actual, completo = bus.desde(actual)
+                if not completo:
+                    yield f"id: {actual}\nevent: reinicio\ndata: {_a_json({'cursor': actual})}\n\n"
+                for evento in lista:
+                    yield _formato_sse(evento)
+                if not lista and not await bus.esperar_async(actual, keepalive):
+                    yield ": ping\n\n"
+        
+        return StreamingResponse(
+            generar(cursor),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+    
+    @router.get("/eventos/cambios")
+    async def cambios(cursor: int = None, espera: float = 0.0):
+        if cursor is None:
+            # Primera llamada: el cliente carga la lista completa y sigue desde aquí
+            return Response(_a_json({"cursor": bus.cursor, "eventos": [], "completo": False}),
+                            media_type="application/json")
+        
+        if espera > 0:
+            await bus.esperar_async(cursor, min(espera, 30.0))
+        
+        lista, nuevo, completo = bus.desde(cursor)
+        return Response(_a_json({"cursor": nuevo, "eventos": lista, "completo": completo}),
+                        media_type="application/json")
+    
+    return router
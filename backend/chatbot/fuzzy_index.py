@@ -0,0 +1,191 @@
+"""
+Índice difuso para nombres del menú y sus sinónimos
+Diccionario de borrados al estilo SymSpell: las variantes con hasta N
+caracteres borrados se precalculan, así una búsqueda solo compara
+contra unos pocos candidatos en lugar de contra todo el menú
+"""
+
+import difflib
+import re
+
+
+def _borrados(palabra, max_distancia):
+    """Todas las variantes de la palabra con hasta max_distancia borrados"""
+    variantes = {palabra}
+    frontera = {palabra}
+    
+    for _ in range(max_distancia):
+        siguiente = set()
+        for v in frontera:
+            if len(v) <= 1:
+                continue
+            for i in range(len(v)):
+                siguiente.add(v[:i] + v[i + 1:])
+        siguiente -= variantes
+        variantes |= siguiente
+        frontera = siguiente
+    
+    return variantes
+
+
+def distancia_edicion(a, b, maximo):
+    """
+    Distancia de Damerau-Levenshtein (transposiciones adyacentes)
+    
+    Returns:
+        int: Distancia, o maximo + 1 si la supera
+    """
+    if abs(len(a) - len(b)) > maximo:
+        return maximo + 1
+    
+    anterior2 = None
+    anterior = list(range(len(b) + 1))
+    
+    for i in range(1, len(a) + 1):
+        actual = [i] + [0] * len(b)
+        minimo_fila = actual[0]
+        
+        for j in range(1, len(b) + 1):
+            coste = 0 if a[i - 1] == b[j - 1] else 1
+            actual[j] = min(
+                anterior[j] + 1,
+                actual[j - 1] + 1,
+                anterior[j - 1] + coste
+            )
+            if (anterior2 is not None and j > 1
+                    and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]):
+                actual[j] = min(actual[j], anterior2[j - 2] + 1)
+            minimo_fila = min(minimo_fila, actual[j])
+        
+        if minimo_fila > maximo:
+            return maximo + 1
+        
+        anterior2, anterior = anterior, actual
+    
+    return anterior[len(b)] if anterior[len(b)] <= maximo else maximo + 1
+
+
+class FuzzyIndex:
+    """Busca el producto más parecido a un texto mal escrito"""
+    
+    PALABRAS = re.compile(r'[^\W\d_]+')
+    
+    def __init__(self, terminos, max_distancia=2):
+        """
+        Precalcula el diccionario de borrados
+        
+        Args:
+            terminos (dict): Término (nombre o sinónimo) -> producto del menú
+            max_distancia (int): Distancia de edición máxima admitida
+        """
+        self.max_distancia = max_distancia
+        self.terminos = {t.lower(): p for t, p in terminos.items() if t}
+        self.borrados = {}
+        self.max_palabras = 1
+        
+        for termino in self.terminos:
+            self.max_palabras = max(self.max_palabras, len(termino.split()))
+            for variante in _borrados(termino, self._distancia_permitida(len(termino))):
+                self.borrados.setdefault(variante, set()).add(termino)
+    
+    def _distancia_permitida(self, longitud):
+        """Errores tolerados según la longitud (las palabras cortas, exactas)"""
+        if longitud <= 3:
+            return 0
+        if longitud <= 5:
+            return min(1, self.max_distancia)
+        return self.max_distancia
+    
+    def buscar(self, texto, max_distancia=None):
+        """
+        Busca el término más cercano al texto completo
+        
+        Args:
+            texto (str): Consulta (ya en minúsculas)
+            max_distancia (int): Límite adicional de distancia
+        
+        Returns:
+            tuple: (producto, término, distancia) o None
+        """
+        texto = " ".join(texto.split())
+        if not texto:
+            return None
+        
+        limite = self._distancia_permitida(len(texto))
+        if max_distancia is not None:
+            limite = min(limite, max_distancia)
+        
+        mejor = None
+        vistos = set()
+        for variante in _borrados(texto, limite):
+            for termino in self.borrados.get(variante, ()):
+                if termino in vistos:
+                    continue
+                vistos.add(termino)
+                
+                # Las erratas casi nunca están en la primera letra ("hasta" no es "pasta")
+                if termino[0] != texto[0]:
+                    continue
+                
+                permitido = min(limite, self._distancia_permitida(len(termino)))
+                distancia = distancia_edicion(texto, termino, permitido)
+                if distancia > permitido:
+                    continue
+                
+                candidato = (distancia, -len(termino), termino)
+                if mejor is None or candidato < mejor:
+                    mejor = candidato
+        
+        if mejor is None:
+            return None
+        
+        distancia, _, termino = mejor
+        return self.terminos[termino], termino, distancia
+    
+    def buscar_en_frase(self, frase, max_distancia=None, min_letras=0,
+                        min_similitud=0.0, exenta_frase=False):
+        """
+        Busca sobre la frase completa y sobre cada grupo de palabras
+        consecutivas (hasta el número de palabras del término más largo)
+        
+        Args:
+            frase (str): Texto del segmento
+            max_distancia (int): Límite adicional de distancia
+            min_letras (int): Con erratas, el término de una sola palabra y lo
+                              escrito deben tener al menos estas letras
+                              ("cosa" no es "coca" ni "pasas" es "pastas")
+            min_similitud (float): Similitud mínima (ratio de difflib) entre
+                                   el grupo de palabras y el término
+            exenta_frase (bool): min_letras no se aplica cuando la consulta
+                                 es la frase completa (el segmento es solo el producto)
+        
+        Returns:
+            tuple: (producto, término, distancia) del mejor candidato o None
+        """
+        palabras = self.PALABRAS.findall(frase.lower())
+        completa = " ".join(palabras)
+        consultas = [completa]
+        
+        for n in range(self.max_palabras, 0, -1):
+            for i in range(len(palabras) - n + 1):
+                consultas.append(" ".join(palabras[i:i + n]))
+        
+        consultas = dict.fromkeys(consultas)
+        
+        mejor = None
+        for consulta in consultas:
+            resultado = self.buscar(consulta, max_distancia)
+            if not resultado:
+                continue
+            _, termino, distancia = resultado
+            
+            if (distancia and " " not in termino and min(len(consulta), len(termino)) < min_letras
+                    and not (exenta_frase and consulta == completa)):
+                continue
+            if min_similitud and difflib.SequenceMatcher(None, consulta, termino).ratio() < min_similitud:
+                continue
+            
+            if mejor is None or (distancia, -len(termino)) < (mejor[2], -len(mejor[1])):
+                mejor = resultado
+        
+        return mejor
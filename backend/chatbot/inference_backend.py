@@ -0,0 +1,146 @@
+"""
+Backends de inferencia para los pipelines de transformers
+Permite servir los modelos cuantizados a int8 en CPU (torch o ONNX Runtime)
+manteniendo la misma salida que pipeline()
+
+Uso (exportar una vez, p. ej. al construir la imagen):
+    INFERENCE_BACKEND=onnx python inference_backend.py
+"""
+
+import os
+import pickle
+from pathlib import Path
+
+
+# pytorch (float32, por defecto) | int8 (torch dynamic quantization) | onnx (ONNX Runtime int8)
+BACKEND_POR_DEFECTO = "pytorch"
+
+CACHE_DIR = Path(os.getenv(
+    "QUANTIZED_CACHE_DIR",
+    Path(__file__).parent / ".cache" / "quantized"
+))
+
+
+def crear_pipeline(tarea, modelo, backend=None):
+    """
+    Construye un pipeline de transformers con el backend configurado
+    
+    Args:
+        tarea (str): Tarea del pipeline ("zero-shot-classification", ...)
+        modelo (str): Nombre del modelo en Hugging Face
+        backend (str): pytorch, int8 u onnx (por defecto INFERENCE_BACKEND)
+    
+    Returns:
+        Pipeline: Mismo contrato de llamada y salida que pipeline(tarea)
+    """
+    backend = (backend or os.getenv("INFERENCE_BACKEND", BACKEND_POR_DEFECTO)).lower()
+    
+    if backend == "onnx":
+        try:
+            return _pipeline_onnx(tarea, modelo)
+        except ImportError:
+            print("⚠ optimum[onnxruntime] no está instalado, se usa int8 con torch")
+            backend = "int8"
+    
+    if backend == "int8":
+        return _pipeline_int8(tarea, modelo)
+    
+    from transformers import pipeline
+    
+    return pipeline(tarea, model=modelo)
+
+
+def _ruta_cache(modelo, sufijo):
+    """Ruta del artefacto exportado para un modelo"""
+    return CACHE_DIR / f"{modelo.replace('/', '__')}{sufijo}"
+
+
+def _pipeline_int8(tarea, modelo):
+    """
+    Pipeline con las capas lineales cuantizadas dinámicamente a int8
+    
+    En caché solo se guarda el state_dict cuantizado, que se carga con
+    weights_only=True (sin ejecutar código del pickle): la arquitectura se
+    construye desde la configuración, se cuantiza y recibe esos pesos, así
+    que no hace falta leer el checkpoint float32
+    """
+    import torch
+    from transformers import AutoConfig, AutoModelForSequenceClassification, AutoTokenizer, pipeline
+    
+    ruta = _ruta_cache(modelo, ".int8.state.pt")
+    tokenizer = AutoTokenizer.from_pretrained(modelo)
+    
+    if ruta.exists():
+        try:
+            esqueleto = AutoModelForSequenceClassification.from_config(
+                AutoConfig.from_pretrained(modelo)
+            ).eval()
+            modelo_q = _cuantizar(esqueleto)
+            modelo_q.load_state_dict(torch.load(ruta, weights_only=True))
+            return pipeline(tarea, model=modelo_q.eval(), tokenizer=tokenizer)
+        except (RuntimeError, EOFError, pickle.UnpicklingError) as e:
+            print(f"⚠ Caché int8 no válida, se regenera ({ruta.name}): {e}")
+    
+    base = AutoModelForSequenceClassification.from_pretrained(modelo).eval()
+    modelo_q = _cuantizar(base)
+    
+    # Escritura atómica: un corte a mitad no deja un artefacto truncado
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    temporal = ruta.with_name(f".{ruta.name}.tmp")
+    torch.save(modelo_q.state_dict(), temporal)
+    os.replace(temporal, ruta)
+    print(f"✓ Pesos cuantizados guardados en: {ruta}")
+    
+    return pipeline(tarea, model=modelo_q.eval(), tokenizer=tokenizer)
+
+
+def _cuantizar(modelo):
+    """Cuantización dinámica a int8 de las capas lineales"""
+    import torch
+    
+    return torch.quantization.quantize_dynamic(modelo, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def _pipeline_onnx(tarea, modelo):
+    """Pipeline sobre ONNX Runtime con pesos int8 (exporta la primera vez)"""
+    from optimum.onnxruntime import ORTModelForSequenceClassification, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    from transformers import AutoTokenizer, pipeline
+    
+    destino = _ruta_cache(modelo, "-onnx-int8")
+    archivo = "model_quantized.onnx"
+    tokenizer = AutoTokenizer.from_pretrained(modelo)
+    
+    if not (destino / archivo).exists():
+        exportado = _ruta_cache(modelo, "-onnx")
+        ORTModelForSequenceClassification.from_pretrained(
+            modelo, export=True
+        ).save_pretrained(exportado)
+        
+        quantizer = ORTQuantizer.from_pretrained(exportado)
+        quantizer.quantize(
+            save_dir=destino,
+            quantization_config=AutoQuantizationConfig.avx2(is_static=False, per_channel=False)
+        )
+        print(f"✓ Modelo ONNX cuantizado guardado en: {destino}")
+    
+    modelo_onnx = ORTModelForSequenceClassification.from_pretrained(destino, file_name=archivo)
+    return pipeline(tarea, model=modelo_onnx, tokenizer=tokenizer)
+
+
+def exportar_modelos(backend=None):
+    """Genera de antemano los artefactos cuantizados de todos los pipelines"""
+    from order_processor import MODELO_ZERO_SHOT
+    from sentiment_analyzer import MODELO_SENTIMIENTO
+    
+    modelos = [
+        ("zero-shot-classification", MODELO_ZERO_SHOT),
+        ("sentiment-analysis", MODELO_SENTIMIENTO),
+    ]
+    for tarea, modelo in modelos:
+        print(f"Exportando {modelo}...")
+        crear_pipeline(tarea, modelo, backend)
+
+
+if __name__ == "__main__":
+    exportar_modelos()
@@ -0,0 +1,91 @@
+"""
+Caché LRU acotada para resultados de inferencia
+Evita repetir el modelo para frases que llegan una y otra vez
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class LRUCache:
+    """Caché LRU con caducidad opcional y contadores de uso"""
+    
+    def __init__(self, max_entradas=1024, ttl=None):
+        """
+        Inicializa la caché
+        
+        Args:
+            max_entradas (int): Número máximo de entradas antes de expulsar
+            ttl (float): Segundos de vida de cada entrada (None = sin caducidad)
+        """
+        self.max_entradas = max(1, int(max_entradas))
+        self.ttl = ttl if ttl and ttl > 0 else None
+        
+        self._datos = OrderedDict()
+        self._lock = threading.Lock()
+        
+        self.aciertos = 0
+        self.fallos = 0
+        self.expulsiones = 0
+    
+    def obtener(self, clave):
+        """
+        Devuelve el valor guardado para la clave
+        
+        Returns:
+            object: Valor guardado o None si no está (o ha caducado)
+        """
+        with self._lock:
+            entrada = self._datos.get(clave)
+            
+            if entrada is None:
+                self.fallos += 1
+                return None
+            
+            valor, expira = entrada
+            if expira is not None and expira < time.monotonic():
+                del self._datos[clave]
+                self.fallos += 1
+                return None
+            
+            self._datos.move_to_end(clave)
+            self.aciertos += 1
+            return valor
+    
+    def guardar(self, clave, valor):
+        """Guarda un valor, expulsando la entrada menos usada si está llena"""
+        expira = time.monotonic() + self.ttl if self.ttl else None
+        
+        with self._lock:
+            self._datos[clave] = (valor, expira)
+            self._datos.move_to_end(clave)
+            
+            while len(self._datos) > self.max_entradas:
+                self._datos.popitem(last=False)
+                self.expulsiones += 1
+    
+    def limpiar(self):
+        """Elimina todas las entradas (los contadores se conservan)"""
+        with self._lock:
+            self._datos.clear()
+    
+    def __len__(self):
+        return len(self._datos)
+    
+    def estadisticas(self):
+        """
+        Devuelve el estado de la caché
+        
+        Returns:
+            dict: {entradas, max_entradas, aciertos, fallos, expulsiones, tasa_aciertos}
+        """
+        consultas = self.aciertos + self.fallos
+        return {
+            "entradas": len(self._datos),
+            "max_entradas": self.max_entradas,
+            "aciertos": self.aciertos,
+            "fallos": self.fallos,
+            "expulsiones": self.expulsiones,
+            "tasa_aciertos": round(self.aciertos / consultas, 4) if consultas else 0.0
+        }
@@ -1,99 +1,58 @@
 """
-Clasificador de intenciones del usuario
-Maneja la detección de saludos, despedidas y consultas
+Palabras clave de las intenciones del usuario
+Saludos, despedidas, consultas, menú, feedback y pedidos; intent_router las
+compila en una sola expresión y decide la intención con ellas
 """
 
-import re
-
 
 class IntentClassifier:
-    """Clasifica las intenciones del usuario en el chatbot"""
+    """Listas de palabras clave de cada intención del chatbot"""
     
     # Palabras clave para diferentes intenciones
     SALUDOS = ["hola", "buenas", "buenos dias", "hey", "qué tal", "buenas tardes", "buenas noches"]
     DESPEDIDAS = ["adios", "chao", "hasta luego", "gracias", "bye", "nos vemos"]
     CONSULTAS = ["estado", "como va", "ticket", "pedido", "donde esta"]
+    CONFIRMACIONES = ["si", "sí", "vale", "ok", "okay", "confirmar", "correcto", "exacto"]
+    NEGACIONES = ["no", "nop", "nope", "negativo", "cancelar"]
+    
+    # Palabras que indican que el usuario quiere ver el menú
+    MENU = [
+        "menu", "menú", "carta", "ver carta", "ver menu", "ver menú",
+        "muestrame", "muéstrame", "mostrar menu", "mostrar menú",
+        "que tienen", "qué tienen", "que hay", "qué hay",
+        "que ofrecen", "qué ofrecen", "productos", "opciones",
+        "platillos", "platos", "comidas", "bebidas"
+    ]
     
-    @staticmethod
-    def detectar_saludo_o_despedida(texto):
-        """
-        Detecta si el mensaje es un saludo o despedida
-        
-        Args:
-            texto (str): Mensaje del usuario
-            
-        Returns:
-            str: 'saludo', 'despedida' o None
-        """
-        texto_lower = texto.lower().strip()
-        
-        # Verificar saludos
-        for saludo in IntentClassifier.SALUDOS:
-            if texto_lower == saludo or texto_lower.startswith(saludo + " "):
-                return "saludo"
-        
-        # Verificar despedidas
-        for despedida in IntentClassifier.DESPEDIDAS:
-            if texto_lower == despedida or texto_lower.startswith(despedida + " "):
-                return "despedida"
-        
-        return None
+    # Feedback negativo (quejas, críticas) y, dentro de él, quejas de espera
+    FEEDBACK_NEGATIVO = [
+        "terrible", "horrible", "malo", "mal", "pésimo", "asco",
+        "esperando", "tarda", "demora", "lento", "mucho tiempo",
+        "no llega", "frío", "queja", "molesto", "enfadado",
+        "decepcionado", "decepcionante", "inaceptable"
+    ]
+    ESPERA = ["esperando", "tarda", "demora", "mucho tiempo", "lento", "no llega"]
     
-    @staticmethod
-    def detectar_consulta_pedido(texto):
-        """
-        Identifica si el usuario pregunta por el estado de un ticket
-        
-        Args:
-            texto (str): Mensaje del usuario
-            
-        Returns:
-            str: ID del ticket (8 caracteres hex) o 'SOLICITAR_ID' o None
-        """
-        texto_lower = texto.lower()
-        
-        # Buscar patrón de ID de ticket (8 caracteres hexadecimales)
-        match_id = re.search(r'\b([a-fA-F0-9]{8})\b', texto)
-        if match_id:
-            return match_id.group(1).upper()
-        
-        # Verificar si menciona palabras relacionadas con consulta
-        for palabra in IntentClassifier.CONSULTAS:
-            if palabra in texto_lower:
-                return "SOLICITAR_ID"
-        
-        return None
+    # Feedback positivo (agradecimientos, elogios)
+    FEEDBACK_POSITIVO = [
+        "gracias", "genial", "excelente", "perfecto", "delicioso",
+        "rico", "buenísimo", "increíble", "fantástico", "encanta",
+        "satisfecho", "contento", "feliz", "bien hecho", "buen trabajo"
+    ]
     
-    @staticmethod
-    def es_confirmacion(texto):
-        """
-        Detecta si el mensaje es una confirmación
-        
-        Args:
-            texto (str): Mensaje del usuario
-            
-        Returns:
-            bool: True si es confirmación
-        """
-        texto_lower = texto.lower().strip()
-        confirmaciones = ["si", "sí", "vale", "ok", "okay", "confirmar", "correcto", "exacto"]
-        
-        palabras = texto_lower.split()
-        return any(palabra in confirmaciones for palabra in palabras)
+    # Palabras que indican intención de PEDIR (si aparecen, NO es feedback)
+    VERBOS_PEDIDO = [
+        "quiero", "dame", "ponme", "tráeme", "traeme", "pido",
+        "necesito", "quisiera", "me pones", "me das", "para llevar",
+        "ordenar", "pedir"
+    ]
     
-    @staticmethod
-    def es_negacion(texto):
-        """
-        Detecta si el mensaje es una negación
-        
-        Args:
-            texto (str): Mensaje del usuario
-            
-        Returns:
-            bool: True si es negación
-        """
-        texto_lower = texto.lower().strip()
-        negaciones = ["no", "nop", "nope", "negativo", "cancelar"]
-        
-        palabras = texto_lower.split()
-        return any(palabra in negaciones for palabra in palabras)
+    # Indicios de que el texto es un intento de pedido
+    INDICADORES_PEDIDO = [
+        "quiero", "dame", "ponme", "tráeme", "traeme", "pido",
+        "necesito", "quisiera", "me pones", "me das", "para llevar",
+        "una ", "uno ", "dos ", "tres ", "cuatro ", "cinco ",
+        "1 ", "2 ", "3 ", "4 ", "5 ",
+        "pizza", "hamburguesa", "coca", "refresco", "agua",
+        "papas", "ensalada", "postre", "helado", "taco"
+    ]
@@ -0,0 +1,257 @@
+"""
+Enrutador de intenciones
+Obtiene todos los rasgos de las reglas (consulta, menú, saludo, feedback,
+pedido...) con una sola pasada de una expresión regular compilada y los
+combina con la confianza del clasificador entrenado: el modelo decide cuando
+está seguro y las reglas cuando no, con una sola clasificación por mensaje
+"""
+
+import os
+import re
+
+from intent_classifier import IntentClassifier
+from metrics import DECISIONES_INTENCION
+
+
+# Rasgo -> palabras que lo activan en cualquier parte del texto
+PALABRAS = {
+    "consulta": IntentClassifier.CONSULTAS,
+    "menu": IntentClassifier.MENU,
+    "negativo": IntentClassifier.FEEDBACK_NEGATIVO,
+    "espera": IntentClassifier.ESPERA,
+    "positivo": IntentClassifier.FEEDBACK_POSITIVO,
+    "pedir": IntentClassifier.VERBOS_PEDIDO,
+    "pedido": IntentClassifier.INDICADORES_PEDIDO
+}
+
+# Rasgo -> palabras con las que empieza el mensaje (seguidas de espacio o fin)
+INICIOS = {
+    "saludo": IntentClassifier.SALUDOS,
+    "despedida": IntentClassifier.DESPEDIDAS
+}
+
+# Rasgo -> palabras sueltas del mensaje
+TOKENS = {
+    "confirmacion": IntentClassifier.CONFIRMACIONES,
+    "negacion": IntentClassifier.NEGACIONES
+}
+
+
+def _trie(palabras):
+    """Alternativa de regex con los prefijos comunes factorizados (a lo sumo una rama por carácter)"""
+    arbol = {}
+    for palabra in palabras:
+        nodo = arbol
+        for caracter in palabra:
+            nodo = nodo.setdefault(caracter, {})
+        nodo[""] = {}
+    return _patron_nodo(arbol)
+
+
+def _patron_nodo(nodo):
+    ramas = [re.escape(c) + _patron_nodo(hijo) for c, hijo in sorted(nodo.items()) if c]
+    if not ramas:
+        return ""
+    patron = "(?:" + "|".join(ramas) + ")"
+    # Greedy: si la palabra sigue, se prueba antes la más larga
+    return patron + "?" if "" in nodo else patron
+
+
+def _rasgos_por_palabra(grupos, contiene):
+    """
+    Rasgos que implica cada palabra clave encontrada
+    
+    La regex devuelve la palabra más larga en cada posición; las más cortas
+    que empiezan en la misma posición son prefijos suyos, así que sus rasgos
+    se añaden aquí para que el resultado sea el mismo que probar cada lista
+    
+    Args:
+        grupos (dict): {rasgo: palabras}
+        contiene (callable): contiene(larga, corta) si encontrar `larga`
+                             implica haber encontrado `corta`
+    """
+    rasgos = {}
+    for rasgo, palabras in grupos.items():
+        for palabra in palabras:
+            rasgos.setdefault(palabra, set()).add(rasgo)
+    return {
+        larga: frozenset().union(*(r for corta, r in rasgos.items() if contiene(larga, corta)))
+        for larga in rasgos
+    }
+
+
+def _compilar():
+    palabras = [p for lista in PALABRAS.values() for p in lista]
+    # Un ticket y una palabra nunca empiezan en la misma posición
+    hexadecimales = [p for p in palabras if re.fullmatch(r"[0-9a-f]{1,8}", p)]
+    if hexadecimales:
+        raise ValueError(f"Palabras clave confundibles con un ticket: {hexadecimales}")
+    
+    todas = re.compile(r"(?=(?P<palabra>%s)|\b(?P<ticket>[0-9a-f]{8})\b)" % _trie(palabras))
+    inicio = re.compile(r"(%s)(?: |$)" % _trie([p for lista in INICIOS.values() for p in lista]))
+    return (
+        todas,
+        _rasgos_por_palabra(PALABRAS, lambda larga, corta: larga.startswith(corta)),
+        inicio,
+        _rasgos_por_palabra(INICIOS, lambda larga, corta: larga == corta or larga.startswith(corta + " ")),
+        {t: frozenset(r for r, lista in TOKENS.items() if t in lista) for lista in TOKENS.values() for t in lista}
+    )
+
+
+_TODAS, _RASGOS_PALABRA, _INICIO, _RASGOS_INICIO, _RASGOS_TOKEN = _compilar()
+
+
+class Rasgos:
+    """Rasgos de reglas de un mensaje"""
+    
+    def __init__(self, activos, ticket=None):
+        """
+        Args:
+            activos (frozenset): Nombres de los rasgos presentes
+            ticket (str): Primer ID de ticket del texto (en mayúsculas) o None
+        """
+        self.activos = activos
+        self.ticket = ticket
+    
+    def __contains__(self, rasgo):
+        return rasgo in self.activos
+    
+    def __repr__(self):
+        return f"Rasgos({sorted(self.activos)}, ticket={self.ticket!r})"
+
+
+def extraer_rasgos(texto):
+    """
+    Todos los rasgos de reglas del mensaje
+    
+    Equivale a probar por separado cada lista de IntentClassifier (subcadenas,
+    inicio del mensaje y palabras sueltas) y la regex del ID de ticket
+    
+    Args:
+        texto (str): Mensaje del usuario
+    
+    Returns:
+        Rasgos: Rasgos activos y el ticket mencionado
+    """
+    texto_lower = texto.lower()
+    activos = set()
+    ticket = None
+    
+    for coincidencia in _TODAS.finditer(texto_lower):
+        palabra = coincidencia.group("palabra")
+        if palabra is not None:
+            activos.update(_RASGOS_PALABRA[palabra])
+        elif ticket is None:
+            ticket = coincidencia.group("ticket").upper()
+    
+    texto_lower = texto_lower.strip()
+    inicio = _INICIO.match(texto_lower)
+    if inicio:
+        activos.update(_RASGOS_INICIO[inicio.group(1)])
+    
+    for token in texto_lower.split():
+        rasgos_token = _RASGOS_TOKEN.get(token)
+        if rasgos_token:
+            activos.update(rasgos_token)
+    
+    return Rasgos(frozenset(activos), ticket)
+
+
+def intencion_por_reglas(rasgos):
+    """
+    Intención según las reglas, en el orden de prioridad de siempre
+    (consulta, menú, saludo/despedida, feedback, pedido)
+    
+    Returns:
+        str: Intención con las mismas etiquetas que el modelo, o None
+    """
+    if rasgos.ticket or "consulta" in rasgos:
+        return "consulta_estado"
+    if "menu" in rasgos:
+        return "consulta_menu"
+    if "saludo" in rasgos:
+        return "saludo"
+    if "despedida" in rasgos:
+        return "despedida"
+    
+    # Con palabras de pedido no es feedback
+    if "pedir" not in rasgos:
+        if "negativo" in rasgos:
+            return "queja"
+        if "positivo" in rasgos:
+            return "feedback_positivo"
+    
+    if "pedido" in rasgos:
+        return "pedido"
+    if "confirmacion" in rasgos:
+        return "confirmacion"
+    if "negacion" in rasgos:
+        return "negacion"
+    return None
+
+
+class IntentRouter:
+    """Decide la intención de cada mensaje con reglas y la confianza del modelo"""
+    
+    def __init__(self, clasificador=None, umbral=None, umbral_minimo=None):
+        """
+        Args:
+            clasificador: TrainedIntentClassifier (sin él solo se usan reglas)
+            umbral (float): Confianza a partir de la cual el modelo se impone
+                            a las reglas
+            umbral_minimo (float): Confianza mínima para usar el modelo cuando
+                                   ninguna regla se activa (si no, ayuda)
+        """
+        self.clasificador = clasificador
+        self.umbral = float(os.getenv("UMBRAL_INTENCION", "0.2")) if umbral is None else umbral
+        self.umbral_minimo = (
+            float(os.getenv("UMBRAL_INTENCION_MIN", "0")) if umbral_minimo is None else umbral_minimo
+        )
+    
+    def decidir(self, texto, pedido_pendiente=False, rasgos=None):
+        """
+        Intención del mensaje
+        
+        1. Con un pedido pendiente, 'sí'/'no' lo confirman o cancelan
+        2. Un ID de ticket es siempre una consulta de estado
+        3. El modelo, si su confianza llega a `umbral`
+        4. Las reglas, si alguna se activa
+        5. El modelo, si su confianza llega a `umbral_minimo`
+        
+        Args:
+            texto (str): Mensaje del usuario
+            pedido_pendiente (bool): Si la sesión tiene un pedido sin confirmar
+            rasgos (Rasgos): Rasgos ya extraídos del texto (se calculan si no)
+        
+        Returns:
+            tuple: (intención o None, rasgos)
+        """
+        if rasgos is None:
+            rasgos = extraer_rasgos(texto)
+        
+        if pedido_pendiente and "confirmacion" in rasgos:
+            return self._anotar("pendiente", "confirmacion"), rasgos
+        if pedido_pendiente and "negacion" in rasgos:
+            return self._anotar("pendiente", "negacion"), rasgos
+        if rasgos.ticket:
+            return self._anotar("ticket", "consulta_estado"), rasgos
+        
+        intencion, confianza = None, 0.0
+        if self.clasificador is not None:
+            intencion, confianza = self.clasificador.clasificar_con_confianza(texto)
+        
+        if intencion and confianza >= self.umbral:
+            return self._anotar("modelo", intencion), rasgos
+        
+        regla = intencion_por_reglas(rasgos)
+        if regla:
+            return self._anotar("reglas", regla), rasgos
+        
+        if intencion and confianza >= self.umbral_minimo:
+            return self._anotar("modelo_baja_confianza", intencion), rasgos
+        return self._anotar("ninguna", None), rasgos
+    
+    @staticmethod
+    def _anotar(via, intencion):
+        DECISIONES_INTENCION.incrementar(via=via, intencion=intencion or "ninguna")
+        return intencion
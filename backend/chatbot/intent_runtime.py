@@ -0,0 +1,315 @@
+"""
+Clasificador de intención compacto (solo NumPy)
+Reproduce TfidfVectorizer (o HashingVectorizer) + MultinomialNB a partir de un
+artefacto .npz con el vocabulario (o las columnas hash vistas), el vector idf y
+las log-probabilidades de cada clase, de modo que el chatbot no necesita
+sklearn/scipy ni la misma versión con la que se entrenó. train_model.py
+exporta el artefacto junto al pickle y train_incremental.py una versión nueva
+por cada actualización
+"""
+
+import functools
+import math
+import os
+import re
+import time
+import unicodedata
+from pathlib import Path
+
+import numpy as np
+
+
+# Se incrementa si cambia el contenido del artefacto (se siguen leyendo los anteriores)
+FORMATO = 2
+FORMATOS_SOPORTADOS = (1, 2)
+
+# Archivo con el nombre de la última versión publicada en una carpeta de versiones
+PUNTERO = "ULTIMA"
+
+NORMAS = ("l2", "l1", "")
+ACENTOS = ("", "unicode", "ascii")
+
+
+def _quitar_acentos(texto, modo):
+    """Igual que strip_accents de sklearn ('unicode' o 'ascii')"""
+    if modo == "ascii":
+        return unicodedata.normalize("NFKD", texto).encode("ascii", "ignore").decode("ascii")
+    normalizado = unicodedata.normalize("NFKD", texto)
+    if normalizado == texto:
+        return texto
+    return "".join(c for c in normalizado if not unicodedata.combining(c))
+
+
+def _murmurhash3_32(datos, semilla=0):
+    """MurmurHash3 x86 de 32 bits con signo, el de sklearn.utils.murmurhash3_32"""
+    c1, c2, mascara = 0xcc9e2d51, 0x1b873593, 0xFFFFFFFF
+    h = semilla
+    fin_bloques = len(datos) & ~3
+    
+    for i in range(0, fin_bloques, 4):
+        k = (int.from_bytes(datos[i:i + 4], "little") * c1) & mascara
+        k = (((k << 15) | (k >> 17)) * c2) & mascara
+        h ^= k
+        h = (h << 13) | (h >> 19)
+        h = (h * 5 + 0xe6546b64) & mascara
+    
+    if fin_bloques < len(datos):
+        k = (int.from_bytes(datos[fin_bloques:], "little") * c1) & mascara
+        h ^= (((k << 15) | (k >> 17)) * c2) & mascara
+    
+    h ^= len(datos)
+    h ^= h >> 16
+    h = (h * 0x85ebca6b) & mascara
+    h ^= h >> 13
+    h = (h * 0xc2b2ae35) & mascara
+    h ^= h >> 16
+    return h - 0x100000000 if h & 0x80000000 else h
+
+
+@functools.lru_cache(maxsize=65536)
+def _columna_hash(termino, n_columnas):
+    """Columna de HashingVectorizer(alternate_sign=False) para un término"""
+    h = _murmurhash3_32(termino.encode("utf-8"))
+    if h == -2147483648:
+        return (2147483647 - (n_columnas - 1)) % n_columnas
+    return abs(h) % n_columnas
+
+
+def exportar_runtime(pipeline, ruta, version=None):
+    """
+    Guarda un Pipeline(TfidfVectorizer o HashingVectorizer, MultinomialNB) ya
+    entrenado como .npz. Con hashing solo se guardan las columnas que aparecen
+    en el entrenamiento más una columna con el valor de las no vistas
+    
+    Args:
+        pipeline: Pipeline de sklearn (vectorizador y después clasificador)
+        ruta (str|Path): Archivo .npz de destino
+        version (str): Identificador del entrenamiento (por defecto la fecha)
+    
+    Returns:
+        Path: Ruta del artefacto
+    
+    Raises:
+        ValueError: Si el pipeline usa opciones que el runtime no reproduce
+    """
+    vectorizador = pipeline[0]
+    clf = pipeline[-1]
+    hashing = type(vectorizador).__name__ == "HashingVectorizer"
+    
+    if type(clf).__name__ != "MultinomialNB":
+        raise ValueError(f"Clasificador no soportado: {type(clf).__name__}")
+    if vectorizador.analyzer != "word" or vectorizador.tokenizer is not None or vectorizador.preprocessor is not None:
+        raise ValueError("Solo se soporta el analizador 'word' con el tokenizador por defecto")
+    if vectorizador.stop_words is not None:
+        raise ValueError("stop_words no está soportado en el runtime")
+    if (vectorizador.norm or "") not in NORMAS or (vectorizador.strip_accents or "") not in ACENTOS:
+        raise ValueError(f"norm={vectorizador.norm} / strip_accents={vectorizador.strip_accents} no soportados")
+    if hashing and vectorizador.alternate_sign:
+        raise ValueError("HashingVectorizer debe usar alternate_sign=False")
+    
+    log_prob = clf.feature_log_prob_
+    if hashing:
+        # Las columnas sin ejemplos valen lo mismo dentro de cada clase
+        vistas = clf.feature_count_.sum(axis=0) > 0
+        columnas = np.flatnonzero(vistas)
+        no_vistas = np.flatnonzero(~vistas)[:1]
+        defecto = log_prob[:, no_vistas] if len(no_vistas) else np.zeros((len(clf.classes_), 1))
+        log_prob = np.hstack([log_prob[:, columnas], defecto])
+        vocabulario = np.empty(0, dtype=object)
+        idf = np.ones(log_prob.shape[1])
+        n_hash = vectorizador.n_features
+    else:
+        columnas = np.empty(0, dtype=np.int64)
+        vocabulario = np.empty(len(vectorizador.vocabulary_), dtype=object)
+        for termino, indice in vectorizador.vocabulary_.items():
+            vocabulario[indice] = termino
+        idf = vectorizador.idf_ if vectorizador.use_idf else np.ones(len(vocabulario))
+        n_hash = 0
+    
+    ruta = Path(ruta)
+    np.savez(
+        ruta,
+        formato=np.array(FORMATO),
+        version=np.array(version or time.strftime("%Y%m%d-%H%M%S")),
+        clases=np.array([str(c) for c in clf.classes_]),
+        vocabulario=vocabulario.astype(str),
+        n_hash=np.array(n_hash),
+        columnas=np.asarray(columnas, dtype=np.int64),
+        idf=np.asarray(idf, dtype=np.float64),
+        log_prob=np.ascontiguousarray(log_prob, dtype=np.float64),
+        log_prior=np.asarray(clf.class_log_prior_, dtype=np.float64),
+        token_pattern=np.array(vectorizador.token_pattern),
+        ngramas=np.array(vectorizador.ngram_range),
+        lowercase=np.array(bool(vectorizador.lowercase)),
+        strip_accents=np.array(vectorizador.strip_accents or ""),
+        binary=np.array(bool(vectorizador.binary)),
+        sublinear_tf=np.array(bool(getattr(vectorizador, "sublinear_tf", False))),
+        norm=np.array(vectorizador.norm or "")
+    )
+    return ruta
+
+
+def publicar_version(directorio, ruta):
+    """
+    Marca un artefacto como la última versión de la carpeta (escritura atómica)
+    
+    Args:
+        directorio (str|Path): Carpeta de versiones
+        ruta (str|Path): Artefacto dentro de esa carpeta
+    """
+    directorio = Path(directorio)
+    temporal = directorio / f".{PUNTERO}.tmp"
+    temporal.write_text(Path(ruta).name + "\n", encoding="utf-8")
+    os.replace(temporal, directorio / PUNTERO)
+
+
+def ultima_version(directorio):
+    """
+    Returns:
+        Path: Última versión publicada en la carpeta, o None si no hay
+    """
+    puntero = Path(directorio) / PUNTERO
+    if not puntero.exists():
+        return None
+    ruta = Path(directorio) / puntero.read_text(encoding="utf-8").strip()
+    return ruta if ruta.exists() else None
+
+
+class IntentRuntime:
+    """
+    Clasificador cargado desde el artefacto .npz. Expone predict,
+    predict_proba y classes_ como el Pipeline, así que lo sustituye tal cual
+    """
+    
+    def __init__(self, ruta):
+        """
+        Args:
+            ruta (str|Path): Artefacto generado por exportar_runtime
+        
+        Raises:
+            ValueError: Si el formato del artefacto no es el de este runtime
+        """
+        with np.load(ruta, allow_pickle=False) as datos:
+            formato = int(datos["formato"])
+            if formato not in FORMATOS_SOPORTADOS:
+                raise ValueError(f"Formato de artefacto {formato} no soportado (se espera {FORMATO})")
+            
+            self.version = str(datos["version"])
+            self.classes_ = datos["clases"].astype(object)
+            self.idf = datos["idf"]
+            # (términos, clases): las columnas de un documento se leen contiguas
+            self.log_prob_t = np.ascontiguousarray(datos["log_prob"].T)
+            self.log_prior = datos["log_prior"]
+            
+            self.ngramas = tuple(int(n) for n in datos["ngramas"])
+            self.lowercase = bool(datos["lowercase"])
+            self.strip_accents = str(datos["strip_accents"])
+            self.binary = bool(datos["binary"])
+            self.sublinear_tf = bool(datos["sublinear_tf"])
+            self.norm = str(datos["norm"])
+            self._token = re.compile(str(datos["token_pattern"]))
+            self.vocabulario = {t: i for i, t in enumerate(datos["vocabulario"].tolist())}
+            
+            # Hashing: columna hash -> fila de log_prob (la última es la de las no vistas)
+            self.n_hash = int(datos["n_hash"]) if "n_hash" in datos.files else 0
+            if self.n_hash:
+                self.columnas = {c: i for i, c in enumerate(datos["columnas"].tolist())}
+                self._no_vista = len(self.columnas)
+    
+    def _terminos(self, texto):
+        """Tokens y n-gramas del texto, como el analizador 'word' de sklearn"""
+        if self.lowercase:
+            texto = texto.lower()
+        if self.strip_accents:
+            texto = _quitar_acentos(texto, self.strip_accents)
+        tokens = self._token.findall(texto)
+        
+        minimo, maximo = self.ngramas
+        if maximo == 1:
+            return tokens
+        terminos = list(tokens) if minimo == 1 else []
+        for n in range(max(minimo, 2), min(maximo, len(tokens)) + 1):
+            for i in range(len(tokens) - n + 1):
+                terminos.append(" ".join(tokens[i:i + n]))
+        return terminos
+    
+    def _vectorizar(self, texto):
+        """
+        Vector TF-IDF disperso del texto
+        
+        Returns:
+            tuple: (índices, pesos) de los términos del vocabulario presentes
+        """
+        cuentas = {}
+        for termino in self._terminos(texto):
+            if self.n_hash:
+                indice = _columna_hash(termino, self.n_hash)
+            else:
+                indice = self.vocabulario.get(termino)
+                if indice is None:
+                    continue
+            cuentas[indice] = cuentas.get(indice, 0) + 1
+        
+        # Índices ordenados y sumas en el mismo orden que sklearn/scipy, para
+        # que los empates se resuelvan igual que con el pickle
+        ordenados = sorted(cuentas.items())
+        if self.n_hash:
+            ordenados = [(self.columnas.get(c, self._no_vista), n) for c, n in ordenados]
+        indices = np.fromiter((i for i, _ in ordenados), dtype=np.intp, count=len(ordenados))
+        pesos = np.fromiter((c for _, c in ordenados), dtype=np.float64, count=len(ordenados))
+        if self.binary:
+            pesos[:] = 1.0
+        elif self.sublinear_tf:
+            pesos = np.log(pesos) + 1.0
+        pesos *= self.idf[indices]
+        
+        if self.norm == "l2":
+            total = math.sqrt(sum(p * p for p in pesos.tolist()))
+        elif self.norm == "l1":
+            total = sum(abs(p) for p in pesos.tolist())
+        else:
+            total = 0.0
+        if total > 0:
+            pesos /= total
+        return indices, pesos
+    
+    def puntuaciones(self, textos):
+        """
+        Log-verosimilitud conjunta de cada clase (producto disperso de todo el bloque)
+        
+        Returns:
+            np.ndarray: (documentos, clases)
+        """
+        vectores = [self._vectorizar(texto) for texto in textos]
+        longitudes = np.fromiter((len(i) for i, _ in vectores), dtype=np.intp, count=len(vectores))
+        resultado = np.zeros((len(textos), len(self.classes_)))
+        
+        if longitudes.any():
+            # Todos los términos del bloque en una sola matriz (términos, clases)
+            indices = np.concatenate([i for i, _ in vectores])
+            pesos = np.concatenate([p for _, p in vectores])
+            contribuciones = pesos[:, None] * self.log_prob_t[indices]
+            
+            # Se suma el k-ésimo término de todos los documentos a la vez: cada
+            # documento acumula en el mismo orden que el producto disperso de scipy
+            if len(vectores) == 1:
+                resultado[0] = np.add.accumulate(contribuciones, axis=0)[-1]
+                return resultado + self.log_prior
+            
+            inicios = np.cumsum(longitudes) - longitudes
+            for k in range(longitudes.max()):
+                activos = np.flatnonzero(longitudes > k)
+                resultado[activos] += contribuciones[inicios[activos] + k]
+        
+        resultado += self.log_prior
+        return resultado
+    
+    def predict(self, textos):
+        return self.classes_[np.argmax(self.puntuaciones(textos), axis=1)]
+    
+    def predict_proba(self, textos):
+        puntuaciones = self.puntuaciones(textos)
+        puntuaciones -= puntuaciones.max(axis=1, keepdims=True)
+        probabilidades = np.exp(puntuaciones)
+        probabilidades /= probabilidades.sum(axis=1, keepdims=True)
+        return probabilidades
@@ -0,0 +1,189 @@
+"""
+Caché del menú en memoria
+Guarda nombres, precios y disponibilidad con un sello de versión y se
+refresca en segundo plano al caducar, de modo que el camino caliente
+nunca espera a la base de datos
+"""
+
+import hashlib
+import threading
+import time
+
+
+class _VersionMenu:
+    """
+    Una versión del menú. No se modifica una vez publicada: un refresco
+    construye otra y la sustituye con una sola asignación
+    """
+    
+    def __init__(self, version, items, precios):
+        self.version = version
+        self.items = items
+        self.precios = precios
+    
+    def productos(self):
+        return [item['nombre_producto'] for item in self.items if item['disponible']]
+    
+    def items_disponibles(self):
+        return [
+            {'nombre_producto': item['nombre_producto'], 'precio': item['precio']}
+            for item in self.items if item['disponible']
+        ]
+
+
+class MenuCache:
+    """Menú en memoria con versión, caducidad y avisos de cambio"""
+    
+    def __init__(self, cargar_menu, ttl=30.0):
+        """
+        Carga el menú por primera vez (de forma síncrona)
+        
+        Args:
+            cargar_menu (callable): Devuelve [{nombre_producto, precio, disponible}]
+                                    o None si la base de datos no responde
+            ttl (float): Segundos tras los que se vuelve a consultar el menú
+        """
+        self.cargar_menu = cargar_menu
+        self.ttl = ttl
+        
+        self._menu = _VersionMenu(None, (), {})
+        self._cargado_en = 0.0
+        
+        self._suscriptores = []
+        self._lock = threading.Lock()
+        self._refrescando = False
+        
+        self.refrescos = 0
+        self.cambios = 0
+        
+        self.refrescar()
+    
+    def suscribir(self, callback):
+        """
+        Registra una función que se llama con la caché cada vez que cambia la versión
+        
+        Args:
+            callback (callable): Recibe la propia MenuCache
+        """
+        self._suscriptores.append(callback)
+    
+    def instantanea(self):
+        """
+        Versión vigente completa, para leer varios datos de la misma versión
+        
+        Returns:
+            _VersionMenu: version, items, precios, productos() e items_disponibles()
+        """
+        self._comprobar_caducidad()
+        return self._menu
+    
+    @property
+    def version(self):
+        """Sello de la versión vigente del menú"""
+        return self.instantanea().version
+    
+    def productos(self):
+        """Nombres (en minúsculas) de los productos disponibles"""
+        return self.instantanea().productos()
+    
+    def items_disponibles(self):
+        """Productos disponibles con su precio, ordenados por nombre"""
+        return self.instantanea().items_disponibles()
+    
+    def precios(self):
+        """Diccionario nombre (minúsculas) -> precio"""
+        return self.instantanea().precios
+    
+    def precio(self, nombre):
+        """Precio de un producto o 0.0 si no está en el menú"""
+        return self.precios().get(nombre.lower(), 0.0)
+    
+    def refrescar(self):
+        """
+        Vuelve a leer el menú; si la versión cambia avisa a los suscriptores.
+        Si la base de datos no responde se conserva la versión anterior.
+        
+        Returns:
+            bool: True si la versión cambió
+        """
+        filas = self.cargar_menu()
+        self._cargado_en = time.monotonic()
+        self.refrescos += 1
+        
+        if filas is None:
+            return False
+        
+        items = sorted(
+            (
+                {
+                    'nombre_producto': fila['nombre_producto'].lower(),
+                    'precio': float(fila['precio'] or 0.0),
+                    'disponible': bool(fila.get('disponible', 1))
+                }
+                for fila in filas
+            ),
+            key=lambda item: item['nombre_producto']
+        )
+        version = self._calcular_version(items)
+        if version == self._menu.version:
+            return False
+        
+        # Sustitución atómica: los lectores ven la versión vieja o la nueva
+        self._menu = _VersionMenu(
+            version,
+            tuple(items),
+            {item['nombre_producto']: item['precio'] for item in items}
+        )
+        self.cambios += 1
+        
+        for callback in self._suscriptores:
+            try:
+                callback(self)
+            except Exception as e:
+                print(f"⚠ Error notificando cambio de menú: {e}")
+        
+        return True
+    
+    @staticmethod
+    def _calcular_version(items):
+        """Huella del contenido del menú (nombres, precios y disponibilidad)"""
+        contenido = "\n".join(
+            f"{item['nombre_producto']}|{item['precio']:.2f}|{int(item['disponible'])}"
+            for item in items
+        )
+        return hashlib.sha1(contenido.encode("utf-8")).hexdigest()[:12]
+    
+    def _comprobar_caducidad(self):
+        """Si el menú caducó, lanza un refresco en segundo plano (sin esperar)"""
+        if time.monotonic() - self._cargado_en < self.ttl:
+            return
+        
+        with self._lock:
+            if self._refrescando:
+                return
+            self._refrescando = True
+        
+        threading.Thread(target=self._refrescar_en_segundo_plano, daemon=True).start()
+    
+    def _refrescar_en_segundo_plano(self):
+        try:
+            self.refrescar()
+        except Exception as e:
+            print(f"⚠ Error refrescando el menú: {e}")
+        finally:
+            with self._lock:
+                self._refrescando = False
+    
+    def estadisticas(self):
+        """
+        Returns:
+            dict: {version, productos, antiguedad_s, refrescos, cambios}
+        """
+        menu = self._menu
+        return {
+            "version": menu.version,
+            "productos": len(menu.items),
+            "antiguedad_s": round(time.monotonic() - self._cargado_en, 1),
+            "refrescos": self.refrescos,
+            "cambios": self.cambios
+        }
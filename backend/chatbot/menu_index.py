@@ -0,0 +1,139 @@
+"""
+Índice del menú para localizar productos en el texto
+Trie de tokens con coincidencia del producto más largo en una sola pasada
+"""
+
+import re
+
+
+class MenuIndex:
+    """Localiza productos del menú, su cantidad y sus modificadores"""
+    
+    # Marca de fin de producto dentro del trie
+    _FIN = None
+    
+    TOKEN = re.compile(r'\w+')
+    NUMERO = re.compile(r'\d+')
+    SEPARADOR = re.compile(r'\s+y\s+|\s*,\s*')
+    MODIFICADORES = ["con", "sin", "extra", "mucho", "poco"]
+    
+    def __init__(self, productos):
+        """
+        Construye el trie a partir de los nombres del menú
+        
+        Args:
+            productos (list): Lista de productos disponibles
+        """
+        self.trie = {}
+        
+        for producto in productos:
+            tokens = self.TOKEN.findall(producto.lower())
+            if not tokens:
+                continue
+            
+            nodo = self.trie
+            for token in tokens:
+                nodo = nodo.setdefault(token, {})
+            nodo[self._FIN] = producto
+    
+    def buscar(self, texto):
+        """
+        Recorre el texto una vez y devuelve cada producto encontrado
+        
+        Args:
+            texto (str): Texto normalizado (en minúsculas)
+        
+        Returns:
+            list: Diccionarios con {producto, inicio, fin, cantidad,
+                  inicio_cantidad, modificador, fin_contexto}
+                  ordenados por posición
+        """
+        tokens = list(self.TOKEN.finditer(texto))
+        coincidencias = []
+        
+        i = 0
+        while i < len(tokens):
+            producto, ultimo = self._coincidencia_mas_larga(tokens, i)
+            
+            if producto is None:
+                i += 1
+                continue
+            
+            coincidencia = {
+                'producto': producto,
+                'inicio': tokens[i].start(),
+                'fin': tokens[ultimo].end(),
+                'cantidad': None,
+                'inicio_cantidad': tokens[i].start(),
+                'modificador': '',
+                'fin_contexto': len(texto)
+            }
+            
+            # Cantidad justo antes del producto (solo espacios entre medias)
+            if i > 0 and self.NUMERO.fullmatch(tokens[i - 1].group(0)):
+                anterior = tokens[i - 1]
+                libre = coincidencias[-1]['fin'] if coincidencias else 0
+                if anterior.start() >= libre and not texto[anterior.end():tokens[i].start()].strip():
+                    coincidencia['cantidad'] = int(anterior.group(0))
+                    coincidencia['inicio_cantidad'] = anterior.start()
+            
+            coincidencias.append(coincidencia)
+            i = ultimo + 1
+        
+        self._completar_contexto(texto, coincidencias)
+        return coincidencias
+    
+    def producto_mas_largo(self, texto):
+        """
+        Devuelve el producto de nombre más largo presente en el texto
+        
+        Returns:
+            str: Nombre del producto o None
+        """
+        productos = [c['producto'] for c in self.buscar(texto)]
+        return max(productos, key=len) if productos else None
+    
+    def _coincidencia_mas_larga(self, tokens, inicio):
+        """Avanza por el trie desde un token y devuelve (producto, último token)"""
+        nodo = self.trie
+        producto, ultimo = None, inicio
+        
+        for j in range(inicio, len(tokens)):
+            nodo = self._siguiente_nodo(nodo, tokens[j].group(0))
+            if nodo is None:
+                break
+            if self._FIN in nodo:
+                producto, ultimo = nodo[self._FIN], j
+        
+        return producto, ultimo
+    
+    @staticmethod
+    def _siguiente_nodo(nodo, token):
+        """Busca el token en el nodo, tolerando plurales simples (-s, -es)"""
+        if token in nodo:
+            return nodo[token]
+        if token.endswith('es') and token[:-2] in nodo:
+            return nodo[token[:-2]]
+        if token.endswith('s') and token[:-1] in nodo:
+            return nodo[token[:-1]]
+        return None
+    
+    def _completar_contexto(self, texto, coincidencias):
+        """
+        Calcula hasta dónde llega el contexto de cada producto (primer separador
+        antes del siguiente producto) y extrae su modificador
+        """
+        for i, actual in enumerate(coincidencias):
+            if i < len(coincidencias) - 1:
+                limite = coincidencias[i + 1]['inicio_cantidad']
+                sep_match = self.SEPARADOR.search(texto, actual['fin'], limite)
+                actual['fin_contexto'] = sep_match.start() if sep_match else actual['fin']
+                fin_modificador = sep_match.start() if sep_match else limite
+            else:
+                sep_match = self.SEPARADOR.search(texto, actual['fin'])
+                fin_modificador = sep_match.start() if sep_match else len(texto)
+            
+            resto = texto[actual['fin']:fin_modificador].strip()
+            primera = resto.split(' ', 1)[0] if resto else ''
+            if primera in self.MODIFICADORES:
+                actual['modificador'] = resto
@@ -0,0 +1,280 @@
+"""
+Métricas del chatbot en formato de texto de Prometheus
+Histogramas de latencia por etapa (intención, cada paso del procesador de
+pedidos, Zero-Shot, sentimiento y cada llamada a la BD), contadores y las
+estadísticas que ya exponen las cachés, el pool y el registro de modelos,
+servidas en /metrics junto a la app de Gradio
+"""
+
+import functools
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+
+# Segundos: de medio milisegundo (reglas) a 10 s (Zero-Shot en CPU)
+BUCKETS_LATENCIA = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+
+def _escapar(valor):
+    return str(valor).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _etiquetas(nombres, valores, extra=None):
+    """Bloque {a="x",b="y"} (vacío si no hay etiquetas)"""
+    pares = [f'{n}="{_escapar(v)}"' for n, v in zip(nombres, valores)]
+    if extra:
+        pares.append(extra)
+    return "{" + ",".join(pares) + "}" if pares else ""
+
+
+def _numero(valor):
+    if valor == float("inf"):
+        return "+Inf"
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+class Contador:
+    """Contador monótono con etiquetas"""
+    
+    tipo = "counter"
+    
+    def __init__(self, registro, nombre, ayuda, etiquetas=()):
+        self.registro = registro
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self._valores = {}
+        self._lock = threading.Lock()
+    
+    def incrementar(self, valor=1, **etiquetas):
+        if not self.registro.activo:
+            return
+        clave = tuple(str(etiquetas.get(n, "")) for n in self.etiquetas)
+        with self._lock:
+            self._valores[clave] = self._valores.get(clave, 0) + valor
+    
+    def lineas(self):
+        with self._lock:
+            valores = sorted(self._valores.items())
+        for clave, valor in valores:
+            yield f"{self.nombre}{_etiquetas(self.etiquetas, clave)} {_numero(valor)}"
+
+
+class Histograma:
+    """Histograma acumulado con etiquetas (buckets fijos)"""
+    
+    tipo = "histogram"
+    
+    def __init__(self, registro, nombre, ayuda, etiquetas=(), buckets=BUCKETS_LATENCIA):
+        self.registro = registro
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self.buckets = tuple(sorted(buckets))
+        # clave -> [cuentas por bucket, suma, total]
+        self._series = {}
+        self._lock = threading.Lock()
+    
+    def observar(self, valor, **etiquetas):
+        if not self.registro.activo:
+            return
+        clave = tuple(str(etiquetas.get(n, "")) for n in self.etiquetas)
+        indice = bisect_left(self.buckets, valor)
+        with self._lock:
+            serie = self._series.get(clave)
+            if serie is None:
+                serie = self._series[clave] = [[0] * len(self.buckets), 0.0, 0]
+            if indice < len(self.buckets):
+                serie[0][indice] += 1
+            serie[1] += valor
+            serie[2] += 1
+    
+    @contextmanager
+    def medir(self, **etiquetas):
+        """Observa la duración del bloque en segundos"""
+        if not self.registro.activo:
+            yield
+            return
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observar(time.perf_counter() - inicio, **etiquetas)
+    
+    def lineas(self):
+        with self._lock:
+            series = sorted((c, (list(s[0]), s[1], s[2])) for c, s in self._series.items())
+        for clave, (cuentas, suma, total) in series:
+            acumulado = 0
+            for limite, cuenta in zip(self.buckets, cuentas):
+                acumulado += cuenta
+                etiquetas = _etiquetas(self.etiquetas, clave, f'le="{_numero(limite)}"')
+                yield f"{self.nombre}_bucket{etiquetas} {acumulado}"
+            etiquetas = _etiquetas(self.etiquetas, clave, 'le="+Inf"')
+            yield f"{self.nombre}_bucket{etiquetas} {total}"
+            yield f"{self.nombre}_sum{_etiquetas(self.etiquetas, clave)} {_numero(suma)}"
+            yield f"{self.nombre}_count{_etiquetas(self.etiquetas, clave)} {total}"
+
+
+class RegistroMetricas:
+    """Métricas propias más recolectores que leen estadísticas al exportar"""
+    
+    def __init__(self, activo=True):
+        """
+        Args:
+            activo (bool): Si es False no se anota nada (los recolectores sí se exportan)
+        """
+        self.activo = activo
+        self._metricas = {}
+        self._recolectores = {}
+        self._lock = threading.Lock()
+    
+    def _crear(self, clase, nombre, ayuda, etiquetas, **kwargs):
+        with self._lock:
+            metrica = self._metricas.get(nombre)
+            if metrica is None:
+                metrica = self._metricas[nombre] = clase(self, nombre, ayuda, etiquetas, **kwargs)
+            return metrica
+    
+    def contador(self, nombre, ayuda, etiquetas=()):
+        return self._crear(Contador, nombre, ayuda, etiquetas)
+    
+    def histograma(self, nombre, ayuda, etiquetas=(), buckets=BUCKETS_LATENCIA):
+        return self._crear(Histograma, nombre, ayuda, etiquetas, buckets=buckets)
+    
+    def recolector(self, prefijo, obtener, etiqueta=None):
+        """
+        Exporta como gauges los campos numéricos de un dict de estadísticas
+        
+        Args:
+            prefijo (str): Las métricas se llaman chatbot_<prefijo>_<campo>
+            obtener (callable): Devuelve el dict (p. ej. cache.estadisticas);
+                                con etiqueta, {valor de la etiqueta: dict}
+            etiqueta (str): Nombre de la etiqueta para dicts anidados
+        """
+        with self._lock:
+            self._recolectores[prefijo] = (obtener, etiqueta)
+    
+    def _lineas_recolector(self, prefijo, obtener, etiqueta):
+        try:
+            datos = obtener()
+        except Exception as e:
+            print(f"⚠ Error leyendo estadísticas de {prefijo}: {e}")
+            return
+        if not datos:
+            return
+        
+        series = {}
+        grupos = datos.items() if etiqueta else [(None, datos)]
+        for valor_etiqueta, campos in grupos:
+            for campo, valor in (campos or {}).items():
+                if isinstance(valor, bool):
+                    valor = int(valor)
+                if not isinstance(valor, (int, float)):
+                    continue
+                etiquetas = _etiquetas((etiqueta,), (valor_etiqueta,)) if etiqueta else ""
+                series.setdefault(campo, []).append(f"{etiquetas} {_numero(valor)}")
+        
+        for campo, lineas in series.items():
+            nombre = f"chatbot_{prefijo}_{campo}"
+            yield f"# TYPE {nombre} gauge"
+            for linea in lineas:
+                yield nombre + linea
+    
+    def exponer(self):
+        """
+        Returns:
+            str: Todas las métricas en formato de texto de Prometheus 0.0.4
+        """
+        with self._lock:
+            metricas = list(self._metricas.values())
+            recolectores = list(self._recolectores.items())
+        
+        lineas = []
+        for metrica in metricas:
+            lineas.append(f"# HELP {metrica.nombre} {metrica.ayuda}")
+            lineas.append(f"# TYPE {metrica.nombre} {metrica.tipo}")
+            lineas.extend(metrica.lineas())
+        for prefijo, (obtener, etiqueta) in recolectores:
+            lineas.extend(self._lineas_recolector(prefijo, obtener, etiqueta))
+        return "\n".join(lineas) + "\n"
+
+
+metricas = RegistroMetricas(activo=os.getenv("METRICAS", "1") != "0")
+
+LATENCIA_ETAPA = metricas.histograma(
+    "chatbot_etapa_segundos",
+    "Duración de cada etapa del procesamiento de un mensaje",
+    ("etapa",)
+)
+LATENCIA_DB = metricas.histograma(
+    "chatbot_db_segundos",
+    "Duración de cada función de db_repository",
+    ("funcion",)
+)
+SIN_CONEXION_DB = metricas.contador(
+    "chatbot_db_sin_conexion_total",
+    "Llamadas a la BD que no obtuvieron conexión del pool"
+)
+INTENCIONES = metricas.contador(
+    "chatbot_intenciones_total",
+    "Mensajes por intención predicha por el clasificador entrenado",
+    ("intencion",)
+)
+DECISIONES_INTENCION = metricas.contador(
+    "chatbot_decisiones_intencion_total",
+    "Intención elegida por el enrutador y la vía que la decidió "
+    "(pendiente, ticket, modelo, reglas, modelo_baja_confianza o ninguna)",
+    ("via", "intencion")
+)
+SEGMENTOS = metricas.contador(
+    "chatbot_segmentos_total",
+    "Segmentos de pedido por vía que identificó el producto "
+    "(reglas, zero_shot, difuso o sin_producto)",
+    ("via",)
+)
+SENTIMIENTO = metricas.contador(
+    "chatbot_sentimiento_total",
+    "Análisis de sentimiento resueltos por palabras clave o por el modelo",
+    ("via",)
+)
+
+
+def cronometrar(histograma, **etiquetas):
+    """Decorador que observa en el histograma la duración de cada llamada"""
+    def decorador(funcion):
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            if not metricas.activo:
+                return funcion(*args, **kwargs)
+            inicio = time.perf_counter()
+            try:
+                return funcion(*args, **kwargs)
+            finally:
+                histograma.observar(time.perf_counter() - inicio, **etiquetas)
+        return envoltura
+    return decorador
+
+
+def crear_router_metricas(registro=metricas):
+    """
+    Ruta GET /metrics para Prometheus
+    
+    Returns:
+        APIRouter: Rutas de FastAPI
+    """
+    from fastapi import APIRouter, Response
+    
+    router = APIRouter()
+    
+    @router.get("/metrics")
+    def exportar():
+        return Response(registro.exponer(), media_type="text/plain; version=0.0.4; charset=utf-8")
+    
+    return router
@@ -0,0 +1,211 @@
+"""
+Registro de modelos con carga perezosa
+Cada modelo pesado se carga en su primer uso (o en segundo plano al arrancar)
+y se anota cuánto tardó en cargarse y cuánta memoria ocupa
+"""
+
+import os
+import threading
+import time
+
+from profiling import perfilador
+
+
+def _memoria_residente_mb():
+    """Memoria residente actual del proceso en MB (0.0 si no se puede medir)"""
+    try:
+        with open("/proc/self/statm") as f:
+            paginas = int(f.read().split()[1])
+        return paginas * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    
+    try:
+        import resource
+        # ru_maxrss está en KB en Linux (pico, no actual, pero sirve de referencia)
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    except (ImportError, OSError):
+        return 0.0
+
+
+class ModelRegistry:
+    """Carga y mantiene los modelos del chatbot bajo demanda"""
+    
+    # Espera tras una carga fallida antes de reintentarla en segundo plano
+    # (se duplica con cada fallo seguido hasta el máximo)
+    REINTENTO_INICIAL = 30.0
+    REINTENTO_MAXIMO = 600.0
+    
+    def __init__(self):
+        """Inicializa el registro vacío"""
+        self._fabricas = {}
+        self._modelos = {}
+        self._estadisticas = {}
+        self._locks = {}
+        self._hilos = {}
+        # nombre -> (fallos seguidos, momento a partir del cual se reintenta)
+        self._fallos = {}
+        self._lock = threading.Lock()
+        # Cargas en curso y empezadas: la memoria de una carga solapada es aproximada
+        self._cargas_activas = 0
+        self._cargas_iniciadas = 0
+    
+    def registrar(self, nombre, fabrica):
+        """
+        Registra la función que construye un modelo
+        
+        Args:
+            nombre (str): Identificador del modelo (p. ej. "zero_shot")
+            fabrica (callable): Función sin argumentos que devuelve el modelo
+        """
+        with self._lock:
+            self._fabricas[nombre] = fabrica
+            self._locks.setdefault(nombre, threading.Lock())
+            self._modelos.pop(nombre, None)
+            self._estadisticas.pop(nombre, None)
+            self._fallos.pop(nombre, None)
+    
+    def obtener(self, nombre):
+        """
+        Devuelve el modelo, cargándolo ahora si todavía no lo está.
+        Si hay una precarga en curso, espera a que termine.
+        
+        Returns:
+            object: Modelo cargado (o None si la fábrica no pudo crearlo)
+        """
+        if nombre in self._modelos:
+            return self._modelos[nombre]
+        
+        with self._locks[nombre]:
+            if nombre not in self._modelos:
+                self._cargar(nombre)
+        
+        return self._modelos.get(nombre)
+    
+    def obtener_si_listo(self, nombre):
+        """
+        Devuelve el modelo solo si ya está cargado; en caso contrario
+        lanza su carga en segundo plano y devuelve None sin bloquear.
+        Tras una carga fallida no se reintenta hasta que pase la espera,
+        para no relanzar la fábrica con cada mensaje
+        
+        Returns:
+            object: Modelo cargado o None
+        """
+        if nombre in self._modelos:
+            return self._modelos[nombre]
+        
+        fallo = self._fallos.get(nombre)
+        if fallo is not None and time.monotonic() < fallo[1]:
+            return None
+        
+        self.precargar([nombre])
+        return None
+    
+    def esta_cargado(self, nombre):
+        """Verifica si el modelo ya está en memoria"""
+        return nombre in self._modelos
+    
+    def precargar(self, nombres):
+        """
+        Carga los modelos indicados en hilos en segundo plano
+        
+        Args:
+            nombres (list|str): Nombres de modelos o cadena separada por comas
+        """
+        if isinstance(nombres, str):
+            nombres = [n.strip() for n in nombres.split(",") if n.strip()]
+        
+        for nombre in nombres:
+            if nombre not in self._fabricas:
+                print(f"⚠ Modelo desconocido para precarga: {nombre}")
+                continue
+            
+            with self._lock:
+                hilo = self._hilos.get(nombre)
+                if nombre in self._modelos or (hilo and hilo.is_alive()):
+                    continue
+                
+                hilo = threading.Thread(
+                    target=self._precargar_uno,
+                    args=(nombre,),
+                    name=f"precarga-{nombre}",
+                    daemon=True
+                )
+                self._hilos[nombre] = hilo
+                hilo.start()
+    
+    def estadisticas(self):
+        """
+        Devuelve el estado de cada modelo registrado
+        
+        Returns:
+            dict: {nombre: {cargado, segundos_carga, memoria_mb,
+                   memoria_aproximada, error, fallos_seguidos}}
+        """
+        return {
+            nombre: dict(
+                self._estadisticas.get(nombre, {}),
+                cargado=nombre in self._modelos,
+                fallos_seguidos=self._fallos.get(nombre, (0, 0.0))[0]
+            )
+            for nombre in self._fabricas
+        }
+    
+    def _precargar_uno(self, nombre):
+        """Punto de entrada de los hilos de precarga"""
+        try:
+            self.obtener(nombre)
+        except Exception as e:
+            print(f"⚠ Error precargando modelo '{nombre}': {e}")
+    
+    def _cargar(self, nombre):
+        """
+        Ejecuta la fábrica del modelo y registra tiempo y memoria
+        
+        La memoria es la diferencia de RSS del proceso durante la carga: si
+        otra carga se solapó con ella (precarga en paralelo) incluye también
+        lo de la otra y se marca como aproximada
+        """
+        with self._lock:
+            self._cargas_activas += 1
+            self._cargas_iniciadas += 1
+            iniciadas = self._cargas_iniciadas
+            solapada = self._cargas_activas > 1
+        memoria_antes = _memoria_residente_mb()
+        inicio = time.perf_counter()
+        
+        try:
+            with perfilador.memoria_carga(nombre):
+                modelo = self._fabricas[nombre]()
+        except Exception as e:
+            self._estadisticas[nombre] = {"error": str(e)}
+            fallos = self._fallos.get(nombre, (0, 0.0))[0] + 1
+            espera = min(self.REINTENTO_INICIAL * 2 ** (fallos - 1), self.REINTENTO_MAXIMO)
+            self._fallos[nombre] = (fallos, time.monotonic() + espera)
+            print(f"⚠ No se pudo cargar el modelo '{nombre}'; se reintentará en {espera:.0f}s")
+            raise
+        finally:
+            with self._lock:
+                self._cargas_activas -= 1
+                solapada = (solapada or self._cargas_activas > 0
+                            or self._cargas_iniciadas != iniciadas)
+        
+        segundos = time.perf_counter() - inicio
+        memoria = max(_memoria_residente_mb() - memoria_antes, 0.0)
+        
+        self._estadisticas[nombre] = {
+            "segundos_carga": round(segundos, 3),
+            "memoria_mb": round(memoria, 1),
+            "memoria_aproximada": solapada,
+            "error": None
+        }
+        self._modelos[nombre] = modelo
+        self._fallos.pop(nombre, None)
+        
+        aproximada = "~" if solapada else ""
+        print(f"✓ Modelo '{nombre}' cargado en {segundos:.1f}s (+{aproximada}{memoria:.0f} MB)")
+
+
+# Registro compartido por todo el proceso
+registro_modelos = ModelRegistry()
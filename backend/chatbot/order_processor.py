@@ -3,25 +3,83 @@ Procesador de pedidos usando IA
 Extrae productos, cantidades y notas desde texto natural
 """
 
+import os
 import re
-import difflib
-from transformers import pipeline
+import json
+import hashlib
+import threading
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from pathlib import Path
+
+from batch_scheduler import crear_planificador
+from fuzzy_index import FuzzyIndex
+from inference_cache import LRUCache
+from menu_index import MenuIndex
+from metrics import LATENCIA_ETAPA, SEGMENTOS, cronometrar
+from model_registry import registro_modelos
+from phrase_replacer import PhraseReplacer
+
+
+MODELO_ZERO_SHOT = "facebook/bart-large-mnli"
+
+SINONIMOS_AMPLIADOS_PATH = Path(__file__).parent / "training_data" / "sinonimos_ampliados.json"
+
+
+def _crear_clasificador_zero_shot():
+    """Construye el pipeline Zero-Shot (importa transformers solo al cargarlo)"""
+    from inference_backend import crear_pipeline
+    
+    return crear_pipeline("zero-shot-classification", MODELO_ZERO_SHOT)
+
+
+registro_modelos.registrar("zero_shot", _crear_clasificador_zero_shot)
+
+
+class _MenuCompilado:
+    """
+    Todo lo que se deriva del menú y de los diccionarios. No se modifica una
+    vez publicado: una actualización construye otro y lo sustituye entero
+    """
+    
+    def __init__(self, productos, version, normalizador, relleno,
+                 indice_menu, indice_difuso, motor_embeddings):
+        self.productos = productos
+        self.version = version
+        self.normalizador = normalizador
+        self.relleno = relleno
+        self.indice_menu = indice_menu
+        self.indice_difuso = indice_difuso
+        self.motor_embeddings = motor_embeddings
 
 
 class OrderProcessor:
     """Procesa y extrae pedidos desde lenguaje natural"""
     
-    def __init__(self, menu_productos):
+    # Confianza mínima del modelo para aceptar un producto
+    UMBRAL_MODELO = 0.6
+    
+    # Búsqueda difusa: letras mínimas de un término de una palabra con erratas
+    # y similitud mínima en el último recurso (el cutoff del antiguo difflib)
+    MIN_LETRAS_DIFUSO = 6
+    SIMILITUD_DIFUSA = 0.7
+    
+    def __init__(self, menu_productos, tamano_lote=None, motor=None):
         """
         Inicializa el procesador con el menú disponible
         
         Args:
             menu_productos (list): Lista de productos disponibles
+            tamano_lote (int): Segmentos por pasada del modelo Zero-Shot
+                               (por defecto ZERO_SHOT_BATCH_SIZE o 8)
+            motor (str): "zero_shot" o "embeddings"
+                         (por defecto MOTOR_IDENTIFICACION o "zero_shot")
         """
-        self.menu_productos = menu_productos
-        self.classifier = pipeline(
-            "zero-shot-classification", 
-            model="facebook/bart-large-mnli"
+        self.tamano_lote = tamano_lote or int(os.getenv("ZERO_SHOT_BATCH_SIZE", "8"))
+        
+        # Caché de resultados del modelo por (segmento, versión del menú)
+        self.cache_modelo = LRUCache(
+            max_entradas=int(os.getenv("CACHE_ZERO_SHOT_MAX", "2048")),
+            ttl=float(os.getenv("CACHE_ZERO_SHOT_TTL", "0"))
         )
         
         # Mapeo de números en texto a dígitos
@@ -80,11 +138,215 @@ class OrderProcessor:
         
         # Productos que NO deben matchear solos (son parte de otros)
         self.palabras_ignorar = ["cola", "colas", "dog", "hot", "caliente", "calientes"]
+        
+        # Palabras de relleno que no forman parte de las notas
+        self.palabras_relleno = [
+            "quiero", "ponme", "dame", "me das", "por favor", "porfavor",
+            "quisiera", "necesito", "pedido", "pedir"
+        ]
+        
+        # Sinónimos generados desde el dataset (solo para la búsqueda difusa)
+        self.sinonimos_ampliados = self._cargar_sinonimos_ampliados()
+        
+        # Motor de identificación para los segmentos que no resuelven las reglas
+        self.motor = (motor or os.getenv("MOTOR_IDENTIFICACION", "zero_shot")).lower()
+        if self.motor == "embeddings":
+            self.umbral_modelo = float(os.getenv("UMBRAL_EMBEDDINGS", str(self.UMBRAL_MODELO)))
+        else:
+            self.motor = "zero_shot"
+            self.umbral_modelo = self.UMBRAL_MODELO
+        
+        # Los mensajes leen self._menu una vez y trabajan con esa versión;
+        # las actualizaciones (p. ej. el hilo de la caché del menú) se
+        # serializan con el lock y publican un menú nuevo con una asignación
+        self._lock_actualizacion = threading.Lock()
+        self._menu = None
+        self._publicar_menu(self._compilar_menu(list(menu_productos)))
+        
+        # Opcional: juntar en un lote los segmentos de sesiones concurrentes
+        self._planificador = crear_planificador(self._clasificar_lote, "lote-pedidos")
+    
+    @property
+    def menu_productos(self):
+        """Productos del menú vigente"""
+        return self._menu.productos
+    
+    @property
+    def version_menu(self):
+        """Versión de las etiquetas del modelo en el menú vigente"""
+        return self._menu.version
+    
+    @property
+    def classifier(self):
+        """
+        Clasificador del motor configurado si ya está cargado; mientras se
+        carga en segundo plano devuelve None y se usan solo las reglas
+        """
+        return self._clasificador(self._menu)
+    
+    def _clasificador(self, menu):
+        """Clasificador del motor para un menú compilado concreto (o None)"""
+        if menu.motor_embeddings is not None:
+            if registro_modelos.obtener_si_listo("embeddings") is None:
+                return None
+            return menu.motor_embeddings
+        
+        return registro_modelos.obtener_si_listo("zero_shot")
     
     def actualizar_menu(self, nuevos_productos):
         """Actualiza la lista de productos disponibles"""
-        self.menu_productos = nuevos_productos
+        with self._lock_actualizacion:
+            self._publicar_menu(self._compilar_menu(list(nuevos_productos)))
+    
+    def _compilar_menu(self, productos):
+        """
+        Construye todo lo que depende del menú y de los diccionarios
+        (normalizador, índices y motor de embeddings) sin tocar el vigente
+        
+        Args:
+            productos (list): Lista de productos disponibles
+        
+        Returns:
+            _MenuCompilado: Menú listo para publicar
+        """
+        # Los embeddings codifican también los sinónimos como etiquetas
+        sinonimos_modelo = self.sinonimos if self.motor == "embeddings" else None
+        version = self._calcular_version_menu(productos, sinonimos_modelo)
+        
+        motor_embeddings = None
+        if self.motor == "embeddings":
+            anterior = self._menu
+            if anterior is not None and anterior.version == version:
+                # Mismas etiquetas: se conservan los vectores ya calculados
+                motor_embeddings = anterior.motor_embeddings
+            else:
+                from embedding_matcher import EmbeddingMatcher
+                
+                motor_embeddings = EmbeddingMatcher(productos, self.sinonimos)
+        
+        normalizador, relleno = self._compilar_normalizador(productos)
+        return _MenuCompilado(
+            productos=productos,
+            version=version,
+            normalizador=normalizador,
+            relleno=relleno,
+            indice_menu=MenuIndex(productos),
+            indice_difuso=self._construir_indice_difuso(productos),
+            motor_embeddings=motor_embeddings
+        )
+    
+    def _publicar_menu(self, menu):
+        """Sustituye el menú vigente; si cambian las etiquetas, la caché del modelo ya no sirve"""
+        if self._menu is not None and menu.version != self._menu.version:
+            self.cache_modelo.limpiar()
+        self._menu = menu
+    
+    @staticmethod
+    def _calcular_version_menu(productos, sinonimos=None):
+        """Huella del conjunto de etiquetas del menú (y de los sinónimos, si se dan)"""
+        contenido = "\n".join(sorted(p.lower() for p in productos))
+        if sinonimos:
+            contenido += "\n\n" + "\n".join(sorted(f"{v}\t{p}" for v, p in sinonimos.items()))
+        return hashlib.sha1(contenido.encode("utf-8")).hexdigest()[:12]
+    
+    def precalentar_cache(self, textos):
+        """
+        Pasa por el modelo los segmentos de textos históricos que las reglas
+        no resuelven, para que lleguen ya resueltos a la caché
+        
+        Args:
+            textos (list): Frases o valores históricos (producto, nota)
+        
+        Returns:
+            int: Número de segmentos enviados al modelo
+        """
+        menu = self._menu
+        if not menu.productos:
+            return 0
+        
+        segmentos = []
+        for texto in textos:
+            if not texto:
+                continue
+            for segmento in self._segmentar_inteligente(self._normalizar_texto(texto, menu), menu):
+                _, requiere_modelo = self._identificar_por_reglas(segmento, menu)
+                if requiere_modelo:
+                    segmentos.append(segmento)
+        
+        segmentos = list(dict.fromkeys(segmentos))
+        if segmentos:
+            # Esperar al modelo: el precalentado corre fuera del camino caliente
+            registro_modelos.obtener(self.motor)
+            self._identificar_con_modelo(segmentos, menu)
+        
+        return len(segmentos)
+    
+    def actualizar_diccionarios(self, sinonimos=None, mapa_numeros=None, palabras_relleno=None):
+        """
+        Reemplaza los diccionarios de normalización y recompila los patrones
+        
+        Args:
+            sinonimos (dict): Variación -> producto normalizado
+            mapa_numeros (dict): Número en texto -> dígito
+            palabras_relleno (list): Palabras a eliminar de las notas
+        """
+        with self._lock_actualizacion:
+            if sinonimos is not None:
+                self.sinonimos = sinonimos
+            if mapa_numeros is not None:
+                self.mapa_numeros = mapa_numeros
+            if palabras_relleno is not None:
+                self.palabras_relleno = palabras_relleno
+            
+            self._publicar_menu(self._compilar_menu(self._menu.productos))
+    
+    def _compilar_normalizador(self, productos):
+        """
+        Compila números, sinónimos y palabras de relleno en tries de tokens,
+        de forma que cada mensaje se normalice con una sola pasada cuyo coste
+        no depende del tamaño de los diccionarios
+        
+        Returns:
+            tuple: (normalizador, relleno)
+        """
+        # Los nombres del menú se dejan como están: al ganar la frase más
+        # larga, un sinónimo más corto no reescribe un producto ya correcto
+        # ("coca" en "coca cola")
+        reemplazos = dict.fromkeys((p.lower() for p in productos), None)
+        reemplazos.update(self.sinonimos)
+        reemplazos.update(self.mapa_numeros)
+        
+        return (
+            PhraseReplacer(reemplazos),
+            PhraseReplacer(self.palabras_relleno, ignorar_mayusculas=True)
+        )
+    
+    @staticmethod
+    def _cargar_sinonimos_ampliados():
+        """Carga sinonimos_ampliados.json si existe"""
+        if not SINONIMOS_AMPLIADOS_PATH.exists():
+            return {}
+        
+        try:
+            with open(SINONIMOS_AMPLIADOS_PATH, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠ Error cargando sinónimos ampliados: {e}")
+            return {}
+    
+    def _construir_indice_difuso(self, productos):
+        """Índice difuso sobre nombres del menú y sinónimos que apuntan a ellos"""
+        menu = {p.lower(): p for p in productos}
+        terminos = dict(menu)
+        
+        for origen in (self.sinonimos_ampliados, self.sinonimos):
+            for variacion, producto in origen.items():
+                if producto.lower() in menu and variacion not in self.palabras_ignorar:
+                    terminos[variacion] = menu[producto.lower()]
+        
+        return FuzzyIndex(terminos)
     
+    @cronometrar(LATENCIA_ETAPA, etapa="extraer_pedidos")
     def extraer_pedidos(self, frase_usuario):
         """
         Extrae múltiples pedidos de una frase
@@ -95,21 +357,40 @@ class OrderProcessor:
         Returns:
             list: Lista de diccionarios con {producto, cantidad, nota}
         """
-        if not self.menu_productos:
+        # Todo el mensaje se procesa con el mismo menú aunque se actualice a la vez
+        menu = self._menu
+        if not menu.productos:
             return []
         
         # Normalizar texto
-        texto = self._normalizar_texto(frase_usuario)
+        texto = self._normalizar_texto(frase_usuario, menu)
         
         # Segmentar inteligentemente (respetando modificadores)
-        segmentos = self._segmentar_inteligente(texto)
+        segmentos = self._segmentar_inteligente(texto, menu)
+        
+        # Identificar productos: primero reglas, y los segmentos dudosos
+        # se resuelven juntos con una única llamada al modelo
+        productos = []
+        pendientes = []
+        for i, segmento in enumerate(segmentos):
+            producto, requiere_modelo = self._identificar_por_reglas(segmento, menu)
+            productos.append(producto)
+            if requiere_modelo:
+                pendientes.append(i)
+            else:
+                SEGMENTOS.incrementar(via="reglas" if producto else "sin_producto")
+        
+        if pendientes:
+            resueltos = self._identificar_con_modelo([segmentos[i] for i in pendientes], menu)
+            for i, producto in zip(pendientes, resueltos):
+                productos[i] = producto
         
         # Procesar cada segmento
         lista_pedidos = []
         productos_detectados = set()  # Para evitar duplicados
         
-        for segmento in segmentos:
-            pedido = self._procesar_segmento(segmento)
+        for segmento, producto in zip(segmentos, productos):
+            pedido = self._procesar_segmento(segmento, producto, menu)
             if pedido:
                 producto_key = pedido['producto'].lower()
                 
@@ -128,36 +409,23 @@ class OrderProcessor:
         
         return lista_pedidos
     
-    def _normalizar_texto(self, texto):
+    @cronometrar(LATENCIA_ETAPA, etapa="normalizar_texto")
+    def _normalizar_texto(self, texto, menu=None):
         """Normaliza el texto: minúsculas, números y sinónimos"""
-        texto = texto.lower()
-        
-        # Reemplazar números en texto
-        for palabra, numero in self.mapa_numeros.items():
-            texto = re.sub(rf'\b{palabra}\b', numero, texto)
-        
-        # Aplicar sinónimos para normalizar variaciones
-        for variacion, producto in self.sinonimos.items():
-            texto = re.sub(rf'\b{re.escape(variacion)}\b', producto, texto)
-        
-        return texto
+        menu = menu or self._menu
+        # Reemplazar números y sinónimos en una sola pasada
+        return menu.normalizador.reemplazar(texto.lower())
     
-    def _segmentar_inteligente(self, texto):
+    @cronometrar(LATENCIA_ETAPA, etapa="segmentar")
+    def _segmentar_inteligente(self, texto, menu=None):
         """
         Divide el texto en segmentos de pedidos individuales,
         manteniendo los modificadores junto con su producto
         """
-        # Primero buscar productos en el texto
-        productos_encontrados = []
-        for producto in self.menu_productos:
-            patron = rf'(\d+\s*)?{re.escape(producto)}(\s+(?:con|sin|extra|mucho|poco)[^,y]*)?'
-            for match in re.finditer(patron, texto, re.IGNORECASE):
-                productos_encontrados.append({
-                    'producto': producto,
-                    'texto': match.group(0),
-                    'inicio': match.start(),
-                    'fin': match.end()
-                })
+        menu = menu or self._menu
+        
+        # Localizar todos los productos con el índice del menú (una pasada)
+        productos_encontrados = menu.indice_menu.buscar(texto)
         
         # Si no encontramos productos directamente, dividir por separadores
         if not productos_encontrados:
@@ -165,32 +433,16 @@ class OrderProcessor:
             partes = re.split(r'\s+y\s+(?!(?:con|sin|extra|mucho|poco))|,\s*(?!(?:con|sin|extra|mucho|poco))', texto)
             return [p.strip() for p in partes if p.strip()]
         
-        # Ordenar por posición
-        productos_encontrados.sort(key=lambda x: x['inicio'])
-        
-        # Extraer segmentos con contexto
+        # Extraer segmentos con contexto: desde la cantidad previa hasta
+        # el separador anterior al siguiente producto
         segmentos = []
         ultimo_fin = 0
         
         for i, prod in enumerate(productos_encontrados):
-            # Buscar cantidad antes del producto
-            texto_antes = texto[ultimo_fin:prod['inicio']]
-            cantidad_match = re.search(r'(\d+)\s*$', texto_antes)
+            inicio = max(prod['inicio_cantidad'], ultimo_fin)
             
-            if cantidad_match:
-                inicio = ultimo_fin + cantidad_match.start()
-            else:
-                inicio = prod['inicio']
-            
-            # Buscar modificadores después
             if i < len(productos_encontrados) - 1:
-                texto_despues = texto[prod['fin']:productos_encontrados[i+1]['inicio']]
-                # Buscar separador
-                sep_match = re.search(r'\s+y\s+|\s*,\s*', texto_despues)
-                if sep_match:
-                    fin = prod['fin'] + sep_match.start()
-                else:
-                    fin = prod['fin']
+                fin = prod['fin_contexto']
             else:
                 fin = len(texto)
             
@@ -202,23 +454,26 @@ class OrderProcessor:
         
         return segmentos if segmentos else [texto]
     
-    def _procesar_segmento(self, segmento):
+    def _procesar_segmento(self, segmento, producto, menu=None):
         """
         Procesa un segmento individual de pedido
         
+        Args:
+            segmento (str): Texto del segmento
+            producto (str): Producto ya identificado (o None)
+            menu (_MenuCompilado): Menú con el que se procesa el mensaje
+        
         Returns:
             dict: {producto, cantidad, nota} o None
         """
-        # Extraer cantidad
-        cantidad = self._extraer_cantidad(segmento)
-        
-        # Identificar producto
-        producto = self._identificar_producto(segmento)
         if not producto:
             return None
         
+        # Extraer cantidad
+        cantidad = self._extraer_cantidad(segmento)
+        
         # Extraer notas adicionales
-        nota = self._extraer_notas(segmento, producto, cantidad)
+        nota = self._extraer_notas(segmento, producto, cantidad, menu)
         
         return {
             "producto": producto.capitalize(),
@@ -239,42 +494,144 @@ class OrderProcessor:
         Returns:
             str: Nombre del producto o None
         """
+        menu = self._menu
+        producto, requiere_modelo = self._identificar_por_reglas(segmento, menu)
+        if requiere_modelo:
+            return self._identificar_con_modelo([segmento], menu)[0]
+        return producto
+    
+    @cronometrar(LATENCIA_ETAPA, etapa="identificar_reglas")
+    def _identificar_por_reglas(self, segmento, menu=None):
+        """
+        Intenta identificar el producto sin usar el modelo
+        
+        Returns:
+            tuple: (producto o None, True si hace falta el modelo)
+        """
+        menu = menu or self._menu
         segmento_lower = segmento.lower().strip()
         
         # Si el segmento es solo una palabra ignorada, no es producto
         if segmento_lower in self.palabras_ignorar:
-            return None
+            return None, False
         
-        # Primero, búsqueda directa en el texto (prioridad a productos más largos)
-        for producto in sorted(self.menu_productos, key=len, reverse=True):
-            if producto in segmento_lower:
-                return producto
+        # Primero, búsqueda directa con el índice (prioridad a productos más largos)
+        producto = menu.indice_menu.producto_mas_largo(segmento_lower)
+        if producto:
+            return producto, False
         
         # Verificar si es una palabra que debe ignorarse
         palabras_segmento = segmento_lower.split()
         if len(palabras_segmento) == 1 and palabras_segmento[0] in self.palabras_ignorar:
-            return None
+            return None, False
+        
+        # Filtro barato de erratas (una letra) antes de recurrir al modelo: solo
+        # nombres de varias palabras o largos, las palabras cortas comunes
+        # ("cosa", "pasa") quedan a una letra de algún producto
+        coincidencia = menu.indice_difuso.buscar_en_frase(
+            segmento_lower, max_distancia=1, min_letras=self.MIN_LETRAS_DIFUSO
+        )
+        if coincidencia:
+            return coincidencia[0], False
+        
+        return None, True
+    
+    @cronometrar(LATENCIA_ETAPA, etapa="identificar_modelo")
+    def _identificar_con_modelo(self, segmentos, menu=None):
+        """
+        Resuelve varios segmentos con una sola llamada en lote al
+        clasificador Zero-Shot y búsqueda difusa como último recurso
+        
+        Args:
+            segmentos (list): Segmentos que las reglas no resolvieron
+            menu (_MenuCompilado): Menú con el que se procesa el mensaje
+        
+        Returns:
+            list: Producto (o None) para cada segmento, en el mismo orden
+        """
+        menu = menu or self._menu
+        productos = [None] * len(segmentos)
         
         # Intentar con clasificador de IA solo si el segmento tiene contenido significativo
-        if len(segmento_lower) > 2:
-            resultado = self.classifier(segmento, candidate_labels=self.menu_productos)
+        clasificador = self._clasificador(menu)
+        indices = [i for i, s in enumerate(segmentos) if len(s.strip()) > 2]
+        
+        if clasificador is not None and indices:
+            # Consultar la caché; solo los fallos van al modelo
+            claves = {i: self._clave_cache(segmentos[i], menu) for i in indices}
+            resultados = {i: self.cache_modelo.obtener(claves[i]) for i in indices}
+            fallos = [i for i in indices if resultados[i] is None]
             
-            # Umbral alto para mayor precisión
-            if resultado['scores'][0] > 0.6:
-                return resultado['labels'][0]
-        
-        # Fallback: búsqueda difusa con umbral alto
-        matches = difflib.get_close_matches(
-            segmento_lower, 
-            self.menu_productos, 
-            n=1, 
-            cutoff=0.7
-        )
+            if fallos:
+                textos = [segmentos[i] for i in fallos]
+                with LATENCIA_ETAPA.medir(etapa="zero_shot"):
+                    if self._planificador is not None:
+                        try:
+                            # El lote se clasifica con este mismo menú, aunque cambie entretanto
+                            salidas = self._planificador(textos, menu=menu)
+                        except FuturesTimeoutError:
+                            # Modelo atascado: estos segmentos pasan a la búsqueda difusa
+                            print(f"⚠ El lote del modelo superó {self._planificador.timeout}s")
+                            salidas = []
+                    else:
+                        salidas = clasificador(
+                            textos,
+                            candidate_labels=menu.productos,
+                            batch_size=self.tamano_lote
+                        )
+                if isinstance(salidas, dict):
+                    salidas = [salidas]
+                
+                for i, salida in zip(fallos, salidas):
+                    resultados[i] = (salida['labels'][0], salida['scores'][0])
+                    self.cache_modelo.guardar(claves[i], resultados[i])
+            
+            for i in indices:
+                if resultados[i] is None:
+                    continue
+                etiqueta, puntuacion = resultados[i]
+                # Umbral alto para mayor precisión
+                if puntuacion > self.umbral_modelo:
+                    productos[i] = etiqueta
+                    SEGMENTOS.incrementar(via="zero_shot")
+        
+        # Fallback: búsqueda difusa con el índice precalculado
+        for i, segmento in enumerate(segmentos):
+            if productos[i] is None:
+                coincidencia = menu.indice_difuso.buscar_en_frase(
+                    segmento,
+                    min_letras=self.MIN_LETRAS_DIFUSO,
+                    min_similitud=self.SIMILITUD_DIFUSA,
+                    exenta_frase=True
+                )
+                productos[i] = coincidencia[0] if coincidencia else None
+                SEGMENTOS.incrementar(via="difuso" if coincidencia else "sin_producto")
+        
+        return productos
+    
+    def _clasificar_lote(self, textos, menu):
+        """
+        Llamada en lote del planificador (textos de varias sesiones)
         
-        return matches[0] if matches else None
+        Args:
+            textos (list): Segmentos encolados con el mismo menú
+            menu (_MenuCompilado): Menú con el que se encolaron
+        """
+        return self._clasificador(menu)(
+            textos,
+            candidate_labels=menu.productos,
+            batch_size=self.tamano_lote
+        )
+    
+    def _clave_cache(self, segmento, menu):
+        """Clave de caché: segmento normalizado + versión de las etiquetas"""
+        return (" ".join(segmento.lower().split()), menu.version)
     
-    def _extraer_notas(self, segmento, producto, cantidad):
+    @cronometrar(LATENCIA_ETAPA, etapa="extraer_notas")
+    def _extraer_notas(self, segmento, producto, cantidad, menu=None):
         """Extrae notas especiales del pedido"""
+        menu = menu or self._menu
+        
         # Encontrar la posición del producto en el segmento
         segmento_lower = segmento.lower()
         producto_pos = segmento_lower.find(producto.lower())
@@ -289,13 +646,7 @@ class OrderProcessor:
         nota = re.sub(r'^\d+\s*', '', nota)
         
         # Limpiar palabras comunes al inicio y fin
-        palabras_a_remover = [
-            "quiero", "ponme", "dame", "me das", "por favor", "porfavor",
-            "quisiera", "necesito", "pedido", "pedir"
-        ]
-        
-        for palabra in palabras_a_remover:
-            nota = re.sub(rf'\b{palabra}\b', '', nota, flags=re.IGNORECASE)
+        nota = menu.relleno.reemplazar(nota)
         
         # Limpiar artículos y preposiciones sueltos
         nota = re.sub(r'^(de|el|la|los|las|un|una|unos|unas)\s+', '', nota.strip())
@@ -0,0 +1,97 @@
+"""
+Sustitución de palabras y frases completas
+Trie de tokens con coincidencia de la frase más larga en una sola pasada:
+el coste por mensaje depende de su longitud, no del número de frases
+"""
+
+import re
+
+
+class PhraseReplacer:
+    """Reemplaza frases completas del texto por su valor (la más larga gana)"""
+    
+    # Marca de fin de frase dentro del trie
+    _FIN = None
+    
+    TOKEN = re.compile(r'\w+')
+    
+    def __init__(self, reemplazos, ignorar_mayusculas=False):
+        """
+        Construye el trie a partir de las frases
+        
+        Args:
+            reemplazos (dict|list): Frase -> texto que la sustituye (None la deja
+                                    como está); con una lista, las frases se borran
+            ignorar_mayusculas (bool): Comparar sin distinguir mayúsculas
+        """
+        if not isinstance(reemplazos, dict):
+            reemplazos = dict.fromkeys(reemplazos, "")
+        
+        self.ignorar_mayusculas = ignorar_mayusculas
+        self.trie = {}
+        
+        for frase, valor in reemplazos.items():
+            clave = frase.lower() if ignorar_mayusculas else frase
+            tokens = self.TOKEN.findall(clave)
+            if not tokens:
+                continue
+            
+            nodo = self.trie
+            for token in tokens:
+                nodo = nodo.setdefault(token, {})
+            # Varias frases pueden compartir tokens con distinta separación ("coca-cola")
+            nodo.setdefault(self._FIN, {})[clave] = valor
+    
+    def reemplazar(self, texto):
+        """
+        Recorre el texto una vez sustituyendo cada frase encontrada
+        
+        Args:
+            texto (str): Texto original
+        
+        Returns:
+            str: Texto con las frases sustituidas
+        """
+        tokens = list(self.TOKEN.finditer(texto))
+        partes = []
+        copiado = 0
+        
+        i = 0
+        while i < len(tokens):
+            valor, ultimo = self._coincidencia_mas_larga(texto, tokens, i)
+            
+            if ultimo is None:
+                i += 1
+                continue
+            
+            if valor is not None:
+                partes.append(texto[copiado:tokens[i].start()])
+                partes.append(valor)
+                copiado = tokens[ultimo].end()
+            i = ultimo + 1
+        
+        if not partes:
+            return texto
+        partes.append(texto[copiado:])
+        return "".join(partes)
+    
+    def _coincidencia_mas_larga(self, texto, tokens, inicio):
+        """Avanza por el trie desde un token y devuelve (valor, último token) o (None, None)"""
+        nodo = self.trie
+        valor, ultimo = None, None
+        
+        for j in range(inicio, len(tokens)):
+            token = tokens[j].group(0)
+            nodo = nodo.get(token.lower() if self.ignorar_mayusculas else token)
+            if nodo is None:
+                break
+            
+            frases = nodo.get(self._FIN)
+            if frases:
+                frase = texto[tokens[inicio].start():tokens[j].end()]
+                if self.ignorar_mayusculas:
+                    frase = frase.lower()
+                if frase in frases:
+                    valor, ultimo = frases[frase], j
+        
+        return valor, ultimo
@@ -0,0 +1,297 @@
+"""
+Perfilado bajo demanda de un worker en producción
+Un hilo muestrea con sys._current_frames() las pilas de los hilos que están
+dentro de procesar_mensaje durante una ventana de tiempo y guarda las pilas
+colapsadas (formato de flamegraph.pl / speedscope). Opcionalmente toma
+instantáneas de tracemalloc de la ventana y de cada carga de modelo y guarda
+los puntos que más memoria reservan. Desactivado solo cuesta comprobar un
+atributo por mensaje
+"""
+
+import functools
+import hmac
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+
+
+# Funciones a partir de las cuales se guarda la pila (lo de encima es el executor)
+RAICES = ("procesar_mensaje", "_responder_en_sesion")
+
+
+class Perfilador:
+    """Perfilador de muestreo por ventanas y capturas de memoria"""
+    
+    def __init__(self, directorio, intervalo=0.005, top_memoria=25, memoria_modelos=False):
+        """
+        Args:
+            directorio (str): Carpeta donde se escriben los perfiles
+            intervalo (float): Segundos entre muestras
+            top_memoria (int): Líneas de código con más memoria que se guardan
+            memoria_modelos (bool): Capturar tracemalloc en cada carga de modelo
+        """
+        self.directorio = Path(directorio)
+        self.intervalo = intervalo
+        self.top_memoria = top_memoria
+        self.memoria_modelos = memoria_modelos
+        
+        self.activo = False
+        self._hilos = {}
+        self._pilas = {}
+        self._etiquetas = {}
+        self._lock = threading.Lock()
+        self._ultimo = None
+        
+        # Varias cargas de modelo pueden solaparse: tracemalloc se para con la última
+        self._usos_tracemalloc = 0
+        self._tracemalloc_propio = False
+    
+    def iniciar(self, segundos=30.0, memoria=False):
+        """
+        Empieza una ventana de perfilado en segundo plano
+        
+        Args:
+            segundos (float): Duración de la ventana
+            memoria (bool): Comparar también instantáneas de tracemalloc
+        
+        Returns:
+            dict: Estado del perfilador
+        
+        Raises:
+            RuntimeError: Si ya hay una ventana en curso
+        """
+        with self._lock:
+            if self.activo:
+                raise RuntimeError("Ya hay un perfil en curso")
+            self.activo = True
+            self._pilas = {}
+        
+        threading.Thread(
+            target=self._muestrear,
+            args=(float(segundos), memoria),
+            name="perfilador",
+            daemon=True
+        ).start()
+        print(f"→ Perfilando procesar_mensaje durante {segundos:.0f}s")
+        return self.estado()
+    
+    def entrar(self):
+        """Marca el hilo actual como dentro de un mensaje"""
+        ident = threading.get_ident()
+        self._hilos[ident] = self._hilos.get(ident, 0) + 1
+        return ident
+    
+    def salir(self, ident):
+        restantes = self._hilos.get(ident, 1) - 1
+        if restantes > 0:
+            self._hilos[ident] = restantes
+        else:
+            self._hilos.pop(ident, None)
+    
+    def _muestrear(self, segundos, memoria):
+        """Bucle del hilo de muestreo (termina al acabar la ventana)"""
+        inicio = time.time()
+        instantanea = self._iniciar_tracemalloc() if memoria else None
+        muestras = 0
+        
+        try:
+            fin = time.monotonic() + segundos
+            while time.monotonic() < fin:
+                marcos = sys._current_frames()
+                for ident in list(self._hilos):
+                    marco = marcos.get(ident)
+                    if marco is None:
+                        continue
+                    pila = self._colapsar(marco)
+                    self._pilas[pila] = self._pilas.get(pila, 0) + 1
+                    muestras += 1
+                del marcos
+                time.sleep(self.intervalo)
+            
+            archivos = [self._guardar_pilas(inicio)]
+            if instantanea is not None:
+                archivos.append(self._guardar_memoria(instantanea, f"memoria-{_marca(inicio)}"))
+            self._ultimo = {
+                "inicio": _marca(inicio),
+                "segundos": segundos,
+                "muestras": muestras,
+                "archivos": [a.name for a in archivos]
+            }
+            print(f"✓ Perfil guardado: {', '.join(self._ultimo['archivos'])} ({muestras} muestras)")
+        except Exception as e:
+            print(f"⚠ Error perfilando: {e}")
+        finally:
+            if instantanea is not None:
+                self._detener_tracemalloc()
+            self.activo = False
+    
+    def _colapsar(self, marco):
+        """Pila 'archivo:funcion;...' desde la raíz hasta la hoja"""
+        pila = []
+        while marco is not None:
+            codigo = marco.f_code
+            etiqueta = self._etiquetas.get(codigo)
+            if etiqueta is None:
+                etiqueta = f"{Path(codigo.co_filename).stem}:{codigo.co_name}"
+                self._etiquetas[codigo] = etiqueta
+            pila.append(etiqueta)
+            marco = marco.f_back
+        pila.reverse()
+        
+        # Recortar el executor y el event loop: empezar en procesar_mensaje
+        for i in range(len(pila) - 1, -1, -1):
+            if pila[i].split(":", 1)[1] in RAICES:
+                pila = pila[i:]
+                break
+        return ";".join(pila)
+    
+    def _guardar_pilas(self, inicio):
+        self.directorio.mkdir(parents=True, exist_ok=True)
+        ruta = self.directorio / f"perfil-{_marca(inicio)}.folded"
+        with open(ruta, "w", encoding="utf-8") as f:
+            for pila, cuenta in sorted(self._pilas.items(), key=lambda x: -x[1]):
+                f.write(f"{pila} {cuenta}\n")
+        return ruta
+    
+    def _iniciar_tracemalloc(self):
+        """
+        Arranca tracemalloc si nadie lo tenía activo
+        
+        Returns:
+            Snapshot: Instantánea inicial
+        """
+        with self._lock:
+            if self._usos_tracemalloc == 0 and not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._tracemalloc_propio = True
+            self._usos_tracemalloc += 1
+        return tracemalloc.take_snapshot()
+    
+    def _detener_tracemalloc(self):
+        with self._lock:
+            self._usos_tracemalloc -= 1
+            if self._usos_tracemalloc == 0 and self._tracemalloc_propio:
+                tracemalloc.stop()
+                self._tracemalloc_propio = False
+    
+    def _guardar_memoria(self, inicial, nombre):
+        """Diferencia con la instantánea inicial, agrupada por línea de código"""
+        final = tracemalloc.take_snapshot()
+        filtros = [tracemalloc.Filter(False, tracemalloc.__file__)]
+        diferencias = final.filter_traces(filtros).compare_to(inicial.filter_traces(filtros), "lineno")
+        actual, pico = tracemalloc.get_traced_memory()
+        
+        self.directorio.mkdir(parents=True, exist_ok=True)
+        ruta = self.directorio / f"{nombre}.txt"
+        with open(ruta, "w", encoding="utf-8") as f:
+            f.write(f"# memoria trazada: {actual / 1048576:.1f} MB (pico {pico / 1048576:.1f} MB)\n")
+            for estadistica in diferencias[:self.top_memoria]:
+                f.write(f"{estadistica}\n")
+        return ruta
+    
+    @contextmanager
+    def memoria_carga(self, nombre):
+        """Captura tracemalloc alrededor de la carga de un modelo (si está activado)"""
+        if not self.memoria_modelos:
+            yield
+            return
+        
+        instantanea = self._iniciar_tracemalloc()
+        try:
+            yield
+            try:
+                ruta = self._guardar_memoria(instantanea, f"carga-{nombre}-{_marca(time.time())}")
+                print(f"✓ Memoria de la carga de '{nombre}' guardada en {ruta.name}")
+            except OSError as e:
+                print(f"⚠ No se pudo guardar la memoria de la carga de '{nombre}': {e}")
+        finally:
+            self._detener_tracemalloc()
+    
+    def archivos(self):
+        """Perfiles guardados, del más reciente al más antiguo"""
+        if not self.directorio.is_dir():
+            return []
+        rutas = [r for r in self.directorio.iterdir() if r.suffix in (".folded", ".txt")]
+        return [r.name for r in sorted(rutas, key=lambda r: r.stat().st_mtime, reverse=True)]
+    
+    def estado(self):
+        """
+        Returns:
+            dict: {activo, hilos_en_mensaje, ultimo, archivos}
+        """
+        return {
+            "activo": self.activo,
+            "hilos_en_mensaje": len(self._hilos),
+            "ultimo": self._ultimo,
+            "archivos": self.archivos()[:20]
+        }
+
+
+def _marca(segundos):
+    return time.strftime("%Y%m%d-%H%M%S", time.localtime(segundos))
+
+
+perfilador = Perfilador(
+    directorio=os.getenv("PERFIL_DIR", "perfiles"),
+    intervalo=float(os.getenv("PERFIL_INTERVALO_MS", "5")) / 1000,
+    memoria_modelos=os.getenv("PERFIL", "0") == "1"
+)
+
+
+def perfilable(funcion):
+    """Decorador: los hilos dentro de la función se muestrean durante una ventana"""
+    @functools.wraps(funcion)
+    def envoltura(*args, **kwargs):
+        if not perfilador.activo:
+            return funcion(*args, **kwargs)
+        ident = perfilador.entrar()
+        try:
+            return funcion(*args, **kwargs)
+        finally:
+            perfilador.salir(ident)
+    return envoltura
+
+
+def crear_router_perfil(perfilador, token):
+    """
+    Rutas de administración del perfilador (cabecera X-Admin-Token)
+    
+    POST /admin/perfil?segundos=30&memoria=false  Inicia una ventana
+    GET  /admin/perfil                            Estado y últimos archivos
+    GET  /admin/perfil/{archivo}                  Descarga un perfil
+    
+    Returns:
+        APIRouter: Rutas de FastAPI
+    """
+    from fastapi import APIRouter, Depends, Header, HTTPException
+    from fastapi.responses import FileResponse
+    
+    def comprobar_token(x_admin_token: str = Header("")):
+        if not hmac.compare_digest(x_admin_token.encode(), token.encode()):
+            raise HTTPException(status_code=403, detail="Token de administración no válido")
+    
+    router = APIRouter(prefix="/admin/perfil", dependencies=[Depends(comprobar_token)])
+    
+    @router.post("", status_code=202)
+    def iniciar(segundos: float = 30.0, memoria: bool = False):
+        try:
+            return perfilador.iniciar(min(max(segundos, 1.0), 600.0), memoria=memoria)
+        except RuntimeError as e:
+            raise HTTPException(status_code=409, detail=str(e))
+    
+    @router.get("")
+    def estado():
+        return perfilador.estado()
+    
+    @router.get("/{archivo}")
+    def descargar(archivo: str):
+        # Solo nombres listados: nada fuera de la carpeta de perfiles
+        if archivo not in perfilador.archivos():
+            raise HTTPException(status_code=404, detail="Perfil no encontrado")
+        return FileResponse(perfilador.directorio / archivo, media_type="text/plain")
+    
+    return router
@@ -3,9 +3,25 @@ Analizador de sentimiento para el chatbot
 Detecta el estado emocional del usuario para responder de forma empática
 """
 
-from transformers import pipeline
 import re
 
+from batch_scheduler import crear_planificador
+from metrics import LATENCIA_ETAPA, SENTIMIENTO, cronometrar
+from model_registry import registro_modelos
+
+
+MODELO_SENTIMIENTO = "nlptown/bert-base-multilingual-uncased-sentiment"
+
+
+def _crear_analizador_sentimiento():
+    """Construye el pipeline de sentimiento (importa transformers solo al cargarlo)"""
+    from inference_backend import crear_pipeline
+    
+    return crear_pipeline("sentiment-analysis", MODELO_SENTIMIENTO)
+
+
+registro_modelos.registrar("sentimiento", _crear_analizador_sentimiento)
+
 
 class SentimentAnalyzer:
     """Analiza el sentimiento de los mensajes del usuario"""
@@ -26,12 +42,19 @@ class SentimentAnalyzer:
     ]
     
     def __init__(self):
-        """Inicializa el modelo de análisis de sentimiento"""
-        self.analyzer = pipeline(
-            "sentiment-analysis",
-            model="nlptown/bert-base-multilingual-uncased-sentiment"
-        )
+        # Opcional: juntar en un lote los mensajes de sesiones concurrentes
+        self._planificador = crear_planificador(self._analizar_lote, "lote-sentimiento")
+    
+    @property
+    def analyzer(self):
+        """Modelo de análisis de sentimiento (se carga en el primer uso)"""
+        return registro_modelos.obtener("sentimiento")
     
+    def _analizar_lote(self, textos):
+        """Llamada en lote del planificador"""
+        return self.analyzer(textos, batch_size=len(textos))
+    
+    @cronometrar(LATENCIA_ETAPA, etapa="sentimiento")
     def analizar(self, texto):
         """
         Analiza el sentimiento de un texto usando palabras clave
@@ -54,15 +77,21 @@ class SentimentAnalyzer:
         
         # Si hay palabras negativas claras, es negativo
         if tiene_negativas and not tiene_positivas:
+            SENTIMIENTO.incrementar(via="palabras")
             return {"sentimiento": "negativo", "estrellas": 2, "confianza": 0.9}
         
         # Si hay palabras positivas claras, es positivo
         if tiene_positivas and not tiene_negativas:
+            SENTIMIENTO.incrementar(via="palabras")
             return {"sentimiento": "positivo", "estrellas": 5, "confianza": 0.9}
         
         # Si hay ambas o ninguna, usar el modelo de IA
+        SENTIMIENTO.incrementar(via="modelo")
         try:
-            resultado = self.analyzer(texto[:512])[0]
+            if self._planificador is not None:
+                resultado = self._planificador(texto[:512])[0]
+            else:
+                resultado = self.analyzer(texto[:512])[0]
             estrellas = int(resultado['label'].split()[0])
             confianza = resultado['score']
             
@@ -0,0 +1,142 @@
+"""
+Estado de conversación por sesión
+Cada cliente de Gradio tiene su propio pedido pendiente; el almacén está
+acotado en número de sesiones, tiempo de inactividad y memoria aproximada
+"""
+
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+
+def _tamano_aproximado(obj):
+    """Bytes aproximados de un objeto y su contenido (listas, dicts y escalares)"""
+    tamano = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        tamano += sum(_tamano_aproximado(k) + _tamano_aproximado(v) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple)):
+        tamano += sum(_tamano_aproximado(v) for v in obj)
+    return tamano
+
+
+class Sesion:
+    """Estado de una conversación"""
+    
+    def __init__(self, sesion_id):
+        self.sesion_id = sesion_id
+        self.pedido_pendiente = []
+        self.ultimo_uso = time.monotonic()
+        self.tamano = 0
+        # Serializa los mensajes de una misma sesión (doble envío, varias pestañas)
+        self.lock = threading.Lock()
+    
+    def calcular_tamano(self):
+        """Recalcula la memoria aproximada que ocupa la sesión"""
+        self.tamano = sys.getsizeof(self) + _tamano_aproximado(self.pedido_pendiente)
+        return self.tamano
+
+
+class SessionStore:
+    """Sesiones en orden de uso (LRU) con expulsión por inactividad y memoria"""
+    
+    def __init__(self, max_sesiones=1000, inactividad=1800.0, memoria_max_mb=64.0):
+        """
+        Args:
+            max_sesiones (int): Sesiones simultáneas como máximo
+            inactividad (float): Segundos sin mensajes tras los que se descarta una sesión
+            memoria_max_mb (float): Presupuesto aproximado de memoria para todas las sesiones
+        """
+        self.max_sesiones = max(1, int(max_sesiones))
+        self.inactividad = inactividad
+        self.memoria_max = int(memoria_max_mb * 1024 * 1024)
+        
+        self._sesiones = OrderedDict()
+        self._memoria = 0
+        self._lock = threading.Lock()
+        
+        self.creadas = 0
+        self.expulsadas_inactividad = 0
+        self.expulsadas_capacidad = 0
+    
+    def obtener(self, sesion_id):
+        """
+        Devuelve la sesión (creándola si no existe) y la marca como usada
+        
+        Args:
+            sesion_id (str): Identificador de la sesión de Gradio
+        
+        Returns:
+            Sesion: Estado de la conversación
+        """
+        ahora = time.monotonic()
+        with self._lock:
+            self._expulsar_inactivas(ahora)
+            
+            sesion = self._sesiones.get(sesion_id)
+            if sesion is None:
+                sesion = Sesion(sesion_id)
+                self._sesiones[sesion_id] = sesion
+                self._memoria += sesion.calcular_tamano()
+                self.creadas += 1
+            else:
+                self._sesiones.move_to_end(sesion_id)
+            
+            sesion.ultimo_uso = ahora
+            self._expulsar_por_capacidad(conservar=sesion_id)
+            return sesion
+    
+    def guardar(self, sesion):
+        """Actualiza la memoria contabilizada tras modificar la sesión"""
+        with self._lock:
+            if self._sesiones.get(sesion.sesion_id) is not sesion:
+                return
+            anterior = sesion.tamano
+            self._memoria += sesion.calcular_tamano() - anterior
+            self._expulsar_por_capacidad(conservar=sesion.sesion_id)
+    
+    def eliminar(self, sesion_id):
+        """Descarta una sesión"""
+        with self._lock:
+            sesion = self._sesiones.pop(sesion_id, None)
+            if sesion is not None:
+                self._memoria -= sesion.tamano
+    
+    def __len__(self):
+        return len(self._sesiones)
+    
+    def _expulsar_inactivas(self, ahora):
+        # Las menos usadas están al principio: basta recorrer hasta la primera activa
+        while self._sesiones:
+            sesion_id, sesion = next(iter(self._sesiones.items()))
+            if ahora - sesion.ultimo_uso < self.inactividad:
+                break
+            self._sesiones.popitem(last=False)
+            self._memoria -= sesion.tamano
+            self.expulsadas_inactividad += 1
+    
+    def _expulsar_por_capacidad(self, conservar):
+        while (len(self._sesiones) > self.max_sesiones or self._memoria > self.memoria_max):
+            sesion_id, sesion = next(iter(self._sesiones.items()))
+            if sesion_id == conservar:
+                break
+            self._sesiones.popitem(last=False)
+            self._memoria -= sesion.tamano
+            self.expulsadas_capacidad += 1
+    
+    def estadisticas(self):
+        """
+        Returns:
+            dict: {sesiones, max_sesiones, memoria_kb, memoria_max_kb, creadas,
+                   expulsadas_inactividad, expulsadas_capacidad}
+        """
+        with self._lock:
+            return {
+                "sesiones": len(self._sesiones),
+                "max_sesiones": self.max_sesiones,
+                "memoria_kb": round(self._memoria / 1024, 1),
+                "memoria_max_kb": round(self.memoria_max / 1024, 1),
+                "creadas": self.creadas,
+                "expulsadas_inactividad": self.expulsadas_inactividad,
+                "expulsadas_capacidad": self.expulsadas_capacidad
+            }
@@ -0,0 +1,88 @@
+"""
+Paridad del runtime NumPy con el Pipeline de sklearn del que se exporta
+Entrena con el dataset balanceado, exporta el .npz y compara predict,
+predict_proba y la log-verosimilitud conjunta con las del Pipeline
+
+Uso:
+    python -m pytest backend/chatbot/tests
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "training_data"))
+
+pytest.importorskip("sklearn")
+
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfVectorizer
+from sklearn.naive_bayes import MultinomialNB
+from sklearn.pipeline import Pipeline
+
+from intent_runtime import IntentRuntime, exportar_runtime
+from train_incremental import PARAMS_HASHING
+from train_model import cargar_dataset, preparar_datos_intencion
+
+
+# Frases fuera del dataset: términos desconocidos, acentos, vacías y mayúsculas
+FRASES_EXTRA = [
+    "",
+    "???",
+    "Quiero DOS pizzas y una coca cola",
+    "¿dónde está mi pedido 7D06BF25?",
+    "hola buenas tardes",
+    "el camarero tardó muchísimo, fatal",
+    "xyzzy plugh",
+    "gracias, todo perfecto",
+]
+
+
+@pytest.fixture(scope="module")
+def datos():
+    textos, etiquetas = preparar_datos_intencion(cargar_dataset())
+    return textos, etiquetas, textos + FRASES_EXTRA
+
+
+def _pipeline_tfidf():
+    # El mismo que entrenar_clasificador_intencion de train_model.py
+    return Pipeline([
+        ('tfidf', TfidfVectorizer(ngram_range=(1, 2), max_features=5000)),
+        ('clf', MultinomialNB())
+    ])
+
+
+def _pipeline_hashing():
+    # El mismo vectorizador que train_incremental.py (con menos columnas)
+    return Pipeline([
+        ('hashing', HashingVectorizer(n_features=2 ** 18, **PARAMS_HASHING)),
+        ('clf', MultinomialNB(alpha=0.3))
+    ])
+
+
+@pytest.mark.parametrize("crear", [_pipeline_tfidf, _pipeline_hashing], ids=["tfidf", "hashing"])
+def test_paridad_con_pipeline(crear, datos, tmp_path):
+    textos, etiquetas, consultas = datos
+    pipeline = crear().fit(textos, etiquetas)
+    runtime = IntentRuntime(exportar_runtime(pipeline, tmp_path / "intencion.npz"))
+
+    assert list(runtime.classes_) == list(pipeline.classes_)
+
+    X = pipeline[:-1].transform(consultas)
+    np.testing.assert_array_equal(runtime.puntuaciones(consultas), pipeline[-1].predict_joint_log_proba(X))
+    np.testing.assert_array_equal(runtime.predict(consultas), pipeline.predict(consultas))
+    np.testing.assert_allclose(runtime.predict_proba(consultas), pipeline.predict_proba(consultas),
+                               rtol=1e-12, atol=1e-15)
+
+
+@pytest.mark.parametrize("crear", [_pipeline_tfidf, _pipeline_hashing], ids=["tfidf", "hashing"])
+def test_paridad_texto_a_texto(crear, datos, tmp_path):
+    """Un solo texto sigue el camino rápido de puntuaciones y debe coincidir igual"""
+    textos, etiquetas, consultas = datos
+    pipeline = crear().fit(textos, etiquetas)
+    runtime = IntentRuntime(exportar_runtime(pipeline, tmp_path / "intencion.npz"))
+
+    for texto in consultas:
+        assert runtime.predict([texto])[0] == pipeline.predict([texto])[0], texto
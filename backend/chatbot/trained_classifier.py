@@ -3,53 +3,164 @@ Clasificador de intención entrenado con sklearn
 Usa el modelo entrenado localmente para mayor precisión
 """
 
+import os
 import pickle
 from pathlib import Path
 
+from metrics import INTENCIONES, LATENCIA_ETAPA, cronometrar
+from model_registry import registro_modelos
+
+
+MODEL_PATH = Path(__file__).parent / "training_data" / "intent_classifier_model.pkl"
+RUNTIME_PATH = MODEL_PATH.with_suffix(".npz")
+# Versiones de train_incremental.py (se usan con INTENCION_INCREMENTAL=1)
+INCREMENTAL_DIR = MODEL_PATH.parent / "incremental"
+
+
+def _cargar_incremental():
+    from intent_runtime import IntentRuntime, ultima_version
+    
+    ruta = ultima_version(INCREMENTAL_DIR)
+    if ruta is None:
+        print(f"⚠ No hay versiones incrementales en {INCREMENTAL_DIR}")
+        return None
+    try:
+        model = IntentRuntime(ruta)
+        print(f"✓ Modelo de intención incremental cargado ({ruta.name})")
+        return model
+    except Exception as e:
+        print(f"⚠ Error cargando {ruta.name}: {e}")
+        return None
+
+
+def _cargar_modelo():
+    """
+    Intenta cargar el modelo pre-entrenado: con INTENCION_INCREMENTAL=1 la
+    última versión incremental; si no, el artefacto compacto (solo NumPy) y,
+    si no existe, el pickle (sklearn se importa al deserializar)
+    """
+    if os.getenv("INTENCION_INCREMENTAL", "0") == "1":
+        model = _cargar_incremental()
+        if model is not None:
+            return model
+    
+    if RUNTIME_PATH.exists():
+        try:
+            from intent_runtime import IntentRuntime
+            
+            model = IntentRuntime(RUNTIME_PATH)
+            print(f"✓ Modelo de intención cargado (runtime compacto {model.version})")
+            return model
+        except Exception as e:
+            print(f"⚠ Error cargando {RUNTIME_PATH.name}, se usa el pickle: {e}")
+    
+    if MODEL_PATH.exists():
+        try:
+            with open(MODEL_PATH, 'rb') as f:
+                model = pickle.load(f)
+            print("✓ Modelo de intención cargado correctamente")
+            return model
+        except Exception as e:
+            print(f"⚠ Error cargando modelo: {e}")
+            return None
+    
+    print(f"⚠ Modelo no encontrado en: {MODEL_PATH}")
+    return None
+
+
+registro_modelos.registrar("intencion", _cargar_modelo)
+
+
+def _puntuaciones(model, textos):
+    """
+    Log-verosimilitud conjunta (textos, clases) del runtime compacto o del
+    Pipeline de sklearn (se vectoriza una vez para todo el bloque)
+    """
+    if hasattr(model, "puntuaciones"):
+        return model.puntuaciones(textos)
+    return model[-1].predict_joint_log_proba(model[:-1].transform(textos))
+
 
 class TrainedIntentClassifier:
     """Clasificador de intención usando modelo entrenado"""
     
-    def __init__(self):
-        """Carga el modelo entrenado"""
-        self.model = None
-        self._cargar_modelo()
+    @property
+    def model(self):
+        """
+        Modelo entrenado si ya está cargado; mientras se carga en segundo
+        plano devuelve None y el chatbot responde con reglas
+        """
+        return registro_modelos.obtener_si_listo("intencion")
     
-    def _cargar_modelo(self):
-        """Intenta cargar el modelo pre-entrenado"""
-        model_path = Path(__file__).parent / "training_data" / "intent_classifier_model.pkl"
-        
-        if model_path.exists():
-            try:
-                with open(model_path, 'rb') as f:
-                    self.model = pickle.load(f)
-                print("✓ Modelo de intención cargado correctamente")
-            except Exception as e:
-                print(f"⚠ Error cargando modelo: {e}")
-                self.model = None
-        else:
-            print(f"⚠ Modelo no encontrado en: {model_path}")
-            self.model = None
+    @property
+    def clases(self):
+        """Intenciones en el orden de las columnas de probabilidades"""
+        model = self.model
+        return [str(c) for c in model.classes_] if model is not None else []
     
-    def clasificar(self, texto):
+    def clasificar_lote(self, textos, tamano_lote=1024):
         """
-        Clasifica la intención del texto
+        Clasifica muchos textos vectorizando cada bloque una sola vez
         
         Args:
-            texto (str): Mensaje del usuario
+            textos (list): Mensajes
+            tamano_lote (int): Textos por bloque (acota la memoria)
+        
+        Returns:
+            tuple: (intenciones, probabilidades) con una intención por texto y
+                   la matriz (textos, clases) en el orden de `clases`;
+                   ([None, ...], None) si el modelo no está cargado
+        """
+        model = self.model
+        if model is None or not len(textos):
+            return [None] * len(textos), None
+        
+        import numpy as np
+        
+        intenciones = []
+        bloques = []
+        for inicio in range(0, len(textos), tamano_lote):
+            puntuaciones = _puntuaciones(model, [t or "" for t in textos[inicio:inicio + tamano_lote]])
+            # La etiqueta sale de las puntuaciones, igual que model.predict
+            intenciones.extend(model.classes_[np.argmax(puntuaciones, axis=1)])
             
+            puntuaciones -= puntuaciones.max(axis=1, keepdims=True)
+            probabilidades = np.exp(puntuaciones)
+            probabilidades /= probabilidades.sum(axis=1, keepdims=True)
+            bloques.append(probabilidades)
+        
+        return [str(i) for i in intenciones], np.vstack(bloques)
+    
+    @cronometrar(LATENCIA_ETAPA, etapa="clasificar_intencion")
+    def clasificar_con_confianza(self, texto):
+        """
+        Intención y su probabilidad con una sola pasada del modelo
+        
         Returns:
-            str: Tipo de intención (pedido, saludo, queja, etc.)
+            tuple: (intención, confianza) o (None, 0.0)
         """
-        if not self.model or not texto:
-            return None
+        if not texto or self.model is None:
+            return None, 0.0
         
         try:
-            prediccion = self.model.predict([texto])[0]
-            return prediccion
+            intenciones, probabilidades = self.clasificar_lote([texto])
+            INTENCIONES.incrementar(intencion=intenciones[0])
+            return intenciones[0], float(probabilidades[0].max())
         except Exception as e:
             print(f"Error en clasificación: {e}")
-            return None
+            return None, 0.0
+    
+    def clasificar(self, texto):
+        """
+        Clasifica la intención del texto
+        
+        Args:
+            texto (str): Mensaje del usuario
+        
+        Returns:
+            str: Tipo de intención (pedido, saludo, queja, etc.)
+        """
+        return self.clasificar_con_confianza(texto)[0]
     
     def obtener_probabilidades(self, texto):
         """
@@ -58,16 +169,14 @@ class TrainedIntentClassifier:
         Returns:
             dict: {intencion: probabilidad}
         """
-        if not self.model or not texto:
+        if not texto or self.model is None:
             return {}
         
         try:
-            clases = self.model.classes_
-            probabilidades = self.model.predict_proba([texto])[0]
-            
+            _, probabilidades = self.clasificar_lote([texto])
             return {
-                clase: float(prob) 
-                for clase, prob in zip(clases, probabilidades)
+                clase: float(prob)
+                for clase, prob in zip(self.clases, probabilidades[0])
             }
         except Exception as e:
             print(f"Error obteniendo probabilidades: {e}")
@@ -0,0 +1,256 @@
+"""
+Entrenamiento incremental del clasificador de intención
+Lee del log de conversaciones etiquetadas solo las líneas nuevas desde la
+última ejecución, actualiza un HashingVectorizer + MultinomialNB con
+partial_fit en lotes pequeños y publica una nueva versión del artefacto
+compacto sin reentrenar desde cero: el coste depende de los ejemplos nuevos,
+no del total acumulado
+
+Formato del log (JSON Lines, una conversación etiquetada por línea):
+    {"texto": "quiero dos pizzas", "intencion": "pedido"}
+
+La primera ejecución parte del dataset balanceado. El chatbot carga la última
+versión con INTENCION_INCREMENTAL=1
+
+Uso:
+    python train_incremental.py --log ../logs/conversaciones.jsonl
+    python train_incremental.py --log conversaciones.jsonl --lote 256 --conservar 10
+    python train_incremental.py --reiniciar   # vuelve a empezar desde el dataset
+"""
+
+import argparse
+import json
+import os
+import pickle
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from intent_runtime import exportar_runtime, publicar_version, ultima_version
+
+
+DIRECTORIO = Path(__file__).parent / "incremental"
+ESTADO = "estado.pkl"
+
+# Parámetros fijos del vectorizador: cambiarlos obliga a --reiniciar
+PARAMS_HASHING = {
+    "ngram_range": (1, 2),
+    "alternate_sign": False,
+    "norm": "l2"
+}
+
+
+def cargar_estado(directorio):
+    """
+    Returns:
+        dict: Estado guardado (vectorizador, clasificador, posiciones en los
+              logs, versión) o None si no hay entrenamiento previo
+    """
+    ruta = directorio / ESTADO
+    if not ruta.exists():
+        return None
+    with open(ruta, 'rb') as f:
+        return pickle.load(f)
+
+
+def guardar_estado(directorio, estado):
+    """Escritura atómica: un corte a mitad no deja el estado a medias"""
+    temporal = directorio / f".{ESTADO}.tmp"
+    with open(temporal, 'wb') as f:
+        pickle.dump(estado, f)
+    os.replace(temporal, directorio / ESTADO)
+
+
+def estado_inicial(bits, alpha):
+    """Vectorizador y clasificador nuevos entrenados con el dataset balanceado"""
+    from sklearn.feature_extraction.text import HashingVectorizer
+    from sklearn.naive_bayes import MultinomialNB
+    
+    from train_model import cargar_dataset, preparar_datos_intencion
+    
+    textos, etiquetas = preparar_datos_intencion(cargar_dataset())
+    estado = {
+        "vectorizador": HashingVectorizer(n_features=2 ** bits, **PARAMS_HASHING),
+        "clf": MultinomialNB(alpha=alpha),
+        "clases": sorted(set(etiquetas)),
+        "posiciones": {},
+        "version": 0,
+        "ejemplos": 0
+    }
+    actualizar(estado, textos, etiquetas)
+    print(f"   - Modelo inicial con {len(textos)} ejemplos del dataset "
+          f"({len(estado['clases'])} intenciones, 2^{bits} columnas)")
+    return estado
+
+
+def actualizar(estado, textos, etiquetas):
+    """Un lote de partial_fit (las clases se fijan en la primera llamada)"""
+    X = estado["vectorizador"].transform(textos)
+    estado["clf"].partial_fit(X, etiquetas, classes=estado["clases"])
+    estado["ejemplos"] += len(textos)
+
+
+def leer_nuevos(ruta, posicion, clases):
+    """
+    Ejemplos del log a partir de una posición en bytes
+    
+    Solo se consumen líneas completas: una línea a medio escribir se lee en
+    la siguiente ejecución. Si el log es más corto que la posición se
+    entiende que se ha rotado y se empieza desde el principio
+    
+    Args:
+        ruta (Path): Log JSON Lines
+        posicion (int): Bytes ya procesados
+        clases (list): Intenciones que conoce el modelo
+    
+    Yields:
+        tuple: (texto, intención, posición tras la línea) o (None, motivo, posición)
+               para las líneas que se saltan
+    """
+    if ruta.stat().st_size < posicion:
+        print(f"⚠ {ruta.name} es más corto que la posición guardada: se lee desde el principio")
+        posicion = 0
+    
+    conocidas = set(clases)
+    with open(ruta, 'rb') as f:
+        f.seek(posicion)
+        for linea in f:
+            if not linea.endswith(b"\n"):
+                break
+            posicion += len(linea)
+            if not linea.strip():
+                continue
+            try:
+                registro = json.loads(linea)
+                texto = registro.get("texto") or registro.get("entrada")
+                intencion = registro["intencion"]
+            except (ValueError, KeyError, AttributeError):
+                yield None, "inválida", posicion
+                continue
+            # Un texto que no es cadena rompe el vectorizador y una intención
+            # no hashable, la comprobación de intenciones conocidas
+            if (texto is not None and not isinstance(texto, str)) or not isinstance(intencion, str):
+                yield None, "inválida", posicion
+            elif not texto:
+                yield None, "sin texto", posicion
+            elif intencion not in conocidas:
+                yield None, f"intención desconocida '{intencion}'", posicion
+            else:
+                yield texto, intencion, posicion
+
+
+def entrenar_desde_log(estado, ruta, tamano_lote):
+    """
+    Consume el log en lotes de partial_fit
+    
+    Returns:
+        tuple: (ejemplos usados, {motivo: líneas saltadas})
+    """
+    clave = str(ruta.resolve())
+    textos, etiquetas = [], []
+    usados = 0
+    saltados = {}
+    
+    def vaciar(posicion):
+        nonlocal usados
+        if textos:
+            actualizar(estado, textos, etiquetas)
+            usados += len(textos)
+            textos.clear()
+            etiquetas.clear()
+        estado["posiciones"][clave] = posicion
+    
+    posicion = estado["posiciones"].get(clave, 0)
+    for texto, intencion, posicion in leer_nuevos(ruta, posicion, estado["clases"]):
+        if texto is None:
+            saltados[intencion] = saltados.get(intencion, 0) + 1
+            continue
+        textos.append(texto)
+        etiquetas.append(intencion)
+        if len(textos) >= tamano_lote:
+            vaciar(posicion)
+    vaciar(posicion)
+    
+    return usados, saltados
+
+
+def publicar(estado, directorio, conservar):
+    """
+    Exporta la versión siguiente y la marca como última
+    
+    Returns:
+        Path: Artefacto publicado
+    """
+    from sklearn.pipeline import Pipeline
+    
+    estado["version"] += 1
+    nombre = f"intencion-v{estado['version']:06d}"
+    pipeline = Pipeline([("hashing", estado["vectorizador"]), ("clf", estado["clf"])])
+    
+    # np.savez necesita la extensión .npz también en el temporal
+    temporal = directorio / f".{nombre}.tmp.npz"
+    exportar_runtime(pipeline, temporal, version=f"{nombre}-{time.strftime('%Y%m%d-%H%M%S')}")
+    ruta = directorio / f"{nombre}.npz"
+    os.replace(temporal, ruta)
+    
+    # El estado se guarda antes del puntero: si se corta aquí, la siguiente
+    # ejecución solo vuelve a publicar, no repite ejemplos
+    guardar_estado(directorio, estado)
+    publicar_version(directorio, ruta)
+    
+    versiones = sorted(directorio.glob("intencion-v*.npz"))
+    for antigua in versiones[:-conservar] if conservar > 0 else []:
+        antigua.unlink()
+    return ruta
+
+
+def main():
+    """Función principal del entrenamiento incremental"""
+    parser = argparse.ArgumentParser(description="Entrenamiento incremental del clasificador de intención")
+    parser.add_argument("--log", action="append", default=[],
+                        help="Log JSON Lines con {texto, intencion} (se puede repetir)")
+    parser.add_argument("--lote", type=int, default=256, help="Ejemplos por partial_fit")
+    parser.add_argument("--directorio", default=str(DIRECTORIO), help="Carpeta de versiones y estado")
+    parser.add_argument("--conservar", type=int, default=5, help="Versiones que se mantienen (0: todas)")
+    parser.add_argument("--bits", type=int, default=16, help="log2 de las columnas hash (solo al empezar)")
+    parser.add_argument("--alpha", type=float, default=0.3, help="Suavizado de MultinomialNB (solo al empezar)")
+    parser.add_argument("--reiniciar", action="store_true", help="Descartar el estado y partir del dataset")
+    args = parser.parse_args()
+    
+    directorio = Path(args.directorio)
+    directorio.mkdir(parents=True, exist_ok=True)
+    inicio = time.perf_counter()
+    
+    estado = None if args.reiniciar else cargar_estado(directorio)
+    nuevo = estado is None
+    if nuevo:
+        print("Sin estado previo: entrenando desde el dataset...")
+        estado = estado_inicial(args.bits, args.alpha)
+    
+    total = 0
+    for ruta in map(Path, args.log):
+        if not ruta.exists():
+            print(f"⚠ No existe el log: {ruta}")
+            continue
+        usados, saltados = entrenar_desde_log(estado, ruta, args.lote)
+        total += usados
+        print(f"   - {ruta.name}: {usados} ejemplos nuevos")
+        for motivo, cuenta in saltados.items():
+            print(f"     · {cuenta} líneas saltadas ({motivo})")
+    
+    publicada = ultima_version(directorio)
+    if total == 0 and not nuevo and publicada is not None and publicada.name == f"intencion-v{estado['version']:06d}.npz":
+        # Aun sin ejemplos se guardan las posiciones (p. ej. líneas saltadas)
+        guardar_estado(directorio, estado)
+        print(f"✓ Sin ejemplos nuevos: sigue vigente {publicada.name}")
+        return
+    
+    ruta = publicar(estado, directorio, args.conservar)
+    print(f"✓ Publicada {ruta.name} ({estado['ejemplos']} ejemplos acumulados, "
+          f"{ruta.stat().st_size / 1024:.0f} KB) en {time.perf_counter() - inicio:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,12 +7,32 @@ Requisitos adicionales:
 
 Uso:
     python train_model.py
+    python train_model.py --buscar --presupuesto-us 200   # rejilla en todos los núcleos
+    python train_model.py --buscar --rejilla rejilla.json --folds 5 --json busqueda.json
 """
 
+import argparse
 import json
 import os
+import sys
+import time
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# Features TF-IDF por fold ya calculadas (joblib.Memory)
+CACHE_FEATURES = Path(__file__).resolve().parent.parent / ".cache" / "features_intencion"
+
+# Rejilla por defecto: parámetros del Pipeline (tfidf__*, clf__*). Solo
+# MultinomialNB, porque el chatbot carga el modelo con el runtime compacto
+REJILLA_POR_DEFECTO = {
+    "tfidf__ngram_range": [(1, 1), (1, 2), (1, 3)],
+    "tfidf__max_features": [2000, 5000, None],
+    "tfidf__sublinear_tf": [False, True],
+    "tfidf__min_df": [1, 2],
+    "clf__alpha": [0.1, 0.3, 1.0]
+}
+
 
 def cargar_dataset():
     """Carga el dataset de entrenamiento BALANCEADO"""
@@ -71,7 +91,6 @@ def entrenar_clasificador_intencion(textos, etiquetas):
         from sklearn.naive_bayes import MultinomialNB
         from sklearn.pipeline import Pipeline
         from sklearn.model_selection import cross_val_score
-        import pickle
         
         # Crear pipeline
         pipeline = Pipeline([
@@ -86,12 +105,7 @@ def entrenar_clasificador_intencion(textos, etiquetas):
         scores = cross_val_score(pipeline, textos, etiquetas, cv=3)
         print(f"Precisión promedio: {scores.mean():.2f} (+/- {scores.std() * 2:.2f})")
         
-        # Guardar modelo
-        model_path = Path(__file__).parent / "intent_classifier_model.pkl"
-        with open(model_path, 'wb') as f:
-            pickle.dump(pipeline, f)
-        
-        print(f"Modelo guardado en: {model_path}")
+        guardar_modelo(pipeline)
         return pipeline
         
     except ImportError:
@@ -99,6 +113,231 @@ def entrenar_clasificador_intencion(textos, etiquetas):
         return None
 
 
+def guardar_modelo(pipeline):
+    """Guarda el pickle y el artefacto compacto que carga el chatbot"""
+    import pickle
+    
+    model_path = Path(__file__).parent / "intent_classifier_model.pkl"
+    with open(model_path, 'wb') as f:
+        pickle.dump(pipeline, f)
+    
+    print(f"Modelo guardado en: {model_path}")
+    
+    # Artefacto compacto para el chatbot (no necesita sklearn para cargarse)
+    from intent_runtime import exportar_runtime
+    
+    runtime_path = exportar_runtime(pipeline, model_path.with_suffix(".npz"))
+    print(f"Runtime compacto guardado en: {runtime_path}")
+
+
+def _vectorizar_fold(params_tfidf, textos_entrenamiento, textos_prueba):
+    """
+    Ajusta el TF-IDF en el fold de entrenamiento y transforma ambos lados
+    (se cachea en disco: la clave son los parámetros y los propios textos)
+    """
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    
+    vectorizador = TfidfVectorizer(**params_tfidf)
+    X_entrenamiento = vectorizador.fit_transform(textos_entrenamiento)
+    X_prueba = vectorizador.transform(textos_prueba) if textos_prueba else None
+    return vectorizador, X_entrenamiento, X_prueba
+
+
+def _evaluar_fold(vectorizar, params_tfidf, params_clf, textos, etiquetas, entrenamiento, prueba):
+    """
+    Precisión de cada configuración del clasificador en un fold: las features
+    se calculan una vez para todas
+    
+    Returns:
+        list: Una precisión por elemento de params_clf
+    """
+    from sklearn.naive_bayes import MultinomialNB
+    
+    _, X_entrenamiento, X_prueba = vectorizar(
+        params_tfidf,
+        [textos[i] for i in entrenamiento],
+        [textos[i] for i in prueba]
+    )
+    y_entrenamiento = [etiquetas[i] for i in entrenamiento]
+    y_prueba = [etiquetas[i] for i in prueba]
+    
+    precisiones = []
+    for params in params_clf:
+        clf = MultinomialNB(**params).fit(X_entrenamiento, y_entrenamiento)
+        aciertos = sum(p == y for p, y in zip(clf.predict(X_prueba), y_prueba))
+        precisiones.append(aciertos / len(y_prueba))
+    return precisiones
+
+
+def _entrenar_candidato(vectorizar, params_tfidf, params_clf, textos, etiquetas, ruta):
+    """Ajusta el candidato con todo el dataset y exporta su artefacto compacto"""
+    from sklearn.naive_bayes import MultinomialNB
+    from sklearn.pipeline import Pipeline
+    from intent_runtime import exportar_runtime
+    
+    vectorizador, X, _ = vectorizar(params_tfidf, list(textos), [])
+    clf = MultinomialNB(**params_clf).fit(X, etiquetas)
+    pipeline = Pipeline([('tfidf', vectorizador), ('clf', clf)])
+    exportar_runtime(pipeline, ruta)
+    return pipeline
+
+
+def _medir_latencia(ruta, textos, repeticiones=5):
+    """
+    Latencia por mensaje del artefacto con el runtime que usa el chatbot
+    
+    Returns:
+        tuple: (p50, p95) en microsegundos
+    """
+    import gc
+    
+    from intent_runtime import IntentRuntime
+    
+    runtime = IntentRuntime(ruta)
+    runtime.predict_proba(textos[:1])
+    tiempos = []
+    gc.disable()
+    try:
+        for _ in range(repeticiones):
+            for texto in textos:
+                inicio = time.perf_counter()
+                runtime.predict_proba([texto])
+                tiempos.append(time.perf_counter() - inicio)
+    finally:
+        gc.enable()
+    tiempos.sort()
+    return (
+        tiempos[len(tiempos) // 2] * 1e6,
+        tiempos[min(len(tiempos) - 1, int(len(tiempos) * 0.95))] * 1e6
+    )
+
+
+def _separar_params(params):
+    tfidf = {k[len("tfidf__"):]: v for k, v in params.items() if k.startswith("tfidf__")}
+    clf = {k[len("clf__"):]: v for k, v in params.items() if k.startswith("clf__")}
+    otros = set(params) - {f"tfidf__{k}" for k in tfidf} - {f"clf__{k}" for k in clf}
+    if otros:
+        raise ValueError(f"Parámetros de la rejilla desconocidos: {sorted(otros)}")
+    if "ngram_range" in tfidf:
+        tfidf["ngram_range"] = tuple(tfidf["ngram_range"])
+    return tfidf, clf
+
+
+def buscar_clasificador_intencion(textos, etiquetas, rejilla=None, folds=3, n_jobs=-1,
+                                  presupuesto_us=None, cache_dir=CACHE_FEATURES):
+    """
+    Búsqueda en rejilla de TF-IDF + MultinomialNB en todos los núcleos
+    
+    Cada combinación de parámetros del TF-IDF se vectoriza una vez por fold
+    (y se reutiliza en disco entre ejecuciones) para todas las del
+    clasificador. De cada candidato se informa la precisión media, la
+    latencia por mensaje con el runtime compacto y el tamaño del artefacto
+    
+    Args:
+        textos (list): Mensajes
+        etiquetas (list): Intención de cada mensaje
+        rejilla (dict|list): Rejilla de parámetros tfidf__* / clf__* (formato
+                             de ParameterGrid); por defecto REJILLA_POR_DEFECTO
+        folds (int): Folds de la validación cruzada estratificada
+        n_jobs (int): Procesos de joblib (-1: todos los núcleos)
+        presupuesto_us (float): p95 máximo por mensaje; se elige el más
+                                preciso que lo cumpla
+        cache_dir (Path): Carpeta de la caché de features (None la desactiva)
+    
+    Returns:
+        tuple: (pipeline elegido o None, lista de resultados por candidato)
+    """
+    import tempfile
+    
+    import numpy as np
+    from joblib import Memory, Parallel, delayed
+    from sklearn.model_selection import ParameterGrid, StratifiedKFold
+    
+    candidatos = [_separar_params(p) for p in ParameterGrid(rejilla or REJILLA_POR_DEFECTO)]
+    
+    # Agrupar por TF-IDF: el clasificador es lo barato de cada fold
+    grupos = {}
+    for i, (tfidf, clf) in enumerate(candidatos):
+        clave = json.dumps(tfidf, sort_keys=True, default=str)
+        grupos.setdefault(clave, (tfidf, []))[1].append((i, clf))
+    
+    memoria = Memory(str(cache_dir) if cache_dir else None, verbose=0)
+    vectorizar = memoria.cache(_vectorizar_fold)
+    divisiones = list(StratifiedKFold(n_splits=folds, shuffle=True, random_state=0).split(textos, etiquetas))
+    
+    print(f"   - {len(candidatos)} candidatos ({len(grupos)} TF-IDF distintos) × {folds} folds")
+    inicio = time.time()
+    tareas = [(tfidf, clfs, entrenamiento, prueba)
+              for tfidf, clfs in grupos.values()
+              for entrenamiento, prueba in divisiones]
+    salidas = Parallel(n_jobs=n_jobs)(
+        delayed(_evaluar_fold)(vectorizar, tfidf, [c for _, c in clfs], textos, etiquetas, entrenamiento, prueba)
+        for tfidf, clfs, entrenamiento, prueba in tareas
+    )
+    
+    precisiones = {}
+    for (_, clfs, _, _), salida in zip(tareas, salidas):
+        for (i, _), precision in zip(clfs, salida):
+            precisiones.setdefault(i, []).append(precision)
+    print(f"   - Validación cruzada en {time.time() - inicio:.1f}s")
+    
+    with tempfile.TemporaryDirectory() as directorio:
+        rutas = [Path(directorio) / f"candidato-{i}.npz" for i in range(len(candidatos))]
+        pipelines = Parallel(n_jobs=n_jobs)(
+            delayed(_entrenar_candidato)(vectorizar, tfidf, clf, textos, etiquetas, ruta)
+            for (tfidf, clf), ruta in zip(candidatos, rutas)
+        )
+        
+        # La latencia se mide en serie para que los procesos no se estorben
+        resultados = []
+        for i, ((tfidf, clf), ruta) in enumerate(zip(candidatos, rutas)):
+            p50, p95 = _medir_latencia(ruta, textos)
+            resultados.append({
+                "candidato": i,
+                "tfidf": tfidf,
+                "clf": clf,
+                "precision": float(np.mean(precisiones[i])),
+                "desviacion": float(np.std(precisiones[i])),
+                "latencia_p50_us": round(p50, 1),
+                "latencia_p95_us": round(p95, 1),
+                "tamano_kb": round(ruta.stat().st_size / 1024, 1),
+                "terminos": len(pipelines[i].named_steps["tfidf"].vocabulary_)
+            })
+    
+    _imprimir_busqueda(resultados, presupuesto_us)
+    
+    validos = [r for r in resultados
+               if presupuesto_us is None or r["latencia_p95_us"] <= presupuesto_us]
+    if not validos:
+        print(f"⚠ Ningún candidato cumple el presupuesto de {presupuesto_us:.0f} µs")
+        return None, resultados
+    
+    # El más preciso; a igualdad, el más pequeño (la latencia medida tiene ruido)
+    elegido = min(validos, key=lambda r: (-r["precision"], r["tamano_kb"], r["latencia_p95_us"]))
+    elegido["elegido"] = True
+    print(f"✓ Elegido el candidato {elegido['candidato']}: "
+          f"precisión {elegido['precision']:.3f}, p95 {elegido['latencia_p95_us']:.0f} µs, "
+          f"{elegido['tamano_kb']:.0f} KB")
+    return pipelines[elegido["candidato"]], resultados
+
+
+def _imprimir_busqueda(resultados, presupuesto_us, limite=15):
+    """Tabla de los candidatos más precisos"""
+    ordenados = sorted(resultados, key=lambda r: (-r["precision"], r["latencia_p95_us"]))
+    print(f"\n   {'#':>3}  {'precisión':>13}  {'p50 µs':>7}  {'p95 µs':>7}  {'KB':>6}  {'términos':>8}  parámetros")
+    for r in ordenados[:limite]:
+        fuera = presupuesto_us is not None and r["latencia_p95_us"] > presupuesto_us
+        params = ", ".join(f"{k}={v}" for k, v in {**r["tfidf"], **r["clf"]}.items())
+        print(f"   {r['candidato']:>3}  {r['precision']:.3f} ± {r['desviacion']:.3f}  "
+              f"{r['latencia_p50_us']:>7.0f}  {r['latencia_p95_us']:>7.0f}{'*' if fuera else ' '} "
+              f"{r['tamano_kb']:>6.0f}  {r['terminos']:>8}  {params}")
+    if len(ordenados) > limite:
+        print(f"   ... {len(ordenados) - limite} candidatos más")
+    if presupuesto_us is not None:
+        print(f"   * fuera del presupuesto de {presupuesto_us:.0f} µs (p95)")
+    print()
+
+
 def crear_reglas_desde_dataset(data):
     """
     Crea reglas de extracción basadas en patrones del dataset
@@ -210,6 +449,18 @@ def generar_sinonimos_ampliados(data):
 
 def main():
     """Función principal de entrenamiento"""
+    parser = argparse.ArgumentParser(description="Entrenamiento del clasificador de intención")
+    parser.add_argument("--buscar", action="store_true",
+                        help="Búsqueda en rejilla en lugar del pipeline fijo")
+    parser.add_argument("--rejilla", help="JSON con la rejilla (tfidf__* / clf__*)")
+    parser.add_argument("--folds", type=int, default=3, help="Folds de la validación cruzada")
+    parser.add_argument("--jobs", type=int, default=-1, help="Procesos (-1: todos los núcleos)")
+    parser.add_argument("--presupuesto-us", type=float,
+                        help="Latencia p95 máxima por mensaje en microsegundos")
+    parser.add_argument("--sin-cache", action="store_true", help="No reutilizar features en disco")
+    parser.add_argument("--json", help="Guardar los resultados de la búsqueda en este archivo")
+    args = parser.parse_args()
+    
     print("=" * 50)
     print("Entrenamiento del Clasificador de Pedidos")
     print("=" * 50)
@@ -232,7 +483,28 @@ def main():
     
     # Entrenar clasificador de intención
     print("\n3. Entrenando clasificador de intención...")
-    modelo = entrenar_clasificador_intencion(textos, etiquetas)
+    if args.buscar:
+        rejilla = None
+        if args.rejilla:
+            with open(args.rejilla, 'r', encoding='utf-8') as f:
+                rejilla = json.load(f)
+        
+        modelo, resultados = buscar_clasificador_intencion(
+            textos, etiquetas,
+            rejilla=rejilla,
+            folds=args.folds,
+            n_jobs=args.jobs,
+            presupuesto_us=args.presupuesto_us,
+            cache_dir=None if args.sin_cache else CACHE_FEATURES
+        )
+        if args.json:
+            with open(args.json, 'w', encoding='utf-8') as f:
+                json.dump(resultados, f, ensure_ascii=False, indent=2, default=str)
+            print(f"Resultados guardados en: {args.json}")
+        if modelo:
+            guardar_modelo(modelo)
+    else:
+        modelo = entrenar_clasificador_intencion(textos, etiquetas)
     
     # Extraer reglas
     print("\n4. Extrayendo reglas del dataset...")
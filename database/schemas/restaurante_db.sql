@@ -95,13 +95,18 @@ INSERT INTO `pedidos` (`id`, `id_pedido`, `producto`, `cantidad`, `precio_unitar
 -- Indices de la tabla `menu`
 --
 ALTER TABLE `menu`
-  ADD PRIMARY KEY (`id`);
+  ADD PRIMARY KEY (`id`),
+  ADD UNIQUE KEY `uq_menu_nombre_producto` (`nombre_producto`),
+  ADD KEY `idx_menu_disponible_nombre` (`disponible`,`nombre_producto`);
 
 --
 -- Indices de la tabla `pedidos`
 --
 ALTER TABLE `pedidos`
-  ADD PRIMARY KEY (`id`);
+  ADD PRIMARY KEY (`id`),
+  ADD KEY `idx_pedidos_id_pedido` (`id_pedido`),
+  ADD KEY `idx_pedidos_estado_fecha` (`estado`,`fecha`),
+  ADD KEY `idx_pedidos_fecha` (`fecha`);
 
 --
 -- AUTO_INCREMENT de las tablas volcadas
@@ -4,6 +4,10 @@
 
 const API_BASE_URL = '/backend/api';
 
+// Flujo de eventos del chatbot: Apache lo reenvía a CHATBOT_URL, así que
+// sirve en el mismo origen que la API sea cual sea CHATBOT_PORT
+const EVENTOS_URL = '/eventos';
+
 const ApiClient = {
     /**
      * Obtiene la lista de pedidos
@@ -52,6 +56,15 @@ const ApiClient = {
             console.error('Error en actualizarEstadoPedido:', error);
             throw error;
         }
+    },
+
+    /**
+     * Abre la conexión Server-Sent Events con los cambios de pedidos
+     * @returns {EventSource|null} null si el navegador no lo soporta
+     */
+    abrirEventos() {
+        if (!window.EventSource) return null;
+        return new EventSource(EVENTOS_URL);
     }
 };
 
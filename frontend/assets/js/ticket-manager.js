@@ -5,7 +5,9 @@
 const TicketManager = {
     refreshInterval: null,
     autoRefreshEnabled: true,
-    refreshRate: 10000, // 10 segundos
+    refreshRate: 10000, // 10 segundos (solo si no hay flujo de eventos)
+    pedidos: [],
+    fuenteEventos: null,
 
     /**
      * Inicializa el gestor de tickets
@@ -13,7 +15,7 @@ const TicketManager = {
     init() {
         this.setupEventListeners();
         this.cargarPedidos();
-        this.iniciarAutoRefresh();
+        this.conectarEventos();
     },
 
     /**
@@ -31,8 +33,8 @@ const TicketManager = {
      */
     async cargarPedidos() {
         try {
-            const pedidos = await ApiClient.getPedidos('tablero');
-            BoardRenderer.render(pedidos);
+            this.pedidos = await ApiClient.getPedidos('tablero');
+            BoardRenderer.render(this.pedidos);
         } catch (error) {
             console.error('Error al cargar pedidos:', error);
             this.mostrarError('No se pudieron cargar los pedidos');
@@ -54,11 +56,58 @@ const TicketManager = {
         }
     },
 
+    /**
+     * Se suscribe a los cambios de pedidos: el tablero solo se actualiza
+     * cuando algo cambia, y vuelve al refresh periódico si se pierde la conexión
+     */
+    conectarEventos() {
+        const fuente = ApiClient.abrirEventos();
+        if (!fuente) {
+            this.iniciarAutoRefresh();
+            return;
+        }
+
+        fuente.addEventListener('conectado', () => this.detenerAutoRefresh());
+        fuente.addEventListener('nuevo_pedido', (evento) => {
+            // El aviso inmediato del chatbot no trae filas: llegan con el siguiente sondeo
+            const datos = JSON.parse(evento.data);
+            if (datos.filas) this.aplicarCambios(datos.filas);
+        });
+        fuente.addEventListener('reinicio', () => this.cargarPedidos());
+        fuente.addEventListener('estado', (evento) => {
+            this.aplicarCambios(JSON.parse(evento.data).filas);
+        });
+        // EventSource reintenta solo (con Last-Event-ID); mientras tanto, refresh periódico
+        fuente.onerror = () => this.iniciarAutoRefresh();
+
+        this.fuenteEventos = fuente;
+    },
+
+    /**
+     * Aplica sobre la lista cargada las filas que cambiaron de estado
+     * @param {Array} filas - Filas de pedidos con su nuevo estado
+     */
+    aplicarCambios(filas) {
+        filas.forEach(fila => {
+            const indice = this.pedidos.findIndex(p => p.id == fila.id);
+            if (fila.estado === 'archivado') {
+                if (indice >= 0) this.pedidos.splice(indice, 1);
+            } else if (indice >= 0) {
+                this.pedidos[indice] = fila;
+            } else {
+                this.pedidos.push(fila);
+            }
+        });
+
+        this.pedidos.sort((a, b) => b.id - a.id);
+        BoardRenderer.render(this.pedidos);
+    },
+
     /**
      * Inicia el refresh automático
      */
     iniciarAutoRefresh() {
-        if (this.autoRefreshEnabled) {
+        if (this.autoRefreshEnabled && !this.refreshInterval) {
             this.refreshInterval = setInterval(() => {
                 this.cargarPedidos();
             }, this.refreshRate);